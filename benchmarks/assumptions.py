@@ -0,0 +1,58 @@
+"""
+ This file is part of wit4java, an execution-based violation-witness validator for Java
+ https://github.com/wit4java/wit4java.
+
+ Compares the assumption extractor with and without its fast path for literal
+ assignments on large generated witnesses, usage: python benchmarks/assumptions.py [edges ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from os.path import abspath, dirname
+
+sys.path.append(dirname(dirname(abspath(__file__))))
+
+from generators import generate_graphml_witness, main_assumptions
+from wit4java.processors import AssumptionExtractor, GraphMLWitnessReader, WitnessProcessor
+
+
+def measure(function, data):
+    start = time.perf_counter()
+    result = function(data)
+    return result, time.perf_counter() - start
+
+
+def main(sizes):
+    print(
+        f"{'edges':>8} {'witness (s)':>12} {'regex (s)':>10} {'literal (s)':>12} "
+        f"{'speed-up':>9}"
+    )
+    with tempfile.TemporaryDirectory(prefix="wit4java-bench-") as directory:
+        for edges in sizes:
+            path = os.path.join(directory, f"witness-{edges}.graphml")
+            generate_graphml_witness(path, main_assumptions(edges))
+            batch = [
+                ((data["originFileName"], data["startline"]), data["assumption"])
+                for data in GraphMLWitnessReader(path)
+            ]
+            regex_values, regex_time = measure(
+                AssumptionExtractor(literal_path=False).extract_batch, batch
+            )
+            literal_values, literal_time = measure(
+                AssumptionExtractor().extract_batch, batch
+            )
+            if literal_values != regex_values:
+                print(f"warning: the values of {edges} edges differ", file=sys.stderr)
+            witness = WitnessProcessor(directory, path)
+            _, witness_time = measure(lambda _: witness.extract_assumptions(), None)
+            print(
+                f"{edges:>8} {witness_time:>12.3f} {regex_time:>10.3f} "
+                f"{literal_time:>12.3f} {regex_time / literal_time:>8.1f}x"
+            )
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or [10000, 100000])
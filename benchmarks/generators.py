@@ -0,0 +1,244 @@
+"""
+ This file is part of wit4java, an execution-based violation-witness validator for Java
+ https://github.com/wit4java/wit4java.
+
+ Generators of synthetic benchmarks and witnesses for the benchmark suite
+"""
+
+import os
+from typing import Iterable, List, Tuple
+
+GRAPHML_HEADER = """<?xml version="1.0" encoding="UTF-8" standalone="no"?>
+<graphml xmlns="http://graphml.graphdrawing.org/xmlns" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">
+<key attr.name="originFileName" attr.type="string" for="edge" id="originfile"/>
+<key attr.name="isViolationNode" attr.type="boolean" for="node" id="violation"><default>false</default></key>
+<key attr.name="isEntryNode" attr.type="boolean" for="node" id="entry"><default>false</default></key>
+<key attr.name="startline" attr.type="int" for="edge" id="startline"/>
+<key attr.name="assumption" attr.type="string" for="edge" id="assumption"/>
+<key attr.name="assumption.scope" attr.type="string" for="edge" id="assumption.scope"/>
+<key attr.name="witness-type" attr.type="string" for="graph" id="witness-type"/>
+<key attr.name="producer" attr.type="string" for="graph" id="producer"/>
+<graph edgedefault="directed">
+<data key="witness-type">violation_witness</data>
+<data key="producer">JBMC 5.22.0</data>
+<node id="N0"><data key="entry">true</data></node>
+"""
+GRAPHML_EDGE = """<node id="N{target}"/>
+<edge source="N{source}" target="N{target}">
+<data key="originfile">{file_name}</data>
+<data key="startline">{line}</data>
+<data key="assumption">{variable} = {value};</data>
+<data key="assumption.scope">java::{program}.main:([Ljava/lang/String;)V</data>
+</edge>
+"""
+GRAPHML_FOOTER = """<node id="N{target}"><data key="violation">true</data></node>
+<edge source="N{source}" target="N{target}"/>
+</graph>
+</graphml>
+"""
+
+YAML_HEADER = """- entry_type: violation_sequence
+  metadata:
+    format_version: "2.0"
+    uuid: 00000000-0000-0000-0000-000000000000
+    creation_time: 2024-01-01T00:00:00Z
+    producer:
+      name: JBMC
+      version: "5.22.0"
+    task:
+      input_files:
+        - Main.java
+      specification: "G assert"
+      language: Java
+  content:
+"""
+YAML_WAYPOINT = """    - segment:
+        - waypoint:
+            type: assumption
+            action: follow
+            location:
+              file_name: {file_name}
+              line: {line}
+            constraint:
+              value: "{variable} == {value}"
+"""
+YAML_FOOTER = """    - segment:
+        - waypoint:
+            type: target
+            action: follow
+            location:
+              file_name: Main.java
+              line: {line}
+"""
+
+MAIN_TEMPLATE = """import org.sosy_lab.sv_benchmarks.Verifier;
+{imports}
+
+public class Main {{
+  public static void main(String[] args) {{
+    int rounds = Verifier.nondetInt();
+    long sum = 0;
+    for (int i = 0; i < rounds; i++) {{
+      sum += Verifier.nondetInt();
+    }}
+    if (rounds < 0) {{
+{calls}
+    }}
+    assert sum != {target};
+  }}
+}}
+"""
+# Lines of the nondet calls in MAIN_TEMPLATE, after the import lines
+MAIN_ROUNDS_LINE = 6
+MAIN_LOOP_LINE = 9
+MAIN_ASSERT_LINE = 14
+
+CLASS_TEMPLATE = """package bench.p{package};
+
+import org.sosy_lab.sv_benchmarks.Verifier;
+{imports}
+
+public class Class{index} {{
+  static int nondetValue{index}() {{
+    return Verifier.nondetInt();
+  }}
+
+  public static long run() {{
+    long total = 0;
+{body}
+    return total;
+  }}
+}}
+"""
+CLASS_CALL_TEMPLATE = """    total += Verifier.nondetInt() + nondetValue{index}();
+    if (Verifier.nondetBoolean()) {{
+      total -= Verifier.nondetLong() % {modulus};
+    }}
+"""
+
+VERIFIER_STUB = """package org.sosy_lab.sv_benchmarks;
+
+public final class Verifier {
+  public static void assume(boolean condition) {}
+
+  public static boolean nondetBoolean() { return false; }
+
+  public static int nondetInt() { return 0; }
+
+  public static long nondetLong() { return 0; }
+}
+"""
+
+
+def _write(path, data) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(data)
+
+
+def generate_java_benchmark(
+    directory, classes=100, calls_per_class=10, packages=10
+) -> Tuple[str, str]:
+    """
+    Generates a benchmark whose Main sums a nondet number of nondet ints and asserts
+    the sum is not -1. Main imports every class, each class imports its predecessor
+    and has many nondet call sites, all compiled but never run.
+    :param directory: Directory to create the benchmark and common packages in
+    :param classes: Number of classes besides Main
+    :param calls_per_class: Number of blocks of nondet calls per class
+    :param packages: Number of packages the classes are spread over
+    :return: Paths of the benchmark and of the common package directory
+    """
+    benchmark = os.path.join(directory, "benchmark")
+    common = os.path.join(directory, "common")
+    _write(
+        os.path.join(common, "org/sosy_lab/sv_benchmarks/Verifier.java"), VERIFIER_STUB
+    )
+    for index in range(classes):
+        package = index % packages
+        imports = (
+            f"import bench.p{(index - 1) % packages}.Class{index - 1};" if index else ""
+        )
+        body = "".join(
+            CLASS_CALL_TEMPLATE.format(index=index, modulus=call + 2)
+            for call in range(calls_per_class)
+        )
+        _write(
+            os.path.join(benchmark, f"bench/p{package}/Class{index}.java"),
+            CLASS_TEMPLATE.format(
+                package=package, index=index, imports=imports, body=body
+            ),
+        )
+    # The imports share a line, keeping the lines of MAIN_TEMPLATE fixed
+    imports = "".join(
+        f"import bench.p{index % packages}.Class{index};" for index in range(classes)
+    )
+    calls = "      " + " ".join(
+        f"sum += Class{index}.run();" for index in range(classes)
+    )
+    _write(
+        os.path.join(benchmark, "Main.java"),
+        MAIN_TEMPLATE.format(imports=imports, calls=calls, target=-1),
+    )
+    return benchmark, common
+
+
+def main_assumptions(edges) -> List[Tuple[str, int, str, str]]:
+    """
+    The assumptions of a witness violating the assertion of a generated Main
+    :param edges: Number of assumptions, at least 1
+    :return: (file name, line, variable, value) per assumption, the first setting the
+    number of rounds and the others summing to -1
+    """
+    rounds = edges - 1
+    assumptions = [("Main.java", MAIN_ROUNDS_LINE, "rounds", str(rounds))]
+    for index in range(rounds):
+        value = -1 if index == 0 else 0
+        assumptions.append(("Main.java", MAIN_LOOP_LINE, "return_tmp", str(value)))
+    return assumptions
+
+
+def generate_graphml_witness(
+    path, assumptions: Iterable[Tuple[str, int, str, str]]
+) -> None:
+    """
+    Writes a GraphML violation witness with one edge per assumption
+    :param path: Path of the witness
+    :param assumptions: (file name, line, variable, value) per assumption edge
+    """
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(GRAPHML_HEADER)
+        node = 0
+        for file_name, line, variable, value in assumptions:
+            file.write(
+                GRAPHML_EDGE.format(
+                    source=node,
+                    target=node + 1,
+                    file_name=file_name,
+                    line=line,
+                    variable=variable,
+                    value=value,
+                    program=file_name[: -len(".java")].replace("/", "."),
+                )
+            )
+            node += 1
+        file.write(GRAPHML_FOOTER.format(source=node, target=node + 1))
+
+
+def generate_yaml_witness(
+    path, assumptions: Iterable[Tuple[str, int, str, str]]
+) -> None:
+    """
+    Writes a YAML 2.0 violation witness with one assumption waypoint per assumption
+    :param path: Path of the witness
+    :param assumptions: (file name, line, variable, value) per waypoint
+    """
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(YAML_HEADER)
+        for file_name, line, variable, value in assumptions:
+            file.write(
+                YAML_WAYPOINT.format(
+                    file_name=file_name, line=line, variable=variable, value=value
+                )
+            )
+        file.write(YAML_FOOTER.format(line=MAIN_ASSERT_LINE))
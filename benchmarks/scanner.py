@@ -0,0 +1,68 @@
+"""
+ This file is part of wit4java, an execution-based violation-witness validator for Java
+ https://github.com/wit4java/wit4java.
+
+ Compares the token scanner for nondet call sites with the full javalang parse
+ on generated java sources, usage: python benchmarks/scanner.py [methods ...]
+"""
+
+import sys
+import time
+from os.path import abspath, dirname
+
+sys.path.append(dirname(dirname(abspath(__file__))))
+
+from wit4java.processors import _parse_java_source, _scan_java_tokens
+
+METHOD_TEMPLATE = """
+  static int helper{index}(int a) {{
+    int x = a + {index}; // plain arithmetic
+    if (x > 3 && check(x)) {{
+      x = Math.max(x, values[{index} % 7].length());
+    }}
+    String s = "value(" + x + ")";
+    return s.length() + x;
+  }}
+"""
+NONDET_TEMPLATE = """
+  static int nondet{index}() {{
+    return Verifier.nondetInt();
+  }}
+"""
+
+
+def generate_source(methods, nondet_every=50) -> str:
+    """
+    Generates a java class with helper methods, some of them nondet wrappers
+    :param methods: Number of methods in the class
+    :param nondet_every: Every how many methods one is a nondet wrapper
+    :return: The java source
+    """
+    parts = ["import org.sosy_lab.sv_benchmarks.Verifier;\n\npublic class Main {\n"]
+    for index in range(methods):
+        template = NONDET_TEMPLATE if index % nondet_every == 0 else METHOD_TEMPLATE
+        parts.append(template.format(index=index))
+    parts.append("}\n")
+    return "".join(parts)
+
+
+def measure(function, data) -> float:
+    start = time.perf_counter()
+    function(data)
+    return time.perf_counter() - start
+
+
+def main(sizes):
+    print(f"{'methods':>8} {'lines':>8} {'scan (s)':>9} {'parse (s)':>10} {'speed-up':>9}")
+    for methods in sizes:
+        data = generate_source(methods)
+        scan_time = measure(_scan_java_tokens, data)
+        parse_time = measure(_parse_java_source, data)
+        print(
+            f"{methods:>8} {data.count(chr(10)):>8} {scan_time:>9.3f} "
+            f"{parse_time:>10.3f} {parse_time / scan_time:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or [100, 1000, 5000])
@@ -0,0 +1,106 @@
+"""
+ This file is part of wit4java, an execution-based violation-witness validator for Java
+ https://github.com/wit4java/wit4java.
+
+ Times wit4java from a cold interpreter, for --version and a small validation, and
+ checks the times against a startup budget, usage: python benchmarks/startup.py --help
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from os.path import abspath, dirname
+from typing import List
+
+from generators import generate_graphml_witness, generate_java_benchmark, main_assumptions
+
+WIT4JAVA = os.path.join(dirname(dirname(abspath(__file__))), "bin", "wit4java")
+# Seconds from starting the interpreter to its exit, medians over the runs
+DEFAULT_VERSION_BUDGET = 0.25
+DEFAULT_VALIDATION_BUDGET = 0.5
+
+
+def cold_run(arguments: List[str]) -> float:
+    """
+    Runs wit4java in a new interpreter
+    :param arguments: The command-line options
+    :return: Seconds until the interpreter exited
+    """
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, WIT4JAVA] + arguments,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        check=False,
+    )
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time the startup of wit4java against a budget."
+    )
+    parser.add_argument("--runs", type=int, default=10, help="Runs per measurement")
+    parser.add_argument(
+        "--version-budget",
+        type=float,
+        default=DEFAULT_VERSION_BUDGET,
+        help="Seconds allowed for wit4java --version",
+    )
+    parser.add_argument(
+        "--validation-budget",
+        type=float,
+        default=DEFAULT_VALIDATION_BUDGET,
+        help="Seconds allowed for validating a small benchmark, excluding javac and java",
+    )
+    config = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="wit4java-startup-") as directory:
+        benchmark, common = generate_java_benchmark(directory, classes=2, calls_per_class=1)
+        witness = os.path.join(directory, "witness.graphml")
+        generate_graphml_witness(witness, main_assumptions(10))
+        # Without a JDK on the path only the Python side of the validation is timed
+        environment_path = os.environ["PATH"]
+        os.environ["PATH"] = os.pathsep.join(
+            entry
+            for entry in environment_path.split(os.pathsep)
+            if not os.path.exists(os.path.join(entry, "javac"))
+        )
+        try:
+            measurements = {
+                "version": (
+                    [cold_run(["--version"]) for _ in range(config.runs)],
+                    config.version_budget,
+                ),
+                "validation": (
+                    [
+                        cold_run(
+                            [benchmark, "--packages", common, "--witness", witness]
+                            + ["--no-cache"]
+                        )
+                        for _ in range(config.runs)
+                    ],
+                    config.validation_budget,
+                ),
+            }
+        finally:
+            os.environ["PATH"] = environment_path
+
+    over_budget = []
+    print(f"{'run':<12} {'budget (s)':>10} {'median (s)':>10} {'max (s)':>8}")
+    for name, (seconds, budget) in measurements.items():
+        median = statistics.median(seconds)
+        flag = "  OVER BUDGET" if median > budget else ""
+        if flag:
+            over_budget.append(name)
+        print(f"{name:<12} {budget:>10.3f} {median:>10.3f} {max(seconds):>8.3f}{flag}")
+    if over_budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+ This file is part of wit4java, an execution-based violation-witness validator for Java
+ https://github.com/wit4java/wit4java.
+
+ Times the stages of a validation on generated benchmarks and witnesses and compares
+ them with stored baseline numbers, usage: python benchmarks/suite.py --help
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from os.path import abspath, dirname
+from typing import Dict, List
+
+sys.path.append(dirname(dirname(abspath(__file__))))
+
+from generators import (
+    generate_graphml_witness,
+    generate_java_benchmark,
+    generate_yaml_witness,
+    main_assumptions,
+)
+from wit4java import __version__
+from wit4java.cds import ClassDataArchive
+from wit4java.processors import JavaFileProcessor, WitnessProcessor, filter_assumptions
+from wit4java.testharness import TestHarness
+
+BASELINE_PATH = os.path.join(dirname(abspath(__file__)), "baseline.json")
+DEFAULT_SIZES = [100, 1000, 10000, 100000]
+# Differences below this many seconds are noise rather than regressions
+MIN_REGRESSION_SECONDS = 0.05
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def build_harness(harness: TestHarness, values: List) -> None:
+    harness._build_unit_test()
+    harness._build_test_verifier()
+    harness.update_assumptions(values)
+
+
+def run_suite(sizes: List[int], classes: int, calls_per_class: int) -> Dict[str, float]:
+    """
+    Generates a benchmark and witnesses of each size and times every stage
+    :param sizes: Numbers of assumption edges of the witnesses
+    :param classes: Number of classes of the benchmark besides Main
+    :param calls_per_class: Number of blocks of nondet calls per class
+    :return: Seconds per stage, keyed by stage name and witness size
+    """
+    timings = {}
+    can_compile = shutil.which("javac") is not None
+    with tempfile.TemporaryDirectory(prefix="wit4java-bench-") as directory:
+        benchmark, common = generate_java_benchmark(directory, classes, calls_per_class)
+        workspace = os.path.join(directory, "workspace")
+        processor = JavaFileProcessor(workspace, benchmark, [common])
+        _, timings["workspace"] = timed(processor.preprocess)
+        mappings, timings["nondet_extraction"] = timed(processor.extract_nondet_mappings)
+        harness = TestHarness(workspace)
+        for size in sizes:
+            assumptions = main_assumptions(size)
+            for witness_format, generate in (
+                ("graphml", generate_graphml_witness),
+                ("yaml", generate_yaml_witness),
+            ):
+                path = os.path.join(directory, f"witness-{size}.{witness_format}")
+                generate(path, assumptions)
+                witness = WitnessProcessor(workspace, path)
+                witness.preprocess()
+                extracted, timings[f"witness_parsing/{witness_format}/{size}"] = timed(
+                    witness.extract_assumptions
+                )
+                os.remove(path)
+            values = filter_assumptions(mappings, extracted)
+            _, timings[f"harness_build/{size}"] = timed(build_harness, harness, values)
+            if not can_compile:
+                continue
+            if "compile" not in timings:
+                _, timings["compile"] = timed(harness._compile_test_harness)
+                archive = ClassDataArchive(os.path.join(directory, "cache"))
+                archive_paths, timings["cds_archive"] = timed(archive.paths)
+                if archive_paths is None:
+                    print("warning: no class data sharing archive", file=sys.stderr)
+            # The same run without and with the class data sharing archive
+            for stage, class_data_archive in (("run", None), ("run_cds", archive)):
+                harness.class_data_archive = class_data_archive
+                outcome, timings[f"{stage}/{size}"] = timed(harness.run_test_harness)
+                if outcome != "wit4java: Witness Correct":
+                    print(f"warning: {stage}/{size} gave {outcome}", file=sys.stderr)
+    return timings
+
+
+def compare(timings: Dict[str, float], baseline: Dict[str, float], tolerance: float):
+    """
+    Prints the timings next to the baseline ones
+    :return: The stages that got slower than the tolerance allows
+    """
+    regressions = []
+    print(f"{'stage':<32} {'baseline (s)':>12} {'now (s)':>9} {'ratio':>7}")
+    for stage, seconds in timings.items():
+        reference = baseline.get(stage)
+        if reference is None:
+            print(f"{stage:<32} {'-':>12} {seconds:>9.3f} {'-':>7}")
+            continue
+        ratio = seconds / reference if reference else float("inf")
+        slower = (
+            seconds > reference * tolerance
+            and seconds - reference > MIN_REGRESSION_SECONDS
+        )
+        if slower:
+            regressions.append(stage)
+        flag = "  REGRESSION" if slower else ""
+        print(f"{stage:<32} {reference:>12.3f} {seconds:>9.3f} {ratio:>6.2f}x{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time the stages of wit4java on generated benchmarks and witnesses."
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=DEFAULT_SIZES,
+        help="Numbers of assumption edges of the generated witnesses, up to 1000000",
+    )
+    parser.add_argument(
+        "--classes", type=int, default=200, help="Classes of the generated benchmark"
+    )
+    parser.add_argument(
+        "--calls-per-class",
+        type=int,
+        default=10,
+        help="Blocks of nondet calls per generated class",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Runs of the suite, the fastest time of each stage is kept",
+    )
+    parser.add_argument(
+        "--baseline", default=BASELINE_PATH, help="JSON file of the baseline timings"
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Store the timings as the new baseline instead of comparing with it",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=1.5,
+        help="Ratio to the baseline above which a stage counts as a regression",
+    )
+    config = parser.parse_args()
+
+    timings = {}
+    for _ in range(config.repeat):
+        for stage, seconds in run_suite(
+            config.sizes, config.classes, config.calls_per_class
+        ).items():
+            timings[stage] = min(seconds, timings.get(stage, seconds))
+
+    if config.save_baseline:
+        baseline = {
+            "metadata": {
+                "wit4java": __version__,
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "date": datetime.date.today().isoformat(),
+                "sizes": config.sizes,
+                "classes": config.classes,
+                "calls_per_class": config.calls_per_class,
+            },
+            "timings": {stage: round(seconds, 4) for stage, seconds in timings.items()},
+        }
+        with open(config.baseline, "w", encoding="utf-8") as file:
+            json.dump(baseline, file, indent=2)
+            file.write("\n")
+        compare(timings, {}, config.tolerance)
+        return
+
+    baseline = {}
+    if os.path.exists(config.baseline):
+        with open(config.baseline, "r", encoding="utf-8") as file:
+            baseline = json.load(file)["timings"]
+    regressions = compare(timings, baseline, config.tolerance)
+    if regressions:
+        print(f"{len(regressions)} stage(s) regressed: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+package org.sosy_lab.sv_benchmarks;
+
+public final class Verifier {
+  public static void assume(boolean condition) {}
+
+  public static boolean nondetBoolean() {
+    return false;
+  }
+
+  public static int nondetInt() {
+    return 0;
+  }
+
+  public static long nondetLong() {
+    return 0;
+  }
+
+  public static char nondetChar() {
+    return 0;
+  }
+
+  public static String nondetString() {
+    return "";
+  }
+}
@@ -0,0 +1,20 @@
+import org.sosy_lab.sv_benchmarks.Verifier;
+import shapes.*;
+import util.Helper;
+
+public class Main {
+  static long nondetWrapper() {
+    return Verifier.nondetLong();
+  }
+
+  public static void main(String[] args) {
+    int x = Verifier.nondetInt();
+    boolean b = Verifier.nondetBoolean();
+    long l = nondetWrapper();
+    String s = Helper.nondetName();
+    Square square = new Square(x);
+    if (b && l > 0 && s.length() > 0) {
+      assert square.area() != 49;
+    }
+  }
+}
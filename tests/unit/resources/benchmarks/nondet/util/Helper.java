@@ -0,0 +1,14 @@
+package util;
+
+import org.sosy_lab.sv_benchmarks.Verifier;
+
+public class Helper {
+  public static String nondetName() {
+    return Verifier.nondetString();
+  }
+
+  public static char letter() {
+    char c = Verifier.nondetChar();
+    return c;
+  }
+}
@@ -0,0 +1,48 @@
+package p;
+import static a.b.C.m;
+import a.b.*;
+import org.sosy_lab.sv_benchmarks.Verifier;
+/** doc with Verifier.nondetInt() */
+public class Main<T extends Comparable<T>> implements Runnable {
+  enum E { A(1), B(f()) { int z() { return 2; } }; E(int x) {} static int f() { return Verifier.nondetInt(); } }
+  @Deprecated
+  static long w() {
+    return
+      Verifier.nondetLong();
+  }
+  int f() { return org.sosy_lab.sv_benchmarks.Verifier.nondetInt(); }
+  public void run() {}
+  abstract java.util.List<String> abs();
+  Main() { super(); }
+  Main(int x) throws Exception { this(); }
+  <U> U gen(U u) throws java.io.IOException, RuntimeException { return u; }
+  int[] arr()[] { return null; }
+  void g() {
+    int x = this.w(
+    ) + foo.bar
+      .baz(1).qux();
+    boolean c = x > w() && x < f();
+    String s = "x(".trim() + 'c' + "\"q(";
+    x = a[2].len();
+    if (x > 3) { x = f(); } else { w(); }
+    for (int i = 0; i < n(); i++) { m(i); }
+    Runnable r = () -> r();
+    java.util.function.Supplier<Integer> sp = () -> { return Verifier.nondetInt(); };
+    Object o = new Object() { public String toString() { return s(); } };
+    new Thread(() -> run()).start();
+    a().b.c();
+    this.a.b();
+    x.y[0].z();
+    Verifier.assume(x != 1); String t = Verifier.nondetString(); char ch = Verifier.nondetChar();
+    switch (k()) { case 1: x = h(); break; default: }
+    synchronized (lock()) { z(); }
+    label: while (cond()) { continue label; }
+    int[] q = {q1(), q2()};
+    assert check() : msg();
+    throw err();
+  }
+  @SuppressWarnings("x") int h() { return Verifier.nondetShort(); }
+  static double dd() { double d = 1e10; return d; }
+}
+interface I { default int k() { return 1; } int m(int a); }
+@interface Ann { String value() default "x"; }
@@ -0,0 +1,128 @@
+import os.path
+import tempfile
+import unittest
+from shutil import rmtree
+from unittest import mock
+
+import sys
+
+sys.path.append("../..")
+
+from wit4java.batch import BatchValidator, collect_witnesses, fingerprint_assumptions
+
+RESOURCES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources")
+
+
+class TestCollectWitnesses(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        for name in ["b.graphml", "a.graphml", "notes.txt"]:
+            with open(os.path.join(self.tmp_dir, name), "w", encoding="utf-8"):
+                pass
+
+    def tearDown(self):
+        rmtree(self.tmp_dir)
+
+    def test_files_are_kept_in_order(self):
+        self.assertListEqual(
+            ["z.graphml", "y.graphml"], collect_witnesses(["z.graphml", "y.graphml"])
+        )
+
+    def test_directory_is_expanded_to_sorted_witnesses(self):
+        self.assertListEqual(
+            [
+                os.path.join(self.tmp_dir, "a.graphml"),
+                os.path.join(self.tmp_dir, "b.graphml"),
+            ],
+            collect_witnesses([self.tmp_dir]),
+        )
+
+
+class TestFingerprintAssumptions(unittest.TestCase):
+    def test_same_sequence_same_fingerprint(self):
+        self.assertEqual(
+            fingerprint_assumptions("bench", ["1", None, "x"]),
+            fingerprint_assumptions("bench", ["1", None, "x"]),
+        )
+
+    def test_sequences_and_benchmarks_are_told_apart(self):
+        fingerprints = {
+            fingerprint_assumptions("bench", ["ab"]),
+            fingerprint_assumptions("bench", ["a", "b"]),
+            fingerprint_assumptions("bench", [None]),
+            fingerprint_assumptions("bench", ["-1"]),
+            fingerprint_assumptions("bench", []),
+            fingerprint_assumptions("other", ["ab"]),
+        }
+        self.assertEqual(6, len(fingerprints))
+
+
+class TestDuplicateWitnesses(unittest.TestCase):
+    BENCHMARK_PATH = os.path.join(RESOURCES, "benchmarks/nondet")
+    PACKAGE_PATHS = [os.path.join(RESOURCES, "benchmarks/common")]
+    WITNESS_PATH = os.path.join(RESOURCES, "witnesses/witness.graphml")
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        with open(self.WITNESS_PATH, "r", encoding="utf-8") as file:
+            witness = file.read()
+        # The parser fixture has a string at the nondetLong call, unlike these
+        self.witness = os.path.join(self.tmp_dir, "witness.graphml")
+        with open(self.witness, "w", encoding="utf-8") as file:
+            file.write(witness.replace("List<Integer>", "5"))
+        # Byte for byte different, with the same assumptions
+        self.copy = os.path.join(self.tmp_dir, "copy.graphml")
+        with open(self.copy, "w", encoding="utf-8") as file:
+            file.write(witness.replace("List<Integer>", "5") + "\n<!-- rerun -->\n")
+
+    def tearDown(self):
+        rmtree(self.tmp_dir)
+
+    def test_harness_runs_once_per_assumption_sequence(self):
+        with BatchValidator(
+            self.BENCHMARK_PATH, self.PACKAGE_PATHS
+        ) as validator, mock.patch.object(
+            validator, "_run", return_value="wit4java: Witness Correct"
+        ) as run:
+            outcomes = [validator.validate(self.witness), validator.validate(self.copy)]
+        run.assert_called_once()
+        self.assertListEqual(["wit4java: Witness Correct"] * 2, outcomes)
+
+    def test_values_past_the_violation_do_not_decide(self):
+        # The malformed value at Main:7 follows the x at Main:11 the assertion fails on
+        with open(self.WITNESS_PATH, "r", encoding="utf-8") as file:
+            witness = file.read()
+        witness_path = os.path.join(self.tmp_dir, "trailing.graphml")
+        with open(witness_path, "w", encoding="utf-8") as file:
+            file.write(
+                witness.replace(
+                    '<data key="startline">6</data>', '<data key="startline">11</data>'
+                )
+            )
+        with BatchValidator(
+            self.BENCHMARK_PATH, self.PACKAGE_PATHS
+        ) as validator, mock.patch.object(
+            validator, "_run", return_value="wit4java: Witness Correct"
+        ) as run:
+            outcome = validator.validate(witness_path)
+        run.assert_called_once_with(["42", "List<Integer>"])
+        self.assertEqual("wit4java: Witness Correct", outcome)
+
+    def test_mismatch_explains_a_failed_run(self):
+        with BatchValidator(
+            self.BENCHMARK_PATH, self.PACKAGE_PATHS
+        ) as validator, mock.patch.object(
+            validator,
+            "_run",
+            return_value="wit4java: Could not validate witness\nwit4java trace: ...",
+        ):
+            outcome = validator.validate(self.WITNESS_PATH)
+        self.assertEqual(
+            "wit4java: Could not validate witness "
+            "('List<Integer>' is not an integer at Main:7)\nwit4java trace: ...",
+            outcome,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
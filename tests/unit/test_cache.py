@@ -0,0 +1,170 @@
+import json
+import os.path
+import tempfile
+import time
+import unittest
+from shutil import rmtree
+from os.path import exists
+
+import sys
+
+sys.path.append("../..")
+
+from wit4java.cache import (
+    CompilationCache,
+    ParseCache,
+    ResultCache,
+    hash_source_trees,
+)
+
+
+def write_file(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(data)
+
+
+class TestCompilationCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache = CompilationCache(os.path.join(self.tmp_dir, "cache"))
+        self.workspace = os.path.join(self.tmp_dir, "workspace")
+        write_file(os.path.join(self.workspace, "Main.class"), "main")
+        write_file(os.path.join(self.workspace, "Test.class"), "test")
+        write_file(os.path.join(self.workspace, "pkg/Util.class"), "util")
+
+    def tearDown(self):
+        rmtree(self.tmp_dir)
+
+    def test_restore_of_unknown_key_is_a_miss(self):
+        self.assertFalse(self.cache.restore("unknown", self.workspace))
+        self.assertEqual((0, 1), (self.cache.hits, self.cache.misses))
+
+    def test_stored_classes_are_restored_without_exclusions(self):
+        self.cache.store("key", self.workspace, exclude=["Test.class"])
+        destination = os.path.join(self.tmp_dir, "destination")
+        self.assertTrue(self.cache.restore("key", destination))
+        self.assertEqual((1, 0), (self.cache.hits, self.cache.misses))
+        self.assertTrue(exists(os.path.join(destination, "Main.class")))
+        self.assertTrue(exists(os.path.join(destination, "pkg/Util.class")))
+        self.assertFalse(exists(os.path.join(destination, "Test.class")))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.cache.max_bytes = 20
+        self.cache.store("old", self.workspace)
+        time.sleep(0.01)
+        self.cache.store("new", self.workspace)
+        self.assertFalse(self.cache.restore("old", self.workspace))
+        self.assertTrue(self.cache.restore("new", self.workspace))
+
+
+class TestParseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache = ParseCache(self.tmp_dir)
+
+    def tearDown(self):
+        rmtree(self.tmp_dir)
+
+    def test_stored_result_is_returned(self):
+        self.assertIsNone(self.cache.get("ab12"))
+        self.cache.put("ab12", {"imports": ["util.Helper"]})
+        self.assertDictEqual({"imports": ["util.Helper"]}, self.cache.get("ab12"))
+        self.assertEqual((1, 1), (self.cache.hits, self.cache.misses))
+
+    def test_least_recently_used_scans_are_evicted(self):
+        self.cache.put("ab12", {"imports": []})
+        size = os.path.getsize(self.cache._entry("ab12"))
+        self.cache.max_bytes = 2 * size
+        for index, key in enumerate(("ab12", "cd34", "ef56")):
+            self.cache.put(key, {"imports": []})
+            used = time.time() - 100 + index
+            os.utime(self.cache._entry(key), (used, used))
+        self.cache.get("ab12")
+        self.cache.evict()
+        self.assertTrue(exists(self.cache._entry("ab12")))
+        self.assertFalse(exists(self.cache._entry("cd34")))
+        self.assertTrue(exists(self.cache._entry("ef56")))
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache = ResultCache(self.tmp_dir)
+        self.witness = os.path.join(self.tmp_dir, "witness.graphml")
+        write_file(self.witness, "<graphml/>")
+
+    def tearDown(self):
+        rmtree(self.tmp_dir)
+
+    def test_key_depends_on_witness_and_sources(self):
+        key = self.cache.key("sources", self.witness, extra=["3.1"])
+        self.assertEqual(key, self.cache.key("sources", self.witness, extra=["3.1"]))
+        self.assertNotEqual(key, self.cache.key("other", self.witness, extra=["3.1"]))
+        self.assertNotEqual(key, self.cache.key("sources", self.witness, extra=["3.2"]))
+        write_file(self.witness, "<graphml></graphml>")
+        self.assertNotEqual(key, self.cache.key("sources", self.witness, extra=["3.1"]))
+
+    def test_only_definite_verdicts_are_stored(self):
+        self.cache.put("ab12", "wit4java: Witness Correct")
+        self.cache.put("cd34", "wit4java: Could not validate witness")
+        self.assertEqual("wit4java: Witness Correct", self.cache.get("ab12"))
+        self.assertIsNone(self.cache.get("cd34"))
+        self.assertEqual((1, 1), (self.cache.hits, self.cache.misses))
+
+    def test_expired_results_are_misses(self):
+        self.cache.put("ab12", "wit4java: Witness Spurious")
+        entry = self.cache._entry("ab12")
+        created = time.time() - self.cache.max_age - 60
+        write_file(
+            entry,
+            json.dumps({"outcome": "wit4java: Witness Spurious", "created": created}),
+        )
+        # Recent use does not keep an entry alive
+        os.utime(entry)
+        self.assertIsNone(self.cache.get("ab12"))
+        self.assertFalse(exists(entry))
+
+    def test_results_unused_for_too_long_are_evicted(self):
+        self.cache.put("ab12", "wit4java: Witness Spurious")
+        entry = self.cache._entry("ab12")
+        expired = time.time() - self.cache.max_age - 60
+        os.utime(entry, (expired, expired))
+        self.cache.evict()
+        self.assertFalse(exists(entry))
+
+    def test_least_recently_used_results_are_evicted(self):
+        self.cache.put("ab12", "wit4java: Witness Correct")
+        size = os.path.getsize(self.cache._entry("ab12"))
+        self.cache.max_bytes = 2 * size
+        for index, key in enumerate(("ab12", "cd34", "ef56")):
+            self.cache.put(key, "wit4java: Witness Correct")
+            used = time.time() - 100 + index
+            os.utime(self.cache._entry(key), (used, used))
+        self.cache.evict()
+        self.assertFalse(exists(self.cache._entry("ab12")))
+        self.assertTrue(exists(self.cache._entry("ef56")))
+
+
+class TestHashSourceTrees(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        write_file(os.path.join(self.tmp_dir, "Main.java"), "class Main {}")
+
+    def tearDown(self):
+        rmtree(self.tmp_dir)
+
+    def test_hash_depends_on_contents_and_toolchain(self):
+        digest = hash_source_trees([self.tmp_dir], extra=["javac 17"])
+        self.assertEqual(digest, hash_source_trees([self.tmp_dir], extra=["javac 17"]))
+        self.assertNotEqual(
+            digest, hash_source_trees([self.tmp_dir], extra=["javac 21"])
+        )
+        write_file(os.path.join(self.tmp_dir, "Main.java"), "class Main { }")
+        self.assertNotEqual(
+            digest, hash_source_trees([self.tmp_dir], extra=["javac 17"])
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import os.path
+import stat
+import tempfile
+import unittest
+from shutil import rmtree
+from unittest import mock
+
+import sys
+
+sys.path.append("../..")
+
+from wit4java.cache import toolchain_versions
+from wit4java.cds import ClassDataArchive
+from wit4java.testharness import TestHarness
+
+# Stand-ins for javac and java writing what the real ones would
+FAKE_JAVAC = """#!/bin/sh
+while [ "$1" != "-d" ]; do shift; done
+touch "$2/Test.class" "$2/Main.class" "$2/Wit4javaTraining.class"
+"""
+FAKE_JAVA = """#!/bin/sh
+case "$1" in
+  -version) echo "fake 1.0" ;;
+  -XX:ArchiveClassesAtExit=*) touch "${1#-XX:ArchiveClassesAtExit=}" ;;
+esac
+"""
+
+
+def clear_toolchain():
+    toolchain_versions.cache_clear()
+    TestHarness.javac_version.__func__.cache_clear()
+    TestHarness.java_version.__func__.cache_clear()
+
+
+class TestClassDataArchive(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.bin_dir = os.path.join(self.tmp_dir, "bin")
+        os.makedirs(self.bin_dir)
+        clear_toolchain()
+
+    def tearDown(self):
+        clear_toolchain()
+        rmtree(self.tmp_dir)
+
+    def install(self, name, script):
+        path = os.path.join(self.bin_dir, name)
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(script)
+        os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+
+    def test_runs_without_archive_when_java_is_missing(self):
+        with mock.patch.dict(os.environ, {"PATH": self.bin_dir}):
+            archive = ClassDataArchive(self.tmp_dir)
+            self.assertIsNone(archive.paths())
+            self.assertListEqual(["-cp", "work"], archive.java_options("work"))
+
+    def test_archive_is_built_once_and_prefixes_class_path(self):
+        self.install("javac", FAKE_JAVAC)
+        self.install("java", FAKE_JAVA)
+        with mock.patch.dict(os.environ, {"PATH": f"{self.bin_dir}:/usr/bin:/bin"}):
+            jar, archive = ClassDataArchive(self.tmp_dir).paths()
+            self.assertEqual(os.path.dirname(jar), os.path.dirname(archive))
+            self.assertTrue(os.path.exists(archive))
+            options = ClassDataArchive(self.tmp_dir).java_options("work")
+        self.assertIn(f"-XX:SharedArchiveFile={archive}", options)
+        self.assertEqual(f"{jar}{os.pathsep}work", options[-1])
+
+    def test_missing_archive_support_is_remembered(self):
+        self.install("javac", FAKE_JAVAC)
+        self.install("java", "#!/bin/sh\necho 'fake 1.0'\n")
+        with mock.patch.dict(os.environ, {"PATH": f"{self.bin_dir}:/usr/bin:/bin"}):
+            self.assertIsNone(ClassDataArchive(self.tmp_dir).paths())
+            archive = ClassDataArchive(self.tmp_dir)
+            with mock.patch.object(archive, "_build") as build:
+                self.assertIsNone(archive.paths())
+            build.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
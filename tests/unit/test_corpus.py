@@ -0,0 +1,76 @@
+import json
+import os.path
+import tempfile
+import unittest
+from shutil import rmtree
+
+import sys
+
+sys.path.append("../..")
+
+from wit4java.corpus import load_manifest, validate_corpus
+
+
+def write_file(path, data=""):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(data)
+
+
+class TestCorpus(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        rmtree(self.tmp_dir)
+
+    def test_directory_manifest_has_a_task_per_witness(self):
+        write_file(os.path.join(self.tmp_dir, "a/benchmark/Main.java"))
+        write_file(os.path.join(self.tmp_dir, "a/witnesses/1.graphml"))
+        write_file(os.path.join(self.tmp_dir, "a/witnesses/2.graphml"))
+        write_file(os.path.join(self.tmp_dir, "b/unrelated.txt"))
+        tasks = load_manifest(self.tmp_dir, ["common"])
+        self.assertListEqual(
+            [os.path.join(self.tmp_dir, f"a/witnesses/{i}.graphml") for i in (1, 2)],
+            [task["witness"] for task in tasks],
+        )
+        self.assertListEqual(["common"], tasks[0]["packages"])
+
+    def test_jsonl_manifest_paths_are_relative_to_the_file(self):
+        manifest = os.path.join(self.tmp_dir, "manifest.jsonl")
+        write_file(
+            manifest,
+            json.dumps({"benchmark": "bench", "witness": "w.graphml"})
+            + "\n\n"
+            + json.dumps({"benchmark": "/abs", "packages": ["lib"], "witness": "w"}),
+        )
+        tasks = load_manifest(manifest, ["common"])
+        self.assertDictEqual(
+            {
+                "benchmark": os.path.join(self.tmp_dir, "bench"),
+                "packages": [os.path.join(self.tmp_dir, "common")],
+                "witness": os.path.join(self.tmp_dir, "w.graphml"),
+            },
+            tasks[0],
+        )
+        self.assertEqual("/abs", tasks[1]["benchmark"])
+        self.assertListEqual([os.path.join(self.tmp_dir, "lib")], tasks[1]["packages"])
+
+    def test_failing_tasks_are_reported(self):
+        benchmark = os.path.join(self.tmp_dir, "benchmark")
+        os.makedirs(benchmark)
+        tasks = [
+            {"benchmark": benchmark, "packages": [], "witness": f"missing{i}.graphml"}
+            for i in range(3)
+        ]
+        results = list(validate_corpus(tasks, jobs=2, timeout=60, memory_limit=2**40))
+        self.assertEqual(3, len(results))
+        for result in results:
+            self.assertEqual("error", result["status"])
+            self.assertTrue(
+                result["outcome"].startswith("wit4java: Could not validate witness")
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import json
+import os.path
+import stat
+import tempfile
+import unittest
+from shutil import rmtree
+from unittest import mock
+
+import sys
+
+sys.path.append("../..")
+
+from wit4java.jfr import FlightRecorder, format_jvm_profile, summarize_events
+from wit4java.testharness import TestHarness
+
+
+def sample(*classes_and_methods):
+    frames = [
+        {"method": {"type": {"name": name}, "name": method}}
+        for name, method in classes_and_methods
+    ]
+    return {
+        "type": "jdk.ExecutionSample",
+        "values": {"stackTrace": {"frames": frames}},
+    }
+
+
+EVENTS = [
+    sample(("Main", "loop"), ("Main", "main")),
+    sample(("Main", "loop"), ("Main", "main")),
+    sample(
+        ("java.lang.Long", "parseLong"),
+        ("org.sosy_lab.sv_benchmarks.Verifier", "nondetLong"),
+    ),
+    sample(("java/lang/String", "hashCode"), ("Main", "main")),
+    sample(("jdk.internal.loader.BuiltinClassLoader", "loadClass")),
+    {"type": "jdk.GarbageCollection", "values": {"duration": "PT0.25S"}},
+    {"type": "jdk.GarbageCollection", "values": {"duration": 50000000}},
+]
+
+
+class TestFlightRecorder(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        FlightRecorder.jfr_tool.cache_clear()
+
+    def tearDown(self):
+        FlightRecorder.jfr_tool.cache_clear()
+        rmtree(self.tmp_dir)
+
+    def test_samples_are_attributed_by_origin(self):
+        profile = summarize_events(EVENTS)
+        self.assertEqual(5, profile["samples"])
+        self.assertDictEqual(
+            {"benchmark": 0.6, "harness": 0.2, "jdk": 0.2}, profile["origins"]
+        )
+        self.assertEqual(("Main.loop", 0.4), profile["hot_methods"][0])
+        self.assertIn(("java.lang.String.hashCode", 0.2), profile["hot_methods"])
+        self.assertDictEqual({"collections": 2, "seconds": 0.3}, profile["gc"])
+
+    def test_profile_lines(self):
+        lines = format_jvm_profile("/tmp/run.jfr", summarize_events(EVENTS)).split("\n")
+        self.assertEqual("wit4java jvm profile: /tmp/run.jfr", lines[0])
+        self.assertEqual(
+            "  5 samples: 60.0% benchmark, 20.0% harness, 20.0% jdk", lines[1]
+        )
+        self.assertEqual("  GC: 2 collections, 0.300s", lines[2])
+        self.assertEqual("   40.0% Main.loop", lines[3])
+
+    def test_recordings_are_bounded_and_kept(self):
+        directory = os.path.join(self.tmp_dir, "recordings")
+        recorder = FlightRecorder(directory)
+        first, second = recorder.new_recording(), recorder.new_recording()
+        self.assertNotEqual(first, second)
+        self.assertEqual(directory, os.path.dirname(first))
+        recording = FlightRecorder.java_options(first)[-1]
+        self.assertTrue(
+            recording.startswith(f"-XX:StartFlightRecording=filename={first},")
+        )
+        self.assertIn("maxsize=", recording)
+
+    def test_summary_from_jfr_tool_next_to_java(self):
+        bin_dir = os.path.join(self.tmp_dir, "bin")
+        os.makedirs(bin_dir)
+        events = os.path.join(self.tmp_dir, "events.json")
+        with open(events, "w", encoding="utf-8") as file:
+            json.dump({"recording": {"events": EVENTS}}, file)
+        for name, script in (
+            ("java", "#!/bin/sh\n"),
+            ("jfr", f'#!/bin/sh\ncat "{events}"\n'),
+        ):
+            path = os.path.join(bin_dir, name)
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(script)
+            os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+        recording = os.path.join(self.tmp_dir, "run.jfr")
+        open(recording, "wb").close()
+        path = bin_dir + os.pathsep + os.environ["PATH"]
+        with mock.patch.dict(os.environ, {"PATH": path}):
+            profile = FlightRecorder(self.tmp_dir).summarize(recording)
+        self.assertEqual(5, profile["samples"])
+
+    def test_missing_recording_is_not_summarised(self):
+        recorder = FlightRecorder(self.tmp_dir)
+        self.assertIsNone(recorder.summarize(os.path.join(self.tmp_dir, "none.jfr")))
+
+    def test_recorded_run_exits_on_its_own(self):
+        recorder = FlightRecorder(os.path.join(self.tmp_dir, "recordings"))
+        harness = TestHarness(self.tmp_dir, jvm_profiler=recorder)
+
+        def run(command, timeout=None, stop_markers=(), preexec_fn=None):
+            self.assertEqual((), stop_markers)
+            self.assertTrue(
+                any(option.startswith("-XX:StartFlightRecording=") for option in command)
+            )
+            return "wit4java: Witness Spurious", ""
+
+        summary = summarize_events(EVENTS)
+        with mock.patch.object(
+            TestHarness, "_run_command", side_effect=run
+        ), mock.patch.object(FlightRecorder, "summarize", return_value=summary):
+            outcome = harness.run_test_harness()
+        lines = outcome.split("\n")
+        self.assertEqual("wit4java: Witness Spurious", lines[0])
+        self.assertTrue(lines[1].startswith("wit4java jvm profile: "))
+        self.assertEqual(5, harness.jvm_profile["samples"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+from unittest import mock
+
+import sys
+
+sys.path.append("../..")
+
+from wit4java.limits import MIN_HEAP, ResourceLimits
+from wit4java.process import run_command
+from wit4java.testharness import TestHarness
+
+MEGABYTE = 1024 * 1024
+
+
+class TestResourceLimits(unittest.TestCase):
+    def test_scaled_shares_cores_and_memory(self):
+        with mock.patch("wit4java.limits.available_cores", return_value=list(range(8))):
+            limits = ResourceLimits.scaled(4, memory=1024 * MEGABYTE)
+        self.assertEqual(limits.processors, 2)
+        self.assertEqual(limits.gc_threads, 2)
+        self.assertEqual(limits.heap, 256 * MEGABYTE)
+        self.assertEqual(
+            limits.jvm_options(),
+            ["-Xmx256m", "-XX:ParallelGCThreads=2", "-XX:ActiveProcessorCount=2"],
+        )
+        self.assertEqual(limits.javac_options()[0], "-J-Xmx256m")
+
+    def test_single_jvm_sizes_itself(self):
+        limits = ResourceLimits.scaled(1)
+        harness = TestHarness("/tmp/wit4java", resource_limits=limits)
+        for arguments in (harness.compile_arguments(), harness.run_arguments()):
+            self.assertListEqual(
+                [],
+                [
+                    argument
+                    for argument in arguments
+                    if "-Xmx" in argument or "-XX:ParallelGCThreads" in argument
+                ],
+            )
+        limits = ResourceLimits.scaled(1, heap=128 * MEGABYTE)
+        self.assertEqual(["-Xmx128m"], limits.jvm_options())
+
+    def test_scaled_keeps_minimum_and_overrides(self):
+        with mock.patch("wit4java.limits.available_cores", return_value=[0, 1]):
+            limits = ResourceLimits.scaled(
+                8, memory=16 * MEGABYTE, gc_threads=3, cpu_time=None
+            )
+        self.assertEqual(limits.processors, 1)
+        self.assertEqual(limits.gc_threads, 3)
+        self.assertEqual(limits.heap, MIN_HEAP)
+        self.assertIsNone(limits.cpu_time)
+
+    def test_pinned_splits_cores(self):
+        limits = ResourceLimits(cores=list(range(8)))
+        self.assertEqual(limits.pinned(0, 4).cores, [0, 1])
+        self.assertEqual(limits.pinned(3, 4).cores, [6, 7])
+        self.assertEqual(limits.pinned(1, 16).cores, [1])
+
+    def test_preexec_fn_only_with_rlimits_or_cores(self):
+        self.assertIsNone(ResourceLimits(heap=MIN_HEAP).preexec_fn())
+        self.assertIsNotNone(ResourceLimits(cpu_time=10).preexec_fn())
+
+    def test_long_lived_processes_drop_cpu_time(self):
+        limits = ResourceLimits(heap=MIN_HEAP, cpu_time=10, cores=[0])
+        self.assertIsNone(limits.without_cpu_time().cpu_time)
+        self.assertDictEqual(
+            {"heap": MIN_HEAP, "cores": [0]}, limits.without_cpu_time().report()
+        )
+
+    def test_rlimits_apply_to_child(self):
+        limits = ResourceLimits(cpu_time=30, address_space=4096 * MEGABYTE)
+        out, _, _ = run_command(
+            [
+                sys.executable,
+                "-c",
+                "import resource; print(resource.getrlimit(resource.RLIMIT_CPU)[0], "
+                "resource.getrlimit(resource.RLIMIT_AS)[0])",
+            ],
+            preexec_fn=limits.preexec_fn(),
+        )
+        self.assertEqual(out.split(), ["30", str(4096 * MEGABYTE)])
+
+    def test_harness_arguments_carry_limits(self):
+        limits = ResourceLimits(heap=128 * MEGABYTE, processors=2)
+        harness = TestHarness("/tmp/wit4java", resource_limits=limits)
+        self.assertEqual(
+            harness.compile_arguments()[:3],
+            ["javac", "-J-Xmx128m", "-J-XX:ActiveProcessorCount=2"],
+        )
+        self.assertEqual(
+            harness.run_arguments()[:3],
+            ["java", "-Xmx128m", "-XX:ActiveProcessorCount=2"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
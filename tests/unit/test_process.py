@@ -0,0 +1,92 @@
+import asyncio
+import time
+import unittest
+
+import sys
+
+sys.path.append("../..")
+
+from wit4java.process import run_command, run_command_async
+
+PYTHON = sys.executable
+
+
+class TestRunCommand(unittest.TestCase):
+    def test_large_outputs_do_not_block(self):
+        out, err, timed_out = run_command(
+            [
+                PYTHON,
+                "-c",
+                "import sys; sys.stderr.write('e' * 1000000); print('o' * 1000000)",
+            ],
+            max_output=1000,
+        )
+        self.assertFalse(timed_out)
+        self.assertEqual("o" * 999 + "\n", out)
+        self.assertEqual("e" * 1000, err)
+
+    def test_timeout_kills_process_tree(self):
+        start = time.perf_counter()
+        out, _, timed_out = run_command(
+            [
+                PYTHON,
+                "-c",
+                "import subprocess, sys, time; print('started', flush=True); "
+                "subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)']); "
+                "time.sleep(60)",
+            ],
+            timeout=1,
+        )
+        self.assertTrue(timed_out)
+        self.assertEqual("started\n", out)
+        self.assertLess(time.perf_counter() - start, 10)
+
+    def test_stops_at_marker(self):
+        start = time.perf_counter()
+        out, _, timed_out = run_command(
+            [
+                PYTHON,
+                "-c",
+                "import time; print('a' * 70000 + 'verdict', flush=True); "
+                "time.sleep(60)",
+            ],
+            stop_markers=["verdict"],
+        )
+        self.assertFalse(timed_out)
+        self.assertTrue(out.endswith("verdict\n"))
+        self.assertLess(time.perf_counter() - start, 10)
+
+
+class TestRunCommandAsync(unittest.TestCase):
+    def test_commands_run_concurrently(self):
+        command = [PYTHON, "-c", "import time; time.sleep(1); print('done')"]
+
+        async def run_both():
+            return await asyncio.gather(
+                run_command_async(command), run_command_async(command)
+            )
+
+        start = time.perf_counter()
+        results = asyncio.run(run_both())
+        self.assertEqual([("done\n", "", False)] * 2, results)
+        self.assertLess(time.perf_counter() - start, 1.9)
+
+    def test_timeout_and_marker_stop_the_process(self):
+        command = [
+            PYTHON,
+            "-c",
+            "import time; print('verdict', flush=True); time.sleep(60)",
+        ]
+        start = time.perf_counter()
+        out, _, timed_out = asyncio.run(
+            run_command_async(command, stop_markers=["verdict"])
+        )
+        self.assertTrue(out.startswith("verdict"))
+        self.assertFalse(timed_out)
+        _, _, timed_out = asyncio.run(run_command_async(command, timeout=1))
+        self.assertTrue(timed_out)
+        self.assertLess(time.perf_counter() - start, 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,390 @@
+import os.path
+import tempfile
 import unittest
+from shutil import rmtree
+from unittest import mock
+
+import sys
+
+sys.path.append("../..")
+
+from parameterized import parameterized
+from wit4java.cache import ParseCache
+from wit4java.processors import (
+    AssumptionExtractor,
+    GraphMLWitnessReader,
+    JavaFileProcessor,
+    SourceIndex,
+    WitnessProcessor,
+    detect_witness_format,
+    prescreen_assumptions,
+    scan_java_source,
+    _parse_java_source,
+    _scan_java_tokens,
+)
 
 
 class TestWitnessProcessor(unittest.TestCase):
+    WITNESS_PATH = "resources/witnesses/witness.graphml"
+    EXPECTED_ASSUMPTIONS = [
+        (("Main", 6), "42"),
+        (("Verifier", 40), "7"),
+        (("Main", 7), "List<Integer>"),
+        (("Main", 8), "NaN"),
+        (("Main", 9), None),
+    ]
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        rmtree(self.tmp_dir)
+
     def test_something(self):
         self.assertEqual(True, True)  # add assertion here
 
+    def test_streaming_extraction(self):
+        wfp = WitnessProcessor(self.tmp_dir, self.WITNESS_PATH)
+        wfp.preprocess()
+        self.assertListEqual(self.EXPECTED_ASSUMPTIONS, wfp.extract_assumptions())
+        self.assertEqual("JBMC 5.22.0", wfp.producer)
+        self.assertListEqual([], os.listdir(self.tmp_dir), "No cleaned copy expected.")
+
+    def test_networkx_extraction(self):
+        wfp = WitnessProcessor(self.tmp_dir, self.WITNESS_PATH, streaming=False)
+        wfp.preprocess()
+        self.assertListEqual(self.EXPECTED_ASSUMPTIONS, wfp.extract_assumptions())
+        self.assertEqual("JBMC 5.22.0", wfp.producer)
+
+    @parameterized.expand(
+        [["resources/witnesses/witness.yml"], ["resources/witnesses/witness.json"]]
+    )
+    def test_witness_2_0_extraction(self, witness_path):
+        wfp = WitnessProcessor(self.tmp_dir, witness_path)
+        wfp.preprocess()
+        self.assertListEqual(self.EXPECTED_ASSUMPTIONS, wfp.extract_assumptions())
+        self.assertEqual("JBMC", wfp.producer)
+
+    @parameterized.expand(
+        [
+            ["resources/witnesses/witness.graphml", "graphml"],
+            ["resources/witnesses/witness.yml", "yaml"],
+            ["resources/witnesses/witness.json", "json"],
+        ]
+    )
+    def test_witness_format_detection(self, witness_path, expected_format):
+        self.assertEqual(expected_format, detect_witness_format(witness_path))
+
+    def test_reader_yields_assumption_edges_in_document_order(self):
+        reader = GraphMLWitnessReader(self.WITNESS_PATH)
+        self.assertListEqual(
+            [6, 40, 7, 8, 9], [data["startline"] for data in reader]
+        )
+        self.assertEqual("violation_witness", reader.graph_data["witness-type"])
+
+    def test_malformed_witness_is_rejected(self):
+        witness_path = os.path.join(self.tmp_dir, "broken.graphml")
+        with open(witness_path, "w", encoding="utf-8") as file:
+            file.write("<graphml><graph><edge></graph>")
+        wfp = WitnessProcessor(self.tmp_dir, witness_path)
+        with self.assertRaises(ValueError):
+            wfp.extract_assumptions()
+
+
+
+class TestAssumptionExtractor(unittest.TestCase):
+    ASSUMPTIONS = [
+        "x = 123;",
+        "x = -42L;",
+        "anInt = 7",
+        "b = true;",
+        "b = trueish;",
+        "s = null;",
+        "\\result == 5",
+        "x ==  5;",
+        "d = 1e5;",
+        "d = -3.25;",
+        "d = Double.NaN;",
+        "s = List<Integer>;",
+        'this.s = "a";',
+        'java.lang.String.valueOf(x) = 5;',
+        's.equals("a = b")',
+        'x = s.equals("b")',
+        'Double.parseDouble("0.5")',
+        "return 5",
+        "x = 5; ",
+        "x = \u0665;",
+        "",
+        "no value",
+    ]
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        rmtree(self.tmp_dir)
+
+    @parameterized.expand([[assumption] for assumption in ASSUMPTIONS])
+    def test_literal_path_matches_regex(self, assumption):
+        regex_only = AssumptionExtractor(literal_path=False)
+        self.assertEqual(
+            regex_only.extract(assumption), AssumptionExtractor().extract(assumption)
+        )
+
+    def test_assumption_without_value_is_none(self):
+        self.assertIsNone(AssumptionExtractor().extract(""))
+
+    def test_null_depends_on_producer(self):
+        batch = [(("Main", 6), "s = null;"), (("Main", 7), ""), (("Main", 8), "x = 1;")]
+        self.assertListEqual(
+            [(("Main", 6), None), (("Main", 8), "1")],
+            AssumptionExtractor.for_producer("JBMC").extract_batch(batch),
+        )
+        self.assertListEqual(
+            [(("Main", 6), "null"), (("Main", 8), "1")],
+            AssumptionExtractor.for_producer("GDart").extract_batch(batch),
+        )
+
+    def test_batches_keep_document_order(self):
+        witness_path = os.path.join(self.tmp_dir, "large.graphml")
+        with open(TestWitnessProcessor.WITNESS_PATH, "r", encoding="utf-8") as file:
+            data = file.read()
+        start, end = data.index("<edge"), data.rindex("</graph>")
+        with open(witness_path, "w", encoding="utf-8") as file:
+            file.write(data[:start] + data[start:end] * 2000 + data[end:])
+        wfp = WitnessProcessor(self.tmp_dir, witness_path)
+        with mock.patch("wit4java.processors.ASSUMPTION_BATCH_SIZE", 7):
+            self.assertListEqual(
+                TestWitnessProcessor.EXPECTED_ASSUMPTIONS * 2000,
+                wfp.extract_assumptions(),
+            )
+
+
+class TestJavaFileProcessor(unittest.TestCase):
+    BENCHMARK_PATH = "resources/benchmarks/nondet"
+    PACKAGE_PATHS = ["resources/benchmarks/common"]
+    EXPECTED_MAPPINGS = {
+        ("Main", 7): "long",
+        ("Main", 11): "int",
+        ("Main", 12): "boolean",
+        ("Main", 13): "long",
+        ("Main", 14): "string",
+        ("Helper", 7): "string",
+        ("Helper", 11): "char",
+    }
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        rmtree(self.tmp_dir)
+
+    def test_nondet_mappings(self):
+        jfp = JavaFileProcessor(self.tmp_dir, self.BENCHMARK_PATH, self.PACKAGE_PATHS)
+        self.assertDictEqual(self.EXPECTED_MAPPINGS, jfp.extract_nondet_mappings())
+
+    def test_nondet_mappings_from_parse_cache(self):
+        parse_cache = ParseCache(self.tmp_dir)
+        for _ in range(2):
+            jfp = JavaFileProcessor(
+                self.tmp_dir, self.BENCHMARK_PATH, self.PACKAGE_PATHS, parse_cache
+            )
+            self.assertDictEqual(self.EXPECTED_MAPPINGS, jfp.extract_nondet_mappings())
+        self.assertEqual(parse_cache.misses, parse_cache.hits)
+
+    def test_parallel_scan_matches_serial(self):
+        # Callers of nondet-returning methods only map if scanned after them, so the
+        # merge order matters as much as the scans
+        benchmark = os.path.join(self.tmp_dir, "benchmark")
+        os.makedirs(benchmark)
+        for index in range(12):
+            callee = (index + 5) % 12
+            with open(
+                os.path.join(benchmark, f"C{index}.java"), "w", encoding="utf-8"
+            ) as file:
+                file.write(
+                    "import org.sosy_lab.sv_benchmarks.Verifier;\n"
+                    f"public class C{index} {{\n"
+                    f"  static int get{index}() {{\n"
+                    "    return Verifier.nondetInt();\n"
+                    "  }\n"
+                    f"  static void use() {{ int x = C{callee}.get{callee}(); }}\n"
+                    "}\n"
+                )
+        workspace = os.path.join(self.tmp_dir, "workspace")
+        for benchmark_path in (benchmark, self.BENCHMARK_PATH):
+            serial = JavaFileProcessor(
+                workspace, benchmark_path, self.PACKAGE_PATHS, scan_jobs=1
+            )
+            parallel = JavaFileProcessor(
+                workspace, benchmark_path, self.PACKAGE_PATHS, scan_jobs=2
+            )
+            with mock.patch("wit4java.processors.PARALLEL_SCAN_MIN_FILES", 1):
+                self.assertDictEqual(
+                    serial.extract_nondet_mappings(), parallel.extract_nondet_mappings()
+                )
+
+    def test_mixed_type_line_is_not_prescreened(self):
+        benchmark = os.path.join(self.tmp_dir, "benchmark")
+        os.makedirs(benchmark)
+        with open(os.path.join(benchmark, "Main.java"), "w", encoding="utf-8") as file:
+            file.write(
+                "import org.sosy_lab.sv_benchmarks.Verifier;\n"
+                "public class Main {\n"
+                "  public static void main(String[] args) {\n"
+                "    int x = Verifier.nondetInt(); boolean b = Verifier.nondetBoolean();\n"
+                "    int y = Verifier.nondetInt(); int z = Verifier.nondetInt();\n"
+                "  }\n"
+                "}\n"
+            )
+        jfp = JavaFileProcessor(
+            os.path.join(self.tmp_dir, "workspace"), benchmark, self.PACKAGE_PATHS
+        )
+        mappings = jfp.extract_nondet_mappings()
+        self.assertDictEqual({("Main", 4): None, ("Main", 5): "int"}, mappings)
+        self.assertIsNone(
+            prescreen_assumptions(mappings, [(("Main", 4), "5"), (("Main", 4), "true")])
+        )
+        self.assertIn(
+            "'true' is not an integer",
+            prescreen_assumptions(mappings, [(("Main", 5), "true")]),
+        )
+
+    def test_imports_resolve_through_the_index(self):
+        jfp = JavaFileProcessor(self.tmp_dir, self.BENCHMARK_PATH, self.PACKAGE_PATHS)
+        self.assertListEqual(
+            [os.path.join(self.BENCHMARK_PATH, "util/Helper.java")],
+            jfp._check_valid_import("util.Helper"),
+        )
+        self.assertListEqual(
+            [os.path.join(self.BENCHMARK_PATH, "shapes/Square.java")],
+            jfp._check_valid_import("shapes.*"),
+        )
+        self.assertListEqual(
+            [
+                os.path.join(
+                    self.PACKAGE_PATHS[0], "org/sosy_lab/sv_benchmarks/Verifier.java"
+                )
+            ],
+            jfp._check_valid_import("org.sosy_lab.sv_benchmarks.Verifier"),
+        )
+        self.assertListEqual([], jfp._check_valid_import("java.util.List"))
+        with self.assertRaises(ValueError):
+            jfp._check_valid_import("org.example.Missing")
+
+    def test_source_index_matches_path_suffixes(self):
+        index = SourceIndex(self.BENCHMARK_PATH)
+        helper = os.path.join(self.BENCHMARK_PATH, "util/Helper.java")
+        self.assertListEqual([helper], index.classes["util/Helper"])
+        self.assertListEqual([helper], index.find_suffix("Helper"))
+        self.assertListEqual([], index.find_suffix("til/Helper"))
+
+
+
+def read_source(source_path):
+    with open(source_path, "r", encoding="utf-8") as file:
+        return file.read()
+
+
+class TestScanJavaSource(unittest.TestCase):
+    @parameterized.expand(
+        [
+            [read_source("resources/sources/Constructs.java"), True],
+            [read_source("resources/benchmarks/nondet/Main.java"), True],
+            [read_source("resources/benchmarks/nondet/util/Helper.java"), True],
+            ["class A { void f() { foo(a < b, c > d(e)); } }", False],
+            ["class A { int f() { l: return Verifier.nondetInt(); } }", False],
+            [
+                "class A {\n  void f() {\n    int x = Verifier.nondetInt();\n"
+                "    boolean z = a < b & c > g();\n  }\n}",
+                False,
+            ],
+            ["class A {\n  void f() {\n    z = a < b & c > g();\n  }\n}", False],
+            [
+                "class A {\n  public static <T> List<T> f() { return g(); }\n"
+                '  @SuppressWarnings("x") Map<A, List<B>> h() { return null; }\n}',
+                True,
+            ],
+        ]
+    )
+    def test_token_scan_matches_full_parse(self, data, decided):
+        scan = _scan_java_tokens(data)
+        self.assertEqual(decided, scan is not None)
+        if scan is None:
+            # Sources the tokens cannot decide are parsed
+            scan = scan_java_source(data)
+        parse = _parse_java_source(data)
+        for key in ("imports", "nondet_calls", "returns"):
+            self.assertListEqual(parse[key], scan[key])
+        # javalang visits the selectors of an expression before its arguments
+        self.assertListEqual(sorted(parse["invocations"]), sorted(scan["invocations"]))
+
+    def test_undecided_source_is_parsed(self):
+        data = "class A { int x = this.<Integer>id(Verifier.nondetInt()); }"
+        self.assertIsNone(_scan_java_tokens(data))
+        self.assertListEqual([(1, "int")], scan_java_source(data)["nondet_calls"])
+
+    def test_syntax_error_gives_empty_scan(self):
+        scan = scan_java_source("class A { void f( { Verifier.nondetInt(); } }")
+        self.assertTrue(all(len(entries) == 0 for entries in scan.values()))
+
+
+class TestPrescreenAssumptions(unittest.TestCase):
+    MAPPINGS = {
+        ("Main", 1): "int",
+        ("Main", 2): "byte",
+        ("Main", 3): "char",
+        ("Main", 4): "short",
+        ("Main", 5): "double",
+        ("Main", 6): "boolean",
+        ("Main", 7): "string",
+        ("Main", 8): "long",
+    }
+
+    @parameterized.expand(
+        [
+            (1, "-2147483648"),
+            (1, "+42"),
+            (2, "-128"),
+            (2, "128"),
+            (3, "65535"),
+            (3, "-1"),
+            (4, "32767"),
+            (5, "-1.5e3"),
+            (5, "NaN"),
+            (5, " 0x1.8p1d "),
+            (6, "TRUE"),
+            (6, "1"),
+            (6, None),
+            (7, None),
+            (8, "9223372036854775807"),
+        ]
+    )
+    def test_fitting_values_pass(self, line, value):
+        self.assertIsNone(prescreen_assumptions(self.MAPPINGS, [(("Main", line), value)]))
+
+    @parameterized.expand(
+        [
+            (1, "abc", "'abc' is not an integer at Main:1"),
+            (1, "2147483648", "2147483648 is out of the int range"),
+            (1, " 1", "' 1' is not an integer"),
+            (2, "2147483648", "2147483648 is out of the byte range"),
+            (3, "x", "'x' is not an integer"),
+            (4, "40000", "40000 is out of the short range"),
+            (5, "1,5", "'1,5' is not a double"),
+            (1, None, "null for a nondet int at Main:1"),
+        ]
+    )
+    def test_mismatching_values_are_reported(self, line, value, reason):
+        self.assertIn(
+            reason, prescreen_assumptions(self.MAPPINGS, [(("Main", line), value)])
+        )
+
+    def test_values_of_other_positions_are_ignored(self):
+        self.assertIsNone(
+            prescreen_assumptions(self.MAPPINGS, [(("Other", 1), "abc"), (("Main", 1), "1")])
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+
+import sys
+
+sys.path.append("../..")
+
+from wit4java.profiling import Profiler, active_profiler, count, phase, profiling
+from wit4java.testharness import TestHarness
+
+
+class TestProfiler(unittest.TestCase):
+    def test_phases_and_counters_are_recorded(self):
+        profiler = Profiler()
+        records = []
+        profiler.add_hook(lambda kind, name, record: records.append((kind, name)))
+        with profiling(profiler):
+            self.assertIs(profiler, active_profiler())
+            for _ in range(2):
+                with phase("parsing"):
+                    count("assumptions", 3)
+        self.assertIsNone(active_profiler())
+        report = profiler.report()
+        self.assertEqual(2, report["phases"]["parsing"]["calls"])
+        self.assertDictEqual({"assumptions": 6}, report["counters"])
+        self.assertListEqual(
+            [("counter", "assumptions"), ("phase", "parsing")] * 2, records
+        )
+
+    def test_child_process_usage_is_recorded(self):
+        profiler = Profiler()
+        with profiling(profiler):
+            out, _ = TestHarness._run_command(
+                [sys.executable, "-c", "print(len(bytearray(1 << 24)))"]
+            )
+        self.assertEqual(str(1 << 24), out.strip())
+        process = profiler.report()["processes"][sys.executable.rsplit("/", 1)[-1]]
+        self.assertEqual(1, process["runs"])
+        self.assertGreater(process["max_rss"], 1 << 24)
+
+    def test_reports_merge(self):
+        profiler = Profiler()
+        with profiling(profiler), phase("javac"):
+            count("witnesses")
+        merged = Profiler()
+        merged.merge(profiler.report())
+        merged.merge(profiler.report())
+        self.assertEqual(2, merged.phases["javac"]["calls"])
+        self.assertEqual(2, merged.counters["witnesses"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,30 @@
+import subprocess
+import unittest
+
+import sys
+
+sys.path.append("../..")
+
+HEAVY_MODULES = ["networkx", "yaml", "javalang", "asyncio", "multiprocessing"]
+
+
+class TestStartup(unittest.TestCase):
+    def test_heavy_modules_are_imported_lazily(self):
+        # Modules merely registered for lazy loading are not of type module
+        loaded = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys; sys.path.insert(0, '../..'); import wit4java.wit4java; "
+                f"print(' '.join(m for m in {HEAVY_MODULES!r} "
+                "if type(sys.modules.get(m)).__name__ == 'module'))",
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.split()
+        self.assertListEqual([], loaded)
+
+
+if __name__ == "__main__":
+    unittest.main()
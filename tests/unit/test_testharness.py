@@ -3,13 +3,27 @@ import tempfile
 import unittest
 from shutil import rmtree
 from os.path import exists
+from unittest import mock
 
 import sys
 
 sys.path.append("../..")
 
 from parameterized import parameterized
-from wit4java.testharness import TestHarness
+from wit4java.testharness import (
+    TestHarness,
+    read_assumption_tape,
+    read_consumption_trace,
+    write_assumption_tape,
+)
+
+# A trace as Verifier.java dumps it: 2 assumptions, 3 nondet calls, the last 2 kept,
+# the second taking null and the third finding the tape empty
+TRACE_DUMP = (
+    b"\x00\x00\x00\x02\x00\x00\x00\x03\x00\x00\x00\x02"
+    b"\x00\x00\x00\x01\x08\xff\xff\xff\xff\x00\x00\x00\x16Main.main(Main.java:7)"
+    b"\x00\x00\x00\x02\x04\xff\xff\xff\xff\x00\x00\x00\x16Main.main(Main.java:9)"
+)
 
 
 class TestTestHarness(unittest.TestCase):
@@ -38,34 +52,110 @@ class TestTestHarness(unittest.TestCase):
         self.assertTrue(exists(test_path), "Test.java has not been created.")
         self.assertFileEqual(ref_path, test_path)
 
+    def test_verifier_written_to_dir(self):
+        self.test_harness.build_test_harness(self.EMPTY_ASSUMPTIONS)
+        verifier_path = os.path.join(
+            self.tmp_dir, TestHarness.VERIFIER_PACKAGE, "Verifier.java"
+        )
+        ref_path = "../../wit4java/resources/Verifier.java"
+        self.assertTrue(exists(verifier_path), "Verifier.java has not been created.")
+        self.assertFileEqual(ref_path, verifier_path)
+
     @parameterized.expand(
         [
-            [[], "resources/verifiers/VerifierWithNoAssumptions.java"],
-            [
-                ["1", "-1", "10L"],
-                "resources/verifiers/VerifierWithIntegerAssumptions.java",
-            ],
-            [
-                ["25f", "101.123456789123456789"],
-                "resources/verifiers/VerifierWithFloatingPointAssumptions.java",
-            ],
+            [[]],
+            [["1", "-1", "10L"]],
+            [["25f", "101.123456789123456789"]],
+            [["true", "false"]],
+            [["a", "b", "c"]],
+            [["non", "determinism"]],
+            [["null", None, ""]],
+            [["ünïcödé"]],
+        ]
+    )
+    def test_assumptions_written_to_tape(self, assumptions):
+        tape_path = os.path.join(self.tmp_dir, "assumptions.tape")
+        write_assumption_tape(tape_path, assumptions)
+        self.assertListEqual(assumptions, read_assumption_tape(tape_path))
+
+    @parameterized.expand(
+        [
+            ["a\\nb", "a\nb"],
+            ["\\u0041\\uu0042", "AB"],
+            ["\\\\u0041", "\\u0041"],
+            ["\\uD83D\\uDE00", "\U0001F600"],
+            ["\\t\\\"quoted\\\"\\s\\'", '\t"quoted" \''],
+            ["\\101\\0\\477", "A\x00'7"],
+            ["\\u005cn", "\n"],
+            ["C:\\dir", "C:\\dir"],
+        ]
+    )
+    def test_escape_sequences_on_tape(self, literal, value):
+        tape_path = os.path.join(self.tmp_dir, "assumptions.tape")
+        write_assumption_tape(tape_path, [literal, None])
+        self.assertListEqual([value, None], read_assumption_tape(tape_path))
+
+    def test_tape_layout(self):
+        tape_path = os.path.join(self.tmp_dir, "assumptions.tape")
+        write_assumption_tape(tape_path, ["12", None])
+        with open(tape_path, "rb") as file:
+            self.assertEqual(
+                b"\x00\x00\x00\x02\x00\x00\x00\x0212\xff\xff\xff\xff", file.read()
+            )
+
+    def test_consumption_trace_layout(self):
+        trace_path = os.path.join(self.tmp_dir, "consumption.trace")
+        with open(trace_path, "wb") as file:
+            file.write(TRACE_DUMP)
+        trace = read_consumption_trace(trace_path)
+        self.assertEqual((2, 3), (trace["tape_size"], trace["calls"]))
+        self.assertListEqual(
             [
-                ["true", "false"],
-                "resources/verifiers/VerifierWithBooleanAssumptions.java",
+                {
+                    "index": 1,
+                    "method": "nondetString",
+                    "value": None,
+                    "frame": "Main.main(Main.java:7)",
+                    "dry": False,
+                },
+                {
+                    "index": 2,
+                    "method": "nondetInt",
+                    "value": None,
+                    "frame": "Main.main(Main.java:9)",
+                    "dry": True,
+                },
             ],
-            [["a", "b", "c"], "resources/verifiers/VerifierWithCharAssumptions.java"],
+            trace["records"],
+        )
+
+    def test_untraced_run_has_no_trace_properties(self):
+        arguments = self.test_harness.run_arguments()
+        self.assertFalse(any("wit4java.trace" in argument for argument in arguments))
+
+    def test_traced_run_adds_trace_to_result(self):
+        harness = TestHarness(self.tmp_dir, trace=16)
+        trace_path = os.path.join(self.tmp_dir, "consumption.trace")
+
+        def run(command, *args, **kwargs):
+            self.assertIn(f"-Dwit4java.trace={trace_path}", command)
+            self.assertIn("-Dwit4java.trace.size=16", command)
+            with open(trace_path, "wb") as file:
+                file.write(TRACE_DUMP)
+            return "", "java.util.NoSuchElementException"
+
+        with mock.patch.object(TestHarness, "_run_command", side_effect=run):
+            outcome = harness.run_test_harness()
+        self.assertListEqual(
             [
-                ["non", "determinism"],
-                "resources/verifiers/VerifierWithStringAssumptions.java",
+                "wit4java: Could not validate witness",
+                "wit4java trace: 3 nondet calls on 2 assumptions, the last 2 kept",
+                "  #1 nondetString = null at Main.main(Main.java:7)",
+                "  #2 nondetInt ran out of assumptions at Main.main(Main.java:9)",
             ],
-        ]
-    )
-    def test_assumptions_injected_to_verifier(self, assumptions, expected_output_path):
-        self.test_harness.build_test_harness(assumptions)
-        verifier_path = os.path.join(
-            self.tmp_dir, TestHarness.VERIFIER_PACKAGE, "Verifier.java"
+            outcome.split("\n"),
         )
-        self.assertFileEqual(expected_output_path, verifier_path)
+        self.assertEqual(3, harness.consumption_trace["calls"])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,76 @@
+import os.path
+import shutil
+import tempfile
+import unittest
+from shutil import rmtree
+
+import sys
+
+sys.path.append("../..")
+
+from parameterized import parameterized
+from wit4java.testharness import TestHarness
+from wit4java.worker import JvmWorker
+
+MAIN_TEMPLATE = """import org.sosy_lab.sv_benchmarks.Verifier;
+
+public class Main {{
+  public static void main(String[] args) {{
+    int x = Verifier.nondetInt();
+    {body}
+  }}
+}}
+"""
+
+
+@unittest.skipIf(shutil.which("javac") is None, "requires a JDK")
+class TestJvmWorker(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.worker = JvmWorker()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.worker.close()
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.test_harness = TestHarness(self.tmp_dir)
+
+    def tearDown(self):
+        rmtree(self.tmp_dir)
+
+    def build(self, body, assumptions):
+        with open(os.path.join(self.tmp_dir, "Main.java"), "w", encoding="utf-8") as file:
+            file.write(MAIN_TEMPLATE.format(body=body))
+        self.test_harness.build_test_harness(assumptions)
+
+    @parameterized.expand(
+        [
+            ["assert x != 1;", ["1"], "wit4java: Witness Correct"],
+            ["assert x != 1;", ["2"], "wit4java: Witness Spurious"],
+            ["Verifier.assume(x != 1);", ["1"], "wit4java: Could not validate witness"],
+            ["System.exit(0);", ["1"], "wit4java: Could not validate witness"],
+            ["System.err.println(x);", ["1"], "wit4java: Could not validate witness"],
+            ["System.out.println(x);", ["1"], "wit4java: Witness Spurious"],
+            ["", [], "wit4java: Could not validate witness"],
+        ]
+    )
+    def test_worker_matches_fresh_jvm(self, body, assumptions, expected_outcome):
+        self.build(body, assumptions)
+        self.assertEqual(expected_outcome, self.test_harness.run_test_harness())
+        self.assertEqual(
+            expected_outcome, self.test_harness.run_test_harness(self.worker)
+        )
+
+    def test_worker_survives_halt(self):
+        self.build("Verifier.assume(x != 1);", ["1"])
+        self.test_harness.run_test_harness(self.worker)
+        self.test_harness.update_assumptions(["2"])
+        self.assertEqual(
+            "wit4java: Witness Spurious", self.test_harness.run_test_harness(self.worker)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
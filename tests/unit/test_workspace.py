@@ -0,0 +1,88 @@
+import os.path
+import tempfile
+import unittest
+from shutil import rmtree
+
+import sys
+
+sys.path.append("../..")
+
+from parameterized import parameterized
+from wit4java.testharness import TestHarness
+from wit4java.workspace import (
+    overlay_source_paths,
+    populate_workspace,
+    remove_in_background,
+)
+
+
+def write_file(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(data)
+
+
+def read_file(path):
+    with open(path, "r", encoding="utf-8") as file:
+        return file.read()
+
+
+class TestWorkspace(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.benchmark = os.path.join(self.tmp_dir, "benchmark")
+        self.package = os.path.join(self.tmp_dir, "package")
+        self.workspace = os.path.join(self.tmp_dir, "workspace")
+        write_file(os.path.join(self.benchmark, "Main.java"), "class Main {}")
+        write_file(os.path.join(self.benchmark, "util/Util.class"), "util")
+        write_file(
+            os.path.join(self.package, "org/sosy_lab/sv_benchmarks/Verifier.java"),
+            "stub",
+        )
+        os.makedirs(self.workspace)
+
+    def tearDown(self):
+        rmtree(self.tmp_dir)
+
+    @parameterized.expand([["copy"], ["link"]])
+    def test_sources_are_available_in_workspace(self, mode):
+        populate_workspace(self.workspace, [self.benchmark, self.package], mode)
+        self.assertEqual(
+            "class Main {}", read_file(os.path.join(self.workspace, "Main.java"))
+        )
+        self.assertEqual(
+            "util", read_file(os.path.join(self.workspace, "util/Util.class"))
+        )
+
+    def test_linked_workspace_does_not_write_through(self):
+        populate_workspace(self.workspace, [self.benchmark, self.package], "link")
+        main = os.path.join(self.workspace, "Main.java")
+        self.assertTrue(
+            os.path.samefile(main, os.path.join(self.benchmark, "Main.java"))
+        )
+        harness = TestHarness(self.workspace)
+        harness._build_test_verifier()
+        self.assertEqual(
+            "stub",
+            read_file(
+                os.path.join(self.package, "org/sosy_lab/sv_benchmarks/Verifier.java")
+            ),
+        )
+
+    def test_overlay_leaves_sources_in_place(self):
+        populate_workspace(self.workspace, [self.benchmark, self.package], "overlay")
+        self.assertListEqual([], os.listdir(self.workspace))
+        self.assertListEqual(
+            [self.package, self.benchmark],
+            overlay_source_paths([self.benchmark, self.package], "overlay"),
+        )
+        self.assertListEqual([], overlay_source_paths([self.benchmark], "copy"))
+
+    def test_workspace_is_removed_in_background(self):
+        remove_in_background(self.workspace).join()
+        self.assertFalse(os.path.exists(self.workspace))
+        self.assertIsNone(remove_in_background(self.workspace))
+
+
+if __name__ == "__main__":
+    unittest.main()
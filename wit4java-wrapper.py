@@ -2,8 +2,9 @@
 
 import os, sys
 import argparse
-import subprocess
-import shlex
+
+sys.dont_write_bytecode = True  # prevent creation of .pyc files
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 parser = argparse.ArgumentParser()
 
@@ -24,43 +25,36 @@ witness = args.witness
 version = args.version
 local_dir = args.local_dir
 
-path = str(os.path.split(os.path.abspath(sys.argv[0]))[0])
-path = str(os.path.split(sys.argv[0])[0])
-# print(path)
-command_line = path + "/bin/wit4java"
-
 if version:
-    print("3.0")
-    # print(os.popen(esbmc_path + "--version").read()[6:].strip()),
+    from wit4java import __version__
+
+    print(__version__)
     exit(0)
 
-if files is None:
+if not files:
     print("please specify source program")
     exit(1)
 
-if local_dir:
-    command_line += " " + "--local-dir"
-benchmark = files[-1]
-packages = files[0:-1]
-
-command_line += " " + benchmark
-
-if packages is not None:
-    command_line += " " + "--packages"
-    for package in packages:
-        command_line += " " + package
-
 if witness is None:
     print("please specify witness")
     exit(1)
 
-command_line += " " + "--witness " + witness
+benchmark = files[-1]
+packages = files[0:-1]
+
+arguments = []
+if local_dir:
+    arguments.append("--local-dir")
+arguments.append(benchmark)
+if packages:
+    arguments.append("--packages")
+    arguments.extend(packages)
+arguments.extend(["--witness", witness])
 
-print(command_line)
+print(" ".join(["wit4java"] + arguments), flush=True)
 
+# Run in this interpreter rather than a second one, its output reaching ours directly
+import wit4java.wit4java
 
-the_args = shlex.split(command_line)
-p = subprocess.Popen(the_args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-(stdout, stderr) = p.communicate()
-print(stdout.decode())
-print(stderr.decode())
+sys.argv = ["wit4java"] + arguments
+wit4java.wit4java.main()
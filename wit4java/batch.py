@@ -0,0 +1,351 @@
+"""
+ This file is part of wit4java, an execution-based violation-witness validator for Java
+ https://github.com/wit4java/wit4java.
+
+ This module deals with validating many witnesses against a single benchmark
+"""
+
+import hashlib
+import os
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from wit4java import __version__
+from wit4java.cache import ResultCache, hash_source_trees, toolchain_versions
+from wit4java.profiling import count, phase
+from wit4java.testharness import TestHarness
+from wit4java.processors import (
+    JavaFileProcessor,
+    WitnessProcessor,
+    filter_assumptions,
+    prescreen_assumptions,
+)
+from wit4java.workspace import create_workspace, overlay_source_paths, remove_in_background
+
+WITNESS_EXTENSIONS = (".graphml", ".xml", ".yml", ".yaml", ".json")
+
+
+def explain_outcome(outcome: str, mismatch: Optional[str]) -> str:
+    """
+    Adds why the values of a witness may not fit its nondet calls to a run that did
+    not validate it. A mismatching value only fails the run if the run consumes it,
+    so it cannot decide the verdict without one.
+    :param outcome: The validation result
+    :param mismatch: Why a value does not fit its nondet call, see prescreen_assumptions
+    :return: The validation result, with the mismatch unless it is a definite verdict
+    """
+    if mismatch is None or outcome.startswith(ResultCache.CACHEABLE_OUTCOMES):
+        return outcome
+    verdict, separator, details = outcome.partition("\n")
+    return f"{verdict} ({mismatch}){separator}{details}"
+
+
+def collect_witnesses(witness_paths: Iterable[str]) -> List[str]:
+    """
+    Expands a list of witness files and directories into witness files
+    :param witness_paths: Paths to witness files or directories containing witnesses
+    :return: The witness files, with the contents of each directory in sorted order
+    """
+    witnesses = []
+    for path in witness_paths:
+        if os.path.isdir(path):
+            witnesses.extend(
+                os.path.join(path, name)
+                for name in sorted(os.listdir(path))
+                if name.endswith(WITNESS_EXTENSIONS)
+                and os.path.isfile(os.path.join(path, name))
+            )
+        else:
+            witnesses.append(path)
+    return witnesses
+
+
+def fingerprint_assumptions(
+    benchmark_hash: str, assumption_values: Iterable[Optional[str]]
+) -> str:
+    """
+    Fingerprints what a harness run depends on: the benchmark and the values fed to its
+    nondet calls, in order. Witnesses that differ byte for byte, e.g. in layout or in
+    edges without nondet values, share a fingerprint and thus a verdict.
+    :param benchmark_hash: Hash of the benchmark and package sources
+    :param assumption_values: The filtered assumption values, None for null
+    :return: A hex digest identifying the run
+    """
+    digest = hashlib.sha256(benchmark_hash.encode("utf-8") + b"\0")
+    for value in assumption_values:
+        # Length-prefixed like the tape, so no two sequences collide
+        if value is None:
+            digest.update(b"-1\0")
+        else:
+            encoded = value.encode("utf-8")
+            digest.update(str(len(encoded)).encode("ascii") + b"\0" + encoded)
+    return digest.hexdigest()
+
+
+class BatchValidator:
+    """
+    The class BatchValidator validates any number of witnesses against one benchmark,
+    sharing the workspace, the nondet mappings and the compiled benchmark between them
+    """
+
+    def __init__(
+        self,
+        benchmark_path,
+        package_paths,
+        directory: Optional[str] = None,
+        compilation_cache=None,
+        jvm_worker=None,
+        parse_cache=None,
+        workspace_mode="copy",
+        tmpfs=False,
+        run_timeout=None,
+        result_cache=None,
+        class_data_archive=None,
+        resource_limits=None,
+        verdicts=None,
+        scan_jobs=None,
+        trace=None,
+        jvm_profiler=None,
+    ):
+        """
+        :param benchmark_path: Path to the benchmark directory
+        :param package_paths: Paths to the packages used by the benchmark
+        :param directory: Working directory, a temporary one is created and removed if None
+        :param compilation_cache: Cache of compiled benchmark classes, if any
+        :param jvm_worker: Persistent JVM worker running the harnesses, if any
+        :param parse_cache: Cache of scanned java files, if any
+        :param workspace_mode: How the sources are made available in the working
+        directory, one of WORKSPACE_MODES
+        :param tmpfs: Create the temporary working directory in memory
+        :param run_timeout: Seconds after which a harness run is killed, None to wait
+        :param result_cache: Cache of validation results, if any
+        :param class_data_archive: Class data sharing archive for the harness runs, if any
+        :param resource_limits: Limits of the javac and java processes, if any
+        :param verdicts: Verdicts by assumption fingerprint shared with other
+        validations, only this validator's are reused if None
+        :param scan_jobs: Processes scanning the benchmark sources, the number of CPUs if
+        None
+        :param trace: Number of the last nondet calls of each harness run added to its
+        result with their tape index, value and caller, None not to trace
+        :param jvm_profiler: FlightRecorder recording each harness run and adding the
+        summary of the recording to its result, if any
+        """
+        self.owns_directory = directory is None
+        self.directory = create_workspace(tmpfs) if directory is None else directory
+        self.java_processor = JavaFileProcessor(
+            self.directory,
+            benchmark_path,
+            package_paths,
+            parse_cache,
+            workspace_mode,
+            scan_jobs,
+        )
+        self.test_harness = TestHarness(
+            self.directory,
+            overlay_source_paths(self.java_processor.source_trees, workspace_mode),
+            run_timeout,
+            class_data_archive,
+            resource_limits,
+            trace,
+            jvm_profiler,
+        )
+        self.compilation_cache = compilation_cache
+        self.jvm_worker = jvm_worker
+        self.result_cache = result_cache
+        self.verdicts = {} if verdicts is None else verdicts
+        self.nondet_mappings = None
+        self._populated = False
+        self._compiled = False
+        self._sources_hash = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.cleanup()
+
+    def prepare(self) -> None:
+        """
+        Moves the benchmark into the working directory and extracts its nondet mappings
+        """
+        self._populate_workspace()
+        self._extract_nondet_mappings()
+
+    def _populate_workspace(self) -> None:
+        if not self._populated:
+            with phase("workspace"):
+                self.java_processor.preprocess()
+            self._populated = True
+
+    def _extract_nondet_mappings(self) -> None:
+        if self.nondet_mappings is None:
+            with phase("nondet_extraction"):
+                self.nondet_mappings = self.java_processor.extract_nondet_mappings()
+
+    def _cache_key(self) -> str:
+        """
+        :return: The key of the benchmark and its packages in the compilation cache
+        """
+        harness = []
+        for path in (TestHarness.TEST_RESOURCE_PATH, TestHarness.VERIFIER_RESOURCE_PATH):
+            with open(path, "r", encoding="utf-8") as file:
+                harness.append(file.read())
+        return hash_source_trees(
+            self.java_processor.source_trees,
+            extra=[toolchain_versions(self.compilation_cache.cache_dir)[0], *harness],
+        )
+
+    def benchmark_hash(self) -> str:
+        """
+        :return: The hash identifying the benchmark and package sources
+        """
+        if self._sources_hash is None:
+            self._sources_hash = hash_source_trees(self.java_processor.source_trees)
+        return self._sources_hash
+
+    def _result_key(self, witness_path, json_input) -> str:
+        """
+        :return: The key of a witness validation in the result cache
+        """
+        harness = []
+        for path in (TestHarness.TEST_RESOURCE_PATH, TestHarness.VERIFIER_RESOURCE_PATH):
+            with open(path, "r", encoding="utf-8") as file:
+                harness.append(file.read())
+        return self.result_cache.key(
+            self.benchmark_hash(),
+            witness_path,
+            extra=[__version__, *harness, str(json_input)],
+        )
+
+    def validate(self, witness_path, json_input=False) -> str:
+        """
+        Validates a single witness against the benchmark, unless its result is cached
+        :param witness_path: Path to the witness file
+        :param json_input: Interpret the witness input with JSON/YAML format
+        :return: The validation result
+        """
+        count("witnesses")
+        if self.result_cache is None:
+            return self._validate(witness_path, json_input)
+        result_key = self._result_key(witness_path, json_input)
+        outcome = self.result_cache.get(result_key)
+        if outcome is None:
+            outcome = self._validate(witness_path, json_input)
+            self.result_cache.put(result_key, outcome)
+        return outcome
+
+    def _validate(self, witness_path, json_input) -> str:
+        # The benchmark is only analysed once a witness misses the result cache
+        self._extract_nondet_mappings()
+        witness_processor = WitnessProcessor(
+            self.directory, witness_path, json_input=json_input
+        )
+        witness_processor.preprocess()
+        assumptions = witness_processor.extract_assumptions()
+        # Values the nondet calls cannot return still run, as the run may reach the
+        # violation before consuming them
+        with phase("prescreen"):
+            mismatch = prescreen_assumptions(self.nondet_mappings, assumptions)
+        if mismatch is not None:
+            count("prescreen_mismatches")
+        assumption_values = filter_assumptions(self.nondet_mappings, assumptions)
+        fingerprint = fingerprint_assumptions(self.benchmark_hash(), assumption_values)
+        outcome = self.verdicts.get(fingerprint)
+        if outcome is not None:
+            count("duplicate_witnesses")
+            return outcome
+        outcome = self._run(assumption_values)
+        if outcome in ResultCache.CACHEABLE_OUTCOMES:
+            self.verdicts[fingerprint] = outcome
+        return explain_outcome(outcome, mismatch)
+
+    def _run(self, assumption_values) -> str:
+        """
+        Runs the harness on some assumption values
+        :param assumption_values: The filtered assumption values of a witness
+        :return: The validation result
+        """
+        self._populate_workspace()
+        # Only the first witness pays for compiling, later ones just rewrite the tape
+        with phase("harness"):
+            if self._compiled:
+                self.test_harness.update_assumptions(assumption_values)
+            else:
+                cache_key = (
+                    None if self.compilation_cache is None else self._cache_key()
+                )
+                self.test_harness.build_test_harness(
+                    assumption_values, self.compilation_cache, cache_key
+                )
+                self._compiled = True
+        return self.test_harness.run_test_harness(self.jvm_worker)
+
+    def cleanup(self) -> None:
+        """
+        Removes the working directory in the background if it was created by the validator
+        """
+        if self.owns_directory:
+            remove_in_background(self.directory)
+
+
+def validate_witnesses(
+    benchmark_path,
+    package_paths,
+    witness_paths,
+    local_dir=False,
+    json_input=False,
+    compilation_cache=None,
+    jvm_worker=None,
+    parse_cache=None,
+    workspace_mode="copy",
+    tmpfs=False,
+    run_timeout=None,
+    result_cache=None,
+    class_data_archive=None,
+    resource_limits=None,
+    trace=None,
+    jvm_profiler=None,
+) -> Iterator[Tuple[str, str]]:
+    """
+    Validates a list of witnesses against one benchmark
+    :param benchmark_path: Path to the benchmark directory
+    :param package_paths: Paths to the packages used by the benchmark
+    :param witness_paths: Paths to witness files or directories containing witnesses
+    :param local_dir: Perform all of the processing in the current directory
+    :param json_input: Interpret the witness input with JSON/YAML format
+    :param compilation_cache: Cache of compiled benchmark classes, if any
+    :param jvm_worker: Persistent JVM worker running the harnesses, if any
+    :param parse_cache: Cache of scanned java files, if any
+    :param workspace_mode: How the sources are made available in the working directory
+    :param tmpfs: Create the temporary working directory in memory
+    :param run_timeout: Seconds after which a harness run is killed, None to wait
+    :param result_cache: Cache of validation results, if any
+    :param class_data_archive: Class data sharing archive for the harness runs, if any
+    :param resource_limits: Limits of the javac and java processes, if any
+    :param trace: Number of the last nondet calls of each harness run added to its
+    result, None not to trace
+    :param jvm_profiler: FlightRecorder recording each harness run, if any
+    :return: Pairs of witness path and validation result, in input order
+    """
+    directory = "." if local_dir else None
+    with BatchValidator(
+        benchmark_path,
+        package_paths,
+        directory,
+        compilation_cache,
+        jvm_worker,
+        parse_cache,
+        workspace_mode,
+        tmpfs,
+        run_timeout,
+        result_cache,
+        class_data_archive,
+        resource_limits,
+        trace=trace,
+        jvm_profiler=jvm_profiler,
+    ) as validator:
+        for witness_path in collect_witnesses(witness_paths):
+            try:
+                outcome = validator.validate(witness_path, json_input=json_input)
+            except Exception as err:
+                outcome = f"wit4java: Could not validate witness ({err})"
+            yield witness_path, outcome
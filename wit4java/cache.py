@@ -0,0 +1,460 @@
+"""
+ This file is part of wit4java, an execution-based violation-witness validator for Java
+ https://github.com/wit4java/wit4java.
+
+ This module deals with the persistent caches kept between validations
+"""
+
+import glob
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_RESULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_PARSE_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_RESULT_MAX_AGE = 30 * 24 * 60 * 60
+
+
+def default_cache_dir() -> str:
+    """
+    Finds the directory holding the wit4java caches
+    :return: $WIT4JAVA_CACHE_DIR if set, otherwise wit4java under the user cache directory
+    """
+    if os.environ.get("WIT4JAVA_CACHE_DIR"):
+        return os.environ["WIT4JAVA_CACHE_DIR"]
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_home, "wit4java")
+
+
+def hash_source_trees(paths: Iterable[str], extra: Iterable[str] = ()) -> str:
+    """
+    Hashes the java sources below some directories
+    :param paths: Directories whose .java files are hashed, in order
+    :param extra: Additional strings folded into the hash, e.g. toolchain versions
+    :return: A hex digest identifying the sources
+    """
+    digest = hashlib.sha256()
+    for value in extra:
+        digest.update(value.encode("utf-8") + b"\0")
+    for root in paths:
+        digest.update(b"root\0")
+        sources = sorted(glob.glob(os.path.join(root, "**/*.java"), recursive=True))
+        for source in sources:
+            digest.update(os.path.relpath(source, root).encode("utf-8") + b"\0")
+            with open(source, "rb") as file:
+                digest.update(hashlib.sha256(file.read()).digest())
+    return digest.hexdigest()
+
+
+def hash_file(path: str) -> str:
+    """
+    Hashes the contents of a file without reading it into memory at once
+    :param path: The file
+    :return: A hex digest of its contents
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_json_atomically(path: str, data) -> None:
+    """
+    Writes a JSON file so that concurrent readers never see it partially written
+    :param path: The file
+    :param data: The JSON serialisable contents
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    descriptor, staging = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".staging-")
+    try:
+        with os.fdopen(descriptor, "w", encoding="utf-8") as file:
+            json.dump(data, file)
+        os.replace(staging, path)
+    except OSError:
+        os.unlink(staging)
+        raise
+
+
+@lru_cache(maxsize=None)
+def toolchain_versions(cache_dir: str) -> Tuple[str, str]:
+    """
+    Identifies the javac and java on the path by their versions. The versions are
+    remembered per binary in the cache directory, so the JVM does not have to start
+    to tell them.
+    :param cache_dir: The wit4java cache directory
+    :return: The version strings of javac and java, "missing" for absent ones
+    """
+    # pylint: disable=import-outside-toplevel
+    from wit4java.testharness import TestHarness
+
+    binaries = []
+    for tool in ("javac", "java"):
+        path = shutil.which(tool)
+        if path is None:
+            binaries.append(f"{tool} missing")
+            continue
+        real_path = os.path.realpath(path)
+        stat = os.stat(real_path)
+        binaries.append(f"{real_path}:{stat.st_mtime_ns}:{stat.st_size}")
+    entry = os.path.join(
+        cache_dir,
+        "toolchains",
+        hashlib.sha256("\0".join(binaries).encode("utf-8")).hexdigest() + ".json",
+    )
+    try:
+        with open(entry, "r", encoding="utf-8") as file:
+            javac_version, java_version = json.load(file)
+    except (OSError, ValueError):
+        javac_version = TestHarness.javac_version() if shutil.which("javac") else "missing"
+        java_version = TestHarness.java_version() if shutil.which("java") else "missing"
+        try:
+            _write_json_atomically(entry, [javac_version, java_version])
+        except OSError:
+            pass
+    return javac_version, java_version
+
+
+def _tree_size(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    )
+
+
+class CompilationCache:
+    """
+    The class CompilationCache keeps compiled benchmark classes on disk, keyed by the
+    hash of the sources they were compiled from and evicted least recently used first
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        :param cache_dir: The wit4java cache directory
+        :param max_bytes: Upper bound for the total size of the cached classes
+        """
+        self.cache_dir = cache_dir
+        self.directory = os.path.join(cache_dir, "classes")
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _entry(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def restore(self, key: str, destination: str) -> bool:
+        """
+        Copies the classes cached under a key into a directory
+        :param key: The source hash of the benchmark
+        :param destination: The working directory to receive the classes
+        :return: True if the key was cached
+        """
+        entry = self._entry(key)
+        if not os.path.isdir(entry):
+            self.misses += 1
+            return False
+        try:
+            for root, _, names in os.walk(entry):
+                target_root = os.path.join(destination, os.path.relpath(root, entry))
+                os.makedirs(target_root, exist_ok=True)
+                for name in names:
+                    # Fresh modification times make javac prefer the classes over the sources
+                    shutil.copyfile(
+                        os.path.join(root, name), os.path.join(target_root, name)
+                    )
+            # Mark the entry as recently used
+            os.utime(entry)
+        except OSError:
+            # Evicted by a concurrent validation while copying
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    def store(self, key: str, source: str, exclude: Iterable[str] = ()) -> None:
+        """
+        Caches the classes compiled in a directory under a key
+        :param key: The source hash of the benchmark
+        :param source: The working directory holding the compiled classes
+        :param exclude: Class files, relative to the directory, that must not be cached
+        """
+        if os.path.isdir(self._entry(key)):
+            return
+        excluded = {os.path.normpath(path) for path in exclude}
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            staging = tempfile.mkdtemp(dir=self.directory, prefix=".staging-")
+        except OSError:
+            # An unwritable cache only costs the speed-up
+            return
+        for class_file in glob.glob(os.path.join(source, "**/*.class"), recursive=True):
+            relative = os.path.relpath(class_file, source)
+            if relative in excluded:
+                continue
+            target = os.path.join(staging, relative)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(class_file, target)
+        try:
+            # Publish atomically so concurrent validations never see partial entries
+            os.rename(staging, self._entry(key))
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Removes the least recently used entries until the cache fits its size bound
+        """
+        entries = [
+            self._entry(key)
+            for key in os.listdir(self.directory)
+            if not key.startswith(".")
+        ]
+        sizes = {entry: _tree_size(entry) for entry in entries}
+        total = sum(sizes.values())
+        if total <= self.max_bytes:
+            return
+        last_used = {}
+        for entry in entries:
+            try:
+                last_used[entry] = os.path.getmtime(entry)
+            except OSError:
+                # Already evicted by a concurrent validation
+                last_used[entry] = 0
+        for entry in sorted(entries, key=last_used.get):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= sizes[entry]
+
+    def report(self) -> str:
+        """
+        :return: A summary of the cache hits and misses
+        """
+        return f"wit4java: compilation cache hits: {self.hits}, misses: {self.misses}"
+
+
+class ParseCache:
+    """
+    The class ParseCache keeps the result of scanning each java file on disk, keyed by
+    a hash of the file contents and of the scanner that produced it, and evicted least
+    recently used first
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_PARSE_MAX_BYTES):
+        """
+        :param cache_dir: The wit4java cache directory
+        :param max_bytes: Upper bound for the total size of the stored scan results
+        """
+        self.directory = os.path.join(cache_dir, "parse")
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._evicted = False
+
+    def _entry(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Looks up the scan result stored under a key
+        :param key: The hash of the file contents and the scanner
+        :return: The scan result or None if not cached
+        """
+        entry = self._entry(key)
+        try:
+            with open(entry, "r", encoding="utf-8") as file:
+                result = json.load(file)
+            # Mark the entry as recently used
+            os.utime(entry)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def put(self, key: str, result: Dict) -> None:
+        """
+        Stores a scan result under a key
+        :param key: The hash of the file contents and the scanner
+        :param result: The JSON serialisable scan result
+        """
+        try:
+            # Published atomically so concurrent validations never read partial entries
+            _write_json_atomically(self._entry(key), result)
+        except OSError:
+            # An unwritable cache only costs the speed-up
+            return
+        if not self._evicted:
+            # Once per process is enough to keep the cache bounded
+            self._evicted = True
+            self.evict()
+
+    def evict(self) -> None:
+        """
+        Removes the least recently used entries until the cache fits its size bound
+        """
+        entries = []
+        total = 0
+        for entry in glob.glob(os.path.join(self.directory, "??", "*.json")):
+            try:
+                stat = os.stat(entry)
+            except OSError:
+                # Already evicted by a concurrent validation
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+            total += stat.st_size
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(entry)
+            except OSError:
+                pass
+            total -= size
+
+    def report(self) -> str:
+        """
+        :return: A summary of the cache hits and misses
+        """
+        return f"wit4java: parse cache hits: {self.hits}, misses: {self.misses}"
+
+
+class ResultCache:
+    """
+    The class ResultCache keeps the verdicts of validations on disk, keyed by hashes of
+    the benchmark and package sources, of the witness and of the toolchain. Entries
+    are evicted once they are too old or, least recently used first, once the cache
+    is too large.
+    """
+
+    # Only definite verdicts are kept, failures may be caused by the environment
+    CACHEABLE_OUTCOMES = ("wit4java: Witness Correct", "wit4java: Witness Spurious")
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_bytes: int = DEFAULT_RESULT_MAX_BYTES,
+        max_age: float = DEFAULT_RESULT_MAX_AGE,
+    ):
+        """
+        :param cache_dir: The wit4java cache directory
+        :param max_bytes: Upper bound for the total size of the stored results
+        :param max_age: Seconds after which a stored result is discarded
+        """
+        self.cache_dir = cache_dir
+        self.directory = os.path.join(cache_dir, "results")
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._evicted = False
+
+    def _entry(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def key(self, sources_hash: str, witness_path: str, extra: Iterable[str] = ()) -> str:
+        """
+        Computes the key of a validation
+        :param sources_hash: Hash of the benchmark and package sources
+        :param witness_path: Path to the witness file
+        :param extra: Further strings the verdict depends on, e.g. options or the
+        wit4java version and harness sources
+        :return: The key of the validation
+        """
+        digest = hashlib.sha256()
+        toolchain = toolchain_versions(self.cache_dir)
+        for value in [sources_hash, hash_file(witness_path), *toolchain, *extra]:
+            digest.update(value.encode("utf-8") + b"\0")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Looks up the verdict stored under a key
+        :param key: The key of the validation
+        :return: The verdict or None if not cached
+        """
+        entry = self._entry(key)
+        try:
+            with open(entry, "r", encoding="utf-8") as file:
+                stored = json.load(file)
+            outcome = stored["outcome"]
+            # Entries expire by when they were stored, however often they are used
+            if time.time() - stored.get("created", 0) > self.max_age:
+                os.unlink(entry)
+                outcome = None
+            else:
+                # Mark the entry as recently used
+                os.utime(entry)
+        except (OSError, ValueError, KeyError):
+            outcome = None
+        if outcome is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return outcome
+
+    def put(self, key: str, outcome: str) -> None:
+        """
+        Stores a verdict under a key, unless it is not a definite one
+        :param key: The key of the validation
+        :param outcome: The validation result
+        """
+        if outcome not in self.CACHEABLE_OUTCOMES:
+            return
+        try:
+            _write_json_atomically(
+                self._entry(key), {"outcome": outcome, "created": time.time()}
+            )
+        except OSError:
+            # An unwritable cache only costs the speed-up
+            return
+        if not self._evicted:
+            # Once per process is enough to keep the cache bounded
+            self._evicted = True
+            self.evict()
+
+    def evict(self) -> None:
+        """
+        Removes the entries that are too old, then the least recently used ones until
+        the cache fits its size bound
+        """
+        now = time.time()
+        entries = []
+        total = 0
+        for entry in glob.glob(os.path.join(self.directory, "??", "*.json")):
+            try:
+                stat = os.stat(entry)
+                # An entry is used after it is stored, so one unused for longer than
+                # max_age is expired without reading it
+                if now - stat.st_mtime > self.max_age:
+                    os.unlink(entry)
+                    continue
+            except OSError:
+                # Already evicted by a concurrent validation
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+            total += stat.st_size
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(entry)
+            except OSError:
+                pass
+            total -= size
+
+    def report(self) -> str:
+        """
+        :return: A summary of the cache hits and misses
+        """
+        return f"wit4java: result cache hits: {self.hits}, misses: {self.misses}"
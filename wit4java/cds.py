@@ -0,0 +1,185 @@
+"""
+ This file is part of wit4java, an execution-based violation-witness validator for Java
+ https://github.com/wit4java/wit4java.
+
+ This module deals with the class data sharing archive that shortens the JVM startup
+ of harness runs
+"""
+
+import hashlib
+import os
+import tempfile
+import time
+import zipfile
+import shutil
+from typing import List, Optional, Tuple
+
+from wit4java.cache import toolchain_versions
+from wit4java.testharness import TAPE_PROPERTY, TestHarness, write_assumption_tape
+
+# Only needed to compile Test.java, the benchmark's Main is found at run time
+MAIN_STUB = "public class Main { public static void main(String[] args) {} }\n"
+# Values for the nondet calls of Wit4javaTraining, the last one failing its assertion
+TRAINING_TAPE = ["true", "1", "1.5", "wit4java", "1"]
+# Seconds after which an unfinished build is assumed to have died
+STALE_BUILD_SECONDS = 600
+
+
+class ClassDataArchive:
+    """
+    The class ClassDataArchive builds, once per java version, a jar of the Test and
+    Verifier harness classes and a dynamic AppCDS archive of the classes a harness run
+    loads. Runs with the jar ahead of the workspace on their class path map the
+    archive instead of loading and verifying those classes. Without CDS support, e.g.
+    before JDK 13, runs go on without an archive.
+    """
+
+    TRAINING_RESOURCE_PATH = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "resources/Wit4javaTraining.java"
+    )
+    JAR_NAME = "harness.jar"
+    ARCHIVE_NAME = "harness.jsa"
+
+    def __init__(self, cache_dir: str):
+        """
+        :param cache_dir: The wit4java cache directory to keep the archives in
+        """
+        self.cache_dir = cache_dir
+        self.directory = os.path.join(cache_dir, "cds")
+        self._paths = None
+        self._checked = False
+
+    def _key(self) -> str:
+        """
+        :return: The key of the archive for the java on the path and the harness sources
+        """
+        digest = hashlib.sha256()
+        for version in toolchain_versions(self.cache_dir):
+            digest.update(version.encode("utf-8") + b"\0")
+        for path in (
+            TestHarness.TEST_RESOURCE_PATH,
+            TestHarness.VERIFIER_RESOURCE_PATH,
+            self.TRAINING_RESOURCE_PATH,
+        ):
+            with open(path, "rb") as file:
+                digest.update(hashlib.sha256(file.read()).digest())
+        return digest.hexdigest()
+
+    def paths(self) -> Optional[Tuple[str, str]]:
+        """
+        Looks up the archive, building it on first use
+        :return: The harness jar and the archive, None if CDS is unavailable
+        """
+        if self._checked:
+            return self._paths
+        self._checked = True
+        if shutil.which("java") is None or shutil.which("javac") is None:
+            return None
+        key = self._key()
+        archive_dir = os.path.join(self.directory, key)
+        ready = os.path.join(archive_dir, "ready")
+        unavailable = os.path.join(archive_dir, "unavailable")
+        if not os.path.exists(ready) and not os.path.exists(unavailable):
+            self._build(archive_dir)
+        if os.path.exists(ready):
+            self._paths = (
+                os.path.join(archive_dir, self.JAR_NAME),
+                os.path.join(archive_dir, self.ARCHIVE_NAME),
+            )
+        return self._paths
+
+    def _build(self, archive_dir: str) -> None:
+        """
+        Compiles the harness into a jar and dumps the archive of a training run. The
+        archive records the path of the jar, so both are built in place by whichever
+        validation creates the directory, and a ready file published once they are.
+        :param archive_dir: Directory of the jar and archive
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        try:
+            os.mkdir(archive_dir)
+        except FileExistsError:
+            # Being built by another validation, or not buildable, which the ready
+            # and unavailable files tell apart once done
+            building = not os.path.exists(os.path.join(archive_dir, "unavailable"))
+            if building and time.time() - os.path.getmtime(archive_dir) > STALE_BUILD_SECONDS:
+                shutil.rmtree(archive_dir, ignore_errors=True)
+            return
+        staging = tempfile.mkdtemp(dir=archive_dir, prefix=".staging-")
+        try:
+            verifier = os.path.join(staging, f"{TestHarness.VERIFIER_PACKAGE}/Verifier.java")
+            os.makedirs(os.path.dirname(verifier))
+            with open(TestHarness.VERIFIER_RESOURCE_PATH, "rb") as source:
+                with open(verifier, "wb") as file:
+                    file.write(source.read())
+            with open(os.path.join(staging, "Main.java"), "w", encoding="utf-8") as file:
+                file.write(MAIN_STUB)
+            TestHarness._run_command(
+                [
+                    "javac",
+                    "-sourcepath",
+                    staging,
+                    "-d",
+                    staging,
+                    TestHarness.TEST_RESOURCE_PATH,
+                    self.TRAINING_RESOURCE_PATH,
+                ]
+            )
+            jar = os.path.join(archive_dir, self.JAR_NAME)
+            archive = os.path.join(archive_dir, self.ARCHIVE_NAME)
+            if self._write_jar(staging, jar):
+                tape = os.path.join(staging, "training.tape")
+                write_assumption_tape(tape, TRAINING_TAPE)
+                # The class path of the dump must prefix that of the runs
+                TestHarness._run_command(
+                    [
+                        "java",
+                        f"-XX:ArchiveClassesAtExit={archive}",
+                        "-cp",
+                        jar,
+                        "-ea",
+                        f"-D{TAPE_PROPERTY}={tape}",
+                        "Wit4javaTraining",
+                    ]
+                )
+            marker = "ready" if os.path.exists(archive) else "unavailable"
+            with open(os.path.join(archive_dir, marker), "w", encoding="utf-8"):
+                pass
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    @staticmethod
+    def _write_jar(classes: str, jar: str) -> bool:
+        """
+        Packs the compiled harness classes, but not the Main stub, into a jar
+        :return: Whether the harness was compiled
+        """
+        if not os.path.exists(os.path.join(classes, "Test.class")):
+            return False
+        with zipfile.ZipFile(jar, "w") as archive:
+            for root, _, files in os.walk(classes):
+                for name in files:
+                    path = os.path.join(root, name)
+                    entry = os.path.relpath(path, classes).replace(os.sep, "/")
+                    if name.endswith(".class") and entry != "Main.class":
+                        archive.write(path, entry)
+        return True
+
+    def java_options(self, class_path: str) -> List[str]:
+        """
+        :param class_path: The class path of the harness run
+        :return: The options of a java run using the archive, or just the class path
+        without one
+        """
+        paths = self.paths()
+        if paths is None:
+            return ["-cp", class_path]
+        jar, archive = paths
+        return [
+            f"-XX:SharedArchiveFile={archive}",
+            # An unusable archive is skipped, without warnings mixing into the output
+            "-Xshare:auto",
+            "-Xlog:cds*=off",
+            "-cp",
+            os.pathsep.join([jar, class_path]),
+        ]
@@ -0,0 +1,380 @@
+"""
+ This file is part of wit4java, an execution-based violation-witness validator for Java
+ https://github.com/wit4java/wit4java.
+
+ This module deals with validating whole corpora of benchmark and witness pairs in parallel
+"""
+
+import json
+import os
+import signal
+import time
+import multiprocessing
+from collections import deque
+from multiprocessing.connection import wait
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from wit4java.batch import BatchValidator, collect_witnesses
+from wit4java.cache import CompilationCache, ParseCache, ResultCache
+from wit4java.cds import ClassDataArchive
+from wit4java.profiling import Profiler, phase, profiling
+from wit4java.workspace import create_workspace, remove_in_background
+
+POLL_INTERVAL = 0.1
+
+
+class _DuplicateWitness(Exception):
+    """
+    Raised in a task whose assumption fingerprint another running task validates
+    """
+
+
+class _ParentVerdicts:
+    """
+    The verdicts of a task's BatchValidator, looked up in the parent process that
+    knows the fingerprints of all tasks. The parent answers with a verdict of an
+    earlier task, lets the task run the harness, or parks the task until the one
+    running the same fingerprint is done.
+    """
+
+    def __init__(self, connection):
+        """
+        :param connection: Pipe to the parent process
+        """
+        self.connection = connection
+        self.fingerprint = None
+        self.shared = False
+
+    def get(self, fingerprint: str) -> Optional[str]:
+        self.fingerprint = fingerprint
+        self.connection.send({"fingerprint": fingerprint})
+        reply = self.connection.recv()
+        if reply.get("duplicate"):
+            raise _DuplicateWitness()
+        self.shared = "outcome" in reply
+        return reply.get("outcome")
+
+    def __setitem__(self, fingerprint: str, outcome: str) -> None:
+        # The parent learns the verdict from the result of the task
+        pass
+
+
+def load_manifest(manifest_path, package_paths=None) -> List[Dict]:
+    """
+    Reads the tasks of a corpus, either from a JSONL file with one
+    {"benchmark", "packages", "witness"} object per line, with paths relative to the file,
+    or from a directory with a <task>/benchmark directory and a <task>/witnesses
+    directory per task
+    :param manifest_path: Path to the JSONL file or the corpus directory
+    :param package_paths: Packages used by tasks that do not list their own
+    :return: One task per benchmark and witness pair
+    """
+    package_paths = list(package_paths or [])
+    tasks = []
+    if os.path.isdir(manifest_path):
+        for name in sorted(os.listdir(manifest_path)):
+            benchmark = os.path.join(manifest_path, name, "benchmark")
+            witnesses = os.path.join(manifest_path, name, "witnesses")
+            if not os.path.isdir(benchmark) or not os.path.isdir(witnesses):
+                continue
+            for witness in collect_witnesses([witnesses]):
+                tasks.append(
+                    {"benchmark": benchmark, "packages": package_paths, "witness": witness}
+                )
+        return tasks
+
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    with open(manifest_path, "r", encoding="utf-8") as file:
+        for line_number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if "benchmark" not in entry or "witness" not in entry:
+                raise ValueError(
+                    f"Manifest line {line_number} needs a benchmark and a witness."
+                )
+            tasks.append(
+                {
+                    "benchmark": os.path.join(base, entry["benchmark"]),
+                    "packages": [
+                        os.path.join(base, package)
+                        for package in entry.get("packages", package_paths)
+                    ],
+                    "witness": os.path.join(base, entry["witness"]),
+                }
+            )
+    return tasks
+
+
+def _run_task(
+    task,
+    directory,
+    cache_dir,
+    workspace_mode,
+    profile,
+    class_data_sharing,
+    resource_limits,
+    connection,
+) -> None:
+    """
+    Validates one task in a child process, reporting the outcome through a pipe
+    :param task: The benchmark, packages and witness to validate
+    :param directory: The isolated workspace of the task
+    :param cache_dir: The wit4java cache directory, None to disable caching
+    :param workspace_mode: How the sources are made available in the workspace
+    :param profile: Report the profile of the validation along with the outcome
+    :param class_data_sharing: Start the harness JVM from the class data archive kept
+    in the cache directory
+    :param resource_limits: Limits of the javac and java processes of the task, if any
+    :param connection: Pipe to send the validation result through and look up
+    verdicts by assumption fingerprint
+    """
+    # Own process group so a timeout can kill javac and java along with the task
+    os.setsid()
+    compilation_cache = None if cache_dir is None else CompilationCache(cache_dir)
+    parse_cache = None if cache_dir is None else ParseCache(cache_dir)
+    result_cache = None if cache_dir is None else ResultCache(cache_dir)
+    class_data_archive = (
+        ClassDataArchive(cache_dir) if cache_dir and class_data_sharing else None
+    )
+    # Always profiled, the usage of javac and java being part of every result
+    profiler = Profiler()
+    verdicts = _ParentVerdicts(connection)
+    try:
+        with profiling(profiler), phase("total"), BatchValidator(
+            task["benchmark"],
+            task["packages"],
+            directory,
+            compilation_cache,
+            parse_cache=parse_cache,
+            workspace_mode=workspace_mode,
+            result_cache=result_cache,
+            class_data_archive=class_data_archive,
+            resource_limits=resource_limits,
+            verdicts=verdicts,
+            # The concurrent tasks already keep the cores busy
+            scan_jobs=1,
+        ) as validator:
+            outcome = validator.validate(task["witness"])
+        status = "done"
+    except _DuplicateWitness:
+        outcome = None
+        status = "duplicate"
+    except Exception as err:
+        outcome = f"wit4java: Could not validate witness ({err})"
+        status = "error"
+    result = {"outcome": outcome, "status": status}
+    if result_cache is not None:
+        result["cached"] = result_cache.hits > 0
+    if verdicts.fingerprint is not None:
+        result["fingerprint"] = verdicts.fingerprint
+    if verdicts.shared:
+        result["duplicate"] = True
+    report = profiler.report()
+    result["usage"] = report["processes"]
+    if resource_limits is not None:
+        result["limits"] = resource_limits.report()
+    if profile:
+        result["profile"] = report
+    connection.send(result)
+    connection.close()
+
+
+def _process_group_rss(process_groups: Iterable[int]) -> Dict[int, int]:
+    """
+    Sums the resident memory of the processes in some process groups
+    :param process_groups: The process group ids of interest
+    :return: Resident bytes per process group, empty if /proc is unavailable
+    """
+    process_groups = set(process_groups)
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    usage = dict.fromkeys(process_groups, 0)
+    try:
+        pids = [pid for pid in os.listdir("/proc") if pid.isdigit()]
+    except OSError:
+        return {}
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat", "r", encoding="utf-8") as file:
+                stat = file.read()
+        except OSError:
+            continue
+        # Fields after the parenthesised command name, which may contain spaces
+        fields = stat[stat.rfind(")") + 2 :].split()
+        process_group = int(fields[2])
+        if process_group in process_groups:
+            usage[process_group] += int(fields[21]) * page_size
+    return usage
+
+
+def _claim_fingerprint(fingerprint: str, process, verdicts, owners) -> Dict:
+    """
+    Decides what a task does with its assumption fingerprint
+    :param fingerprint: The fingerprint of the task
+    :param process: The process of the task
+    :param verdicts: The verdicts of finished fingerprints
+    :param owners: The processes running the harness of unfinished fingerprints
+    :return: The reply to the task: an outcome, that it is a duplicate, or neither to
+    run the harness
+    """
+    if fingerprint in verdicts:
+        return {"outcome": verdicts[fingerprint]}
+    if fingerprint in owners:
+        return {"duplicate": True}
+    owners[fingerprint] = process
+    return {}
+
+
+def _kill_process_group(process) -> None:
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        # The child has not become a group leader yet
+        process.kill()
+
+
+def validate_corpus(
+    tasks: List[Dict],
+    jobs: Optional[int] = None,
+    timeout: Optional[float] = None,
+    memory_limit: Optional[int] = None,
+    cache_dir: Optional[str] = None,
+    workspace_mode: str = "copy",
+    tmpfs: bool = False,
+    profile: bool = False,
+    class_data_sharing: bool = True,
+    resource_limits=None,
+    pin_cores: bool = False,
+) -> Iterator[Dict]:
+    """
+    Validates tasks concurrently, each in its own process and workspace
+    :param tasks: The tasks as returned by load_manifest
+    :param jobs: Number of concurrent tasks, the number of CPUs if None
+    :param timeout: Wall-clock seconds after which a task is killed
+    :param memory_limit: Resident bytes of a task and its children after which it is killed
+    :param cache_dir: The wit4java cache directory, None to disable caching
+    :param workspace_mode: How the sources are made available in the workspaces
+    :param tmpfs: Create the workspaces in memory
+    :param profile: Add the profile of each validation to its result
+    :param class_data_sharing: Start the harness JVMs from a class data archive kept in
+    the cache directory
+    :param resource_limits: Limits of the javac and java processes of every task, if
+    any
+    :param pin_cores: Pin the processes of each concurrent task to its share of the
+    cores
+    :return: The task results in order of completion
+    """
+    jobs = jobs or os.cpu_count() or 1
+    pending = deque(tasks)
+    running = {}
+    free_slots = list(range(jobs))
+    # Tasks with the same benchmark and assumption values run the harness once: the
+    # verdicts by fingerprint, the task running each fingerprint and those waiting on it
+    verdicts: Dict[str, str] = {}
+    owners: Dict[str, multiprocessing.Process] = {}
+    waiting: Dict[str, List] = {}
+    while pending or running:
+        while pending and len(running) < jobs:
+            task = pending.popleft()
+            slot = free_slots.pop()
+            task_limits = resource_limits
+            if resource_limits is not None and pin_cores:
+                task_limits = resource_limits.pinned(slot, jobs)
+            directory = create_workspace(tmpfs)
+            receiver, sender = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_run_task,
+                args=(
+                    task,
+                    directory,
+                    cache_dir,
+                    workspace_mode,
+                    profile,
+                    class_data_sharing,
+                    task_limits,
+                    sender,
+                ),
+            )
+            process.start()
+            sender.close()
+            running[process] = (task, directory, receiver, time.monotonic(), slot)
+
+        wait(
+            [process.sentinel for process in running]
+            + [entry[2] for entry in running.values()],
+            timeout=POLL_INTERVAL,
+        )
+        memory_usage = (
+            _process_group_rss(process.pid for process in running)
+            if memory_limit
+            else {}
+        )
+        for process in list(running):
+            task, directory, receiver, started, slot = running[process]
+            elapsed = time.monotonic() - started
+            result = None
+            try:
+                while result is None and receiver.poll():
+                    message = receiver.recv()
+                    if "fingerprint" in message and "status" not in message:
+                        receiver.send(
+                            _claim_fingerprint(
+                                message["fingerprint"], process, verdicts, owners
+                            )
+                        )
+                    else:
+                        result = message
+            except (EOFError, BrokenPipeError):
+                pass
+            if result is None and not process.is_alive():
+                result = {
+                    "outcome": "wit4java: Could not validate witness (crashed)",
+                    "status": "error",
+                }
+            elif result is None and timeout is not None and elapsed > timeout:
+                result = {
+                    "outcome": "wit4java: Could not validate witness (timeout)",
+                    "status": "timeout",
+                }
+            elif (
+                result is None
+                and memory_limit is not None
+                and memory_usage.get(process.pid, 0) > memory_limit
+            ):
+                result = {
+                    "outcome": "wit4java: Could not validate witness (out of memory)",
+                    "status": "memout",
+                }
+            if result is None:
+                continue
+            # Stray javac or java processes of the task go down with it
+            _kill_process_group(process)
+            process.join()
+            receiver.close()
+            remove_in_background(directory)
+            del running[process]
+            free_slots.append(slot)
+            fingerprint = result.get("fingerprint")
+            if result["status"] == "duplicate":
+                waiting.setdefault(fingerprint, []).append((task, elapsed, result))
+                continue
+            yield dict(task, wall_time=round(elapsed, 3), **result)
+            owned = [key for key, owner in owners.items() if owner is process]
+            for key in owned:
+                del owners[key]
+                if result["outcome"] in ResultCache.CACHEABLE_OUTCOMES:
+                    verdicts[key] = result["outcome"]
+                    for duplicate, duplicate_elapsed, parked in waiting.pop(key, []):
+                        yield dict(
+                            duplicate,
+                            wall_time=round(duplicate_elapsed, 3),
+                            **dict(
+                                parked,
+                                outcome=result["outcome"],
+                                status="done",
+                                duplicate=True,
+                            ),
+                        )
+                else:
+                    # No verdict to share, the duplicates are validated again
+                    pending.extendleft(task for task, _, _ in waiting.pop(key, []))
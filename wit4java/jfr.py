@@ -0,0 +1,212 @@
+"""
+ This file is part of wit4java, an execution-based violation-witness validator for Java
+ https://github.com/wit4java/wit4java.
+
+ This module deals with recording harness runs with Java Flight Recorder and summarising
+ where their time went
+"""
+
+import json
+import os
+import re
+import shutil
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from wit4java.process import run_command
+
+# The sampling of the default settings, every 20ms, costs the JVM about 1%
+JFR_SETTINGS = "default"
+JFR_MAX_SIZE = "32m"
+JFR_STACK_DEPTH = 64
+# Frames printed per sample, enough to get past the JDK methods to their caller
+PRINT_STACK_DEPTH = 16
+# Bytes of `jfr print` output read, which the maximum recording size bounds anyway
+MAX_PRINT_OUTPUT = 256 << 20
+PRINT_TIMEOUT = 120
+HOT_METHODS = 10
+JDK_PACKAGES = ("java.", "javax.", "jdk.", "sun.", "com.sun.")
+HARNESS_CLASSES = ("org.sosy_lab.sv_benchmarks.Verifier", "Test")
+ISO_DURATION = re.compile(r"PT(?:(\d+)H)?(?:(\d+)M)?(?:([\d.]+)S)?")
+
+
+def _seconds(duration) -> float:
+    """
+    :param duration: A duration as `jfr print --json` writes it, either ISO-8601 or
+    nanoseconds
+    :return: The duration in seconds
+    """
+    if isinstance(duration, (int, float)):
+        return duration / 1e9
+    match = ISO_DURATION.fullmatch(str(duration))
+    if match is None:
+        return 0.0
+    hours, minutes, seconds = (float(group or 0) for group in match.groups())
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def _method_name(frame: Dict) -> str:
+    method = frame["method"]
+    return f"{method['type']['name'].replace('/', '.')}.{method['name']}"
+
+
+def _origin(frames: List[Dict]) -> str:
+    """
+    Attributes a sample to the benchmark, the harness or the JDK by its innermost frame
+    outside the JDK, JDK methods called by the benchmark being part of its cost
+    :param frames: The frames of the sample, innermost first
+    :return: "benchmark", "harness" or "jdk"
+    """
+    for frame in frames:
+        name = frame["method"]["type"]["name"].replace("/", ".")
+        if name.startswith(JDK_PACKAGES):
+            continue
+        return "harness" if name in HARNESS_CLASSES else "benchmark"
+    return "jdk"
+
+
+def summarize_events(events: List[Dict]) -> Dict:
+    """
+    Summarises the execution samples and garbage collections of a recording
+    :param events: The events as `jfr print --json` writes them
+    :return: The number of samples, their share by origin, the hottest methods by
+    share of samples, and the number and seconds of garbage collections
+    """
+    methods = Counter()
+    origins = Counter()
+    samples = 0
+    collections = 0
+    gc_time = 0.0
+    for event in events:
+        values = event.get("values", {})
+        if event.get("type") == "jdk.GarbageCollection":
+            collections += 1
+            gc_time += _seconds(values.get("duration", 0))
+            continue
+        frames = (values.get("stackTrace") or {}).get("frames") or []
+        if event.get("type") != "jdk.ExecutionSample" or not frames:
+            continue
+        samples += 1
+        methods[_method_name(frames[0])] += 1
+        origins[_origin(frames)] += 1
+    return {
+        "samples": samples,
+        "origins": {
+            origin: round(origins[origin] / samples, 4) if samples else 0.0
+            for origin in ("benchmark", "harness", "jdk")
+        },
+        "hot_methods": [
+            (method, round(hits / samples, 4))
+            for method, hits in methods.most_common(HOT_METHODS)
+        ],
+        "gc": {"collections": collections, "seconds": round(gc_time, 6)},
+    }
+
+
+def format_jvm_profile(recording_path: str, profile: Optional[Dict]) -> str:
+    """
+    :param recording_path: Path of the recording
+    :param profile: The summary of the recording as returned by summarize_events, None
+    if it could not be summarised
+    :return: The summary as a few lines, the hottest methods one per line
+    """
+    lines = [f"wit4java jvm profile: {recording_path}"]
+    if profile is None:
+        if os.path.exists(recording_path):
+            lines.append("  no jfr tool could summarise the recording")
+        else:
+            # Killed by the timeout or halted by Verifier.assume
+            lines.append("  the run left no recording")
+        return "\n".join(lines)
+    origins = ", ".join(
+        f"{share:.1%} {origin}" for origin, share in profile["origins"].items()
+    )
+    lines.append(f"  {profile['samples']} samples: {origins}")
+    lines.append(
+        f"  GC: {profile['gc']['collections']} collections, "
+        f"{profile['gc']['seconds']:.3f}s"
+    )
+    for method, share in profile["hot_methods"]:
+        lines.append(f"  {share:>6.1%} {method}")
+    return "\n".join(lines)
+
+
+class FlightRecorder:
+    """
+    The class FlightRecorder records harness runs with Java Flight Recorder under a
+    bounded configuration, keeps the recordings in a directory and summarises them
+    with the jfr tool of the JDK running the harness
+    """
+
+    def __init__(self, directory: str):
+        """
+        :param directory: Directory the recordings are kept in
+        """
+        self.directory = directory
+        self._recordings = 0
+
+    def new_recording(self) -> str:
+        """
+        :return: The path of a new recording, unique among the runs of this process
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        self._recordings += 1
+        name = f"wit4java-{os.getpid()}-{self._recordings}.jfr"
+        return os.path.abspath(os.path.join(self.directory, name))
+
+    @staticmethod
+    def java_options(recording_path: str) -> List[str]:
+        """
+        :param recording_path: Path the recording is dumped to when the JVM exits
+        :return: The options recording a java process
+        """
+        return [
+            f"-XX:FlightRecorderOptions=stackdepth={JFR_STACK_DEPTH}",
+            f"-XX:StartFlightRecording=filename={recording_path},"
+            f"settings={JFR_SETTINGS},maxsize={JFR_MAX_SIZE},dumponexit=true",
+        ]
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def jfr_tool() -> Optional[str]:
+        """
+        :return: The jfr tool of the JDK of the java on the path, or any on the path,
+        None if there is none
+        """
+        java = shutil.which("java")
+        if java is not None:
+            tool = os.path.join(os.path.dirname(os.path.realpath(java)), "jfr")
+            if os.access(tool, os.X_OK):
+                return tool
+        return shutil.which("jfr")
+
+    def summarize(self, recording_path: str) -> Optional[Dict]:
+        """
+        Summarises a recording with `jfr print`
+        :param recording_path: Path of the recording
+        :return: The summary, see summarize_events, None without a recording or a jfr
+        tool able to read it
+        """
+        tool = self.jfr_tool()
+        if tool is None or not os.path.exists(recording_path):
+            return None
+        out, _, _ = run_command(
+            [
+                tool,
+                "print",
+                "--json",
+                "--stack-depth",
+                str(PRINT_STACK_DEPTH),
+                "--events",
+                "jdk.ExecutionSample,jdk.GarbageCollection",
+                recording_path,
+            ],
+            PRINT_TIMEOUT,
+            max_output=MAX_PRINT_OUTPUT,
+        )
+        try:
+            events = json.loads(out)["recording"]["events"]
+        except (ValueError, KeyError, TypeError):
+            return None
+        return summarize_events(events)
@@ -0,0 +1,188 @@
+"""
+ This file is part of wit4java, an execution-based violation-witness validator for Java
+ https://github.com/wit4java/wit4java.
+
+ This module deals with bounding the resources of the javac and java processes
+"""
+
+import os
+import resource
+from typing import Callable, Dict, List, Optional
+
+# Below this the JVM spends its time collecting rather than running the benchmark
+MIN_HEAP = 64 * 1024 * 1024
+
+
+def available_cores() -> List[int]:
+    """
+    :return: The CPU cores this process may run on
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def total_memory() -> Optional[int]:
+    """
+    :return: The physical memory in bytes, None if unknown
+    """
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+class ResourceLimits:
+    """
+    The class ResourceLimits bounds each javac and java process: the heap, GC threads
+    and processor count the JVM sizes itself for, rlimits on its address space and
+    CPU time, and optionally the cores it runs on. Without limits, every JVM sizes
+    itself for the whole machine, which thrashes it once many run in parallel.
+    """
+
+    def __init__(
+        self,
+        heap: Optional[int] = None,
+        gc_threads: Optional[int] = None,
+        processors: Optional[int] = None,
+        address_space: Optional[int] = None,
+        cpu_time: Optional[int] = None,
+        cores: Optional[List[int]] = None,
+    ):
+        """
+        :param heap: Maximum JVM heap in bytes
+        :param gc_threads: Number of parallel GC threads of the JVM
+        :param processors: Number of processors the JVM sizes its thread pools for
+        :param address_space: Address space rlimit in bytes, which has to leave room for
+        the heap, metaspace and code cache the JVM reserves
+        :param cpu_time: CPU time rlimit in seconds
+        :param cores: CPU cores the processes are pinned to
+        """
+        self.heap = heap
+        self.gc_threads = gc_threads
+        self.processors = processors
+        self.address_space = address_space
+        self.cpu_time = cpu_time
+        self.cores = cores
+
+    @classmethod
+    def scaled(cls, workers: int, memory: Optional[int] = None, **overrides):
+        """
+        Shares the cores and memory of the machine between concurrent JVMs, giving
+        each a quarter of its memory share as heap, as the JVM takes a quarter of the
+        machine's memory by default. A single JVM without a memory share is left to size
+        itself, as unlike the host's memory and cores its ergonomics respect the limits
+        of a container it runs in
+        :param workers: Number of javac and java processes running at a time
+        :param memory: Memory in bytes of a worker, a share of the physical memory if
+        None
+        :param overrides: Limits to use instead of the scaled ones, None meaning
+        scaled
+        :return: The limits of each process
+        """
+        workers = max(1, workers)
+        limits = {}
+        if workers > 1 or memory is not None:
+            processors = max(1, len(available_cores()) // workers)
+            if memory is None:
+                physical = total_memory()
+                memory = None if physical is None else physical // workers
+            limits = {
+                "heap": None if memory is None else max(MIN_HEAP, memory // 4),
+                "gc_threads": processors,
+                "processors": processors,
+            }
+        limits.update(
+            {name: value for name, value in overrides.items() if value is not None}
+        )
+        return cls(**limits)
+
+    def pinned(self, slot: int, slots: int):
+        """
+        Pins the processes of a worker slot to their share of the cores
+        :param slot: The worker slot, from 0 to slots - 1
+        :param slots: Number of worker slots sharing the cores
+        :return: The limits with the cores of the slot
+        """
+        cores = self.cores or available_cores()
+        share = max(1, len(cores) // max(1, slots))
+        start = (slot * share) % len(cores)
+        return ResourceLimits(
+            self.heap,
+            self.gc_threads,
+            self.processors,
+            self.address_space,
+            self.cpu_time,
+            cores[start : start + share],
+        )
+
+    def without_cpu_time(self):
+        """
+        Drops the CPU time rlimit for a long-lived process, whose CPU time adds up over
+        all the runs it serves
+        :return: The limits without cpu_time
+        """
+        return ResourceLimits(
+            self.heap,
+            self.gc_threads,
+            self.processors,
+            self.address_space,
+            None,
+            self.cores,
+        )
+
+    def jvm_options(self) -> List[str]:
+        """
+        :return: The options bounding a java process
+        """
+        options = []
+        if self.heap is not None:
+            options.append(f"-Xmx{self.heap // (1024 * 1024)}m")
+        if self.gc_threads is not None:
+            options.append(f"-XX:ParallelGCThreads={self.gc_threads}")
+        if self.processors is not None:
+            options.append(f"-XX:ActiveProcessorCount={self.processors}")
+        return options
+
+    def javac_options(self) -> List[str]:
+        """
+        :return: The options bounding the JVM javac runs in
+        """
+        return [f"-J{option}" for option in self.jvm_options()]
+
+    def _apply(self) -> None:
+        """
+        Applies the rlimits and core pinning, run in the child before it executes
+        """
+        if self.address_space is not None:
+            resource.setrlimit(
+                resource.RLIMIT_AS, (self.address_space, self.address_space)
+            )
+        if self.cpu_time is not None:
+            # SIGXCPU at the soft limit, SIGKILL a second later
+            resource.setrlimit(resource.RLIMIT_CPU, (self.cpu_time, self.cpu_time + 1))
+        if self.cores and hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, self.cores)
+
+    def preexec_fn(self) -> Optional[Callable[[], None]]:
+        """
+        :return: The function applying the limits in a child process, None if there
+        is nothing to apply
+        """
+        if self.address_space is None and self.cpu_time is None and not self.cores:
+            return None
+        return self._apply
+
+    def report(self) -> Dict:
+        """
+        :return: The limits as a JSON serialisable dict, unset ones left out
+        """
+        limits = {
+            "heap": self.heap,
+            "gc_threads": self.gc_threads,
+            "processors": self.processors,
+            "address_space": self.address_space,
+            "cpu_time": self.cpu_time,
+            "cores": self.cores,
+        }
+        return {name: value for name, value in limits.items() if value is not None}
@@ -0,0 +1,336 @@
+"""
+ This file is part of wit4java, an execution-based violation-witness validator for Java
+ https://github.com/wit4java/wit4java.
+
+ This module deals with validating many witnesses in an asyncio pipeline, which parses
+ witnesses while javac and java run so that neither the CPUs nor the JVMs sit idle
+"""
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from wit4java.batch import BatchValidator, explain_outcome, fingerprint_assumptions
+from wit4java.cache import ResultCache
+from wit4java.process import run_command_async
+from wit4java.processors import (
+    WitnessProcessor,
+    filter_assumptions,
+    prescreen_assumptions,
+)
+from wit4java.profiling import Profiler, active_profiler, count, phase, profiling
+from wit4java.testharness import TestHarness, write_assumption_tape
+
+
+def _parse_witness(
+    directory, witness_path, json_input, nondet_mappings, benchmark_hash, profile
+) -> Tuple[Tuple, Optional[Dict]]:
+    """
+    Extracts the assumption values of a witness in a worker process
+    :param directory: Scratch directory of the witness
+    :param witness_path: Path to the witness file
+    :param json_input: Interpret the witness input with JSON/YAML format
+    :param nondet_mappings: The nondet mappings of the benchmark
+    :param benchmark_hash: Hash of the benchmark sources, part of the fingerprint
+    :param profile: Profile the parsing
+    :return: The assumption values, their fingerprint and why they do not fit the
+    nondet calls, None if they do, and the profile, if any
+    """
+    profiler = Profiler() if profile else None
+    with profiling(profiler):
+        witness_processor = WitnessProcessor(directory, witness_path, json_input=json_input)
+        witness_processor.preprocess()
+        assumptions = witness_processor.extract_assumptions()
+        with phase("prescreen"):
+            mismatch = prescreen_assumptions(nondet_mappings, assumptions)
+        if mismatch is not None:
+            count("prescreen_mismatches")
+        values = filter_assumptions(nondet_mappings, assumptions)
+        result = values, fingerprint_assumptions(benchmark_hash, values), mismatch
+    return result, None if profiler is None else profiler.report()
+
+
+class Pipeline:
+    """
+    The class Pipeline validates witnesses of any number of benchmarks concurrently.
+    Benchmarks are prepared in a thread and witnesses parsed in a process pool of
+    cpu_jobs workers, while at most jvm_jobs javac and java processes run at a time.
+    """
+
+    def __init__(
+        self,
+        executor,
+        cpu_jobs: int,
+        jvm_jobs: int,
+        json_input=False,
+        directory: Optional[str] = None,
+        pin_cores=False,
+        **validator_options,
+    ):
+        """
+        :param executor: The process pool parsing the witnesses
+        :param cpu_jobs: Number of witnesses parsed concurrently
+        :param jvm_jobs: Number of javac and java processes run concurrently
+        :param json_input: Interpret the witness input with JSON/YAML format
+        :param directory: Working directory of the only benchmark, temporary ones are
+        created and removed if None
+        :param pin_cores: Pin each concurrent javac and java process to its share of the
+        cores
+        :param validator_options: Caches and workspace options of the BatchValidators
+        """
+        self.executor = executor
+        self.json_input = json_input
+        self.directory = directory
+        self.validator_options = validator_options
+        self.compilation_cache = validator_options.get("compilation_cache")
+        self.result_cache = validator_options.get("result_cache")
+        self.resource_limits = validator_options.get("resource_limits")
+        self.pin_cores = pin_cores
+        self.jvm_jobs = jvm_jobs
+        self.jvm_slots = asyncio.Semaphore(jvm_jobs)
+        self._free_slots = list(range(jvm_jobs))
+        # Bounds the parsed witnesses waiting for a JVM, and their tapes on disk
+        self.in_flight = asyncio.Semaphore(cpu_jobs + 2 * jvm_jobs)
+        self.validators: Dict[Tuple, BatchValidator] = {}
+        self._prepared: Dict[Tuple, asyncio.Task] = {}
+        self._compiled: Dict[Tuple, asyncio.Task] = {}
+        # Verdicts by assumption fingerprint, the benchmark being part of it
+        self._verdicts: Dict[str, asyncio.Future] = {}
+        self._witnesses = 0
+
+    def _merge(self, report: Optional[Dict]) -> None:
+        profiler = active_profiler()
+        if profiler is not None and report is not None:
+            profiler.merge(report)
+
+    @asynccontextmanager
+    async def _jvm_slot(self):
+        """
+        Waits for one of the jvm_jobs slots
+        :return: The function applying the limits of the slot to a javac or java
+        process, None if there are none
+        """
+        async with self.jvm_slots:
+            slot = self._free_slots.pop()
+            limits = self.resource_limits
+            if limits is not None and self.pin_cores:
+                limits = limits.pinned(slot, self.jvm_jobs)
+            try:
+                yield None if limits is None else limits.preexec_fn()
+            finally:
+                self._free_slots.append(slot)
+
+    def _validator(self, task) -> Tuple:
+        """
+        Looks up the validator of the benchmark of a task, creating it when the
+        benchmark is first seen
+        :return: The key of the benchmark
+        """
+        key = (task["benchmark"], tuple(task["packages"] or []))
+        if key not in self.validators:
+            if self.directory is not None and self.validators:
+                raise ValueError("Only a single benchmark can share a working directory.")
+            validator = BatchValidator(
+                task["benchmark"],
+                task["packages"],
+                self.directory,
+                **self.validator_options,
+            )
+            self.validators[key] = validator
+        return key
+
+    def _start(self, key) -> None:
+        """
+        Starts preparing and compiling a benchmark unless already started, which is
+        only done once one of its witnesses misses the result cache
+        """
+        if key not in self._prepared:
+            validator = self.validators[key]
+            self._prepared[key] = asyncio.ensure_future(self._prepare(validator))
+            self._compiled[key] = asyncio.ensure_future(
+                self._compile(validator, self._prepared[key])
+            )
+
+    @staticmethod
+    async def _prepare(validator: BatchValidator) -> None:
+        # Preparing shares the caches and the profiler with this process
+        await asyncio.get_running_loop().run_in_executor(None, validator.prepare)
+
+    async def _compile(self, validator: BatchValidator, prepared: asyncio.Task) -> None:
+        await prepared
+        harness = validator.test_harness
+        if harness.class_data_archive is not None:
+            # Built once, off the event loop, before the first run needs it
+            await asyncio.get_running_loop().run_in_executor(
+                None, harness.class_data_archive.paths
+            )
+        cache_key = None if self.compilation_cache is None else validator._cache_key()
+        if harness.prepare_test_harness(self.compilation_cache, cache_key):
+            return
+        async with self._jvm_slot() as preexec_fn:
+            with phase("javac"):
+                await run_command_async(
+                    harness.compile_arguments(), preexec_fn=preexec_fn
+                )
+        harness.store_test_harness(self.compilation_cache, cache_key)
+
+    async def validate(self, task) -> str:
+        """
+        Validates the witness of a task
+        :param task: The benchmark, packages and witness to validate
+        :return: The validation result
+        """
+        count("witnesses")
+        key = self._validator(task)
+        validator = self.validators[key]
+        witness_path = task["witness"]
+        result_key = None
+        if self.result_cache is not None:
+            result_key = validator._result_key(witness_path, self.json_input)
+            outcome = self.result_cache.get(result_key)
+            if outcome is not None:
+                return outcome
+        self._start(key)
+        self._witnesses += 1
+        index = self._witnesses
+        async with self.in_flight:
+            await self._prepared[key]
+            parsed, report = await asyncio.get_running_loop().run_in_executor(
+                self.executor,
+                _parse_witness,
+                os.path.join(validator.directory, "witnesses", str(index)),
+                witness_path,
+                self.json_input,
+                validator.nondet_mappings,
+                validator.benchmark_hash(),
+                active_profiler() is not None,
+            )
+            self._merge(report)
+            values, fingerprint, mismatch = parsed
+            outcome = None
+            if fingerprint in self._verdicts:
+                # Another witness with the same assumptions runs or ran the harness
+                outcome = await asyncio.shield(self._verdicts[fingerprint])
+                if outcome in ResultCache.CACHEABLE_OUTCOMES:
+                    count("duplicate_witnesses")
+                else:
+                    outcome = None
+            if outcome is None:
+                verdict = asyncio.get_running_loop().create_future()
+                self._verdicts[fingerprint] = verdict
+                try:
+                    outcome = await self._run(validator, key, index, values)
+                finally:
+                    verdict.set_result(outcome)
+            outcome = explain_outcome(outcome, mismatch)
+        if result_key is not None:
+            self.result_cache.put(result_key, outcome)
+        return outcome
+
+    async def _run(self, validator: BatchValidator, key, index: int, values) -> str:
+        """
+        Runs the harness of a benchmark on the assumption values of a witness
+        :param validator: The validator of the benchmark
+        :param key: The key of the benchmark
+        :param index: The index of the witness, naming its tape
+        :param values: The filtered assumption values of the witness
+        :return: The validation result
+        """
+        tape_path = os.path.join(validator.directory, "tapes", f"{index}.tape")
+        os.makedirs(os.path.dirname(tape_path), exist_ok=True)
+        write_assumption_tape(tape_path, values)
+        await self._compiled[key]
+        harness = validator.test_harness
+        try:
+            async with self._jvm_slot() as preexec_fn:
+                with phase("java"):
+                    out, err, _ = await run_command_async(
+                        harness.run_arguments(tape_path),
+                        harness.timeout,
+                        stop_markers=(
+                            TestHarness.ASSERTION_MARKER,
+                            TestHarness.SPURIOUS_MARKER,
+                        ),
+                        preexec_fn=preexec_fn,
+                    )
+        finally:
+            os.unlink(tape_path)
+        return TestHarness.outcome(out, err)
+
+    async def checked_validate(self, task) -> str:
+        """
+        Validates the witness of a task, reporting errors as the result
+        """
+        try:
+            return await self.validate(task)
+        except Exception as err:
+            return f"wit4java: Could not validate witness ({err})"
+
+    def cleanup(self) -> None:
+        """
+        Removes the working directories created for the benchmarks
+        """
+        for validator in self.validators.values():
+            validator.cleanup()
+
+
+def validate_pipelined(
+    tasks: Iterable[Dict],
+    json_input=False,
+    cpu_jobs: Optional[int] = None,
+    jvm_jobs: Optional[int] = None,
+    directory: Optional[str] = None,
+    pin_cores=False,
+    **validator_options,
+) -> Iterator[Tuple[Dict, str]]:
+    """
+    Validates the witnesses of some tasks in a pipeline, overlapping the parsing of
+    witnesses with the javac and java processes of others
+    :param tasks: The benchmark, packages and witness of each validation
+    :param json_input: Interpret the witness input with JSON/YAML format
+    :param cpu_jobs: Number of witnesses parsed concurrently, defaults to the number
+    of CPUs
+    :param jvm_jobs: Number of javac and java processes run concurrently, defaults to
+    the number of CPUs
+    :param directory: Working directory of the only benchmark, temporary ones are
+    created and removed if None
+    :param pin_cores: Pin each concurrent javac and java process to its share of the
+    cores
+    :param validator_options: Caches and workspace options, see BatchValidator
+    :return: Pairs of task and validation result, in input order as they finish
+    """
+    tasks = list(tasks)
+    cpu_jobs = cpu_jobs or os.cpu_count() or 1
+    jvm_jobs = jvm_jobs or os.cpu_count() or 1
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    pipeline = None
+    try:
+        with ProcessPoolExecutor(cpu_jobs) as executor:
+            pipeline = Pipeline(
+                executor,
+                cpu_jobs,
+                jvm_jobs,
+                json_input,
+                directory,
+                pin_cores,
+                **validator_options,
+            )
+            validations = [
+                loop.create_task(pipeline.checked_validate(task)) for task in tasks
+            ]
+            # The loop only runs while waiting for the next result, the others
+            # progressing meanwhile
+            for task, validation in zip(tasks, validations):
+                yield task, loop.run_until_complete(validation)
+    finally:
+        pending = [task for task in asyncio.all_tasks(loop) if not task.done()]
+        for task in pending:
+            task.cancel()
+        loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        if pipeline is not None:
+            pipeline.cleanup()
+        asyncio.set_event_loop(None)
+        loop.close()
@@ -0,0 +1,219 @@
+"""
+ This file is part of wit4java, an execution-based violation-witness validator for Java
+ https://github.com/wit4java/wit4java.
+
+ This module deals with running javac and java without blocking on their output
+"""
+
+import os
+import selectors
+import signal
+import subprocess
+import time
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from wit4java.profiling import active_profiler, wait_for_process
+
+# Bytes of output kept per stream, the end of the output being the part kept
+MAX_OUTPUT = 1 << 20
+READ_SIZE = 1 << 16
+POLL_INTERVAL = 0.01
+
+
+def _descendants(pid: int) -> List[int]:
+    """
+    Lists the descendants of a process
+    :param pid: The process id
+    :return: The ids of its descendants, empty if /proc is unavailable
+    """
+    children = {}
+    try:
+        pids = [entry for entry in os.listdir("/proc") if entry.isdigit()]
+    except OSError:
+        return []
+    for entry in pids:
+        try:
+            with open(f"/proc/{entry}/stat", "r", encoding="utf-8") as file:
+                stat = file.read()
+        except OSError:
+            continue
+        # Fields after the parenthesised command name, which may contain spaces
+        parent = int(stat[stat.rfind(")") + 2 :].split()[1])
+        children.setdefault(parent, []).append(int(entry))
+    descendants = []
+    pending = [pid]
+    while pending:
+        for child in children.get(pending.pop(), []):
+            descendants.append(child)
+            pending.append(child)
+    return descendants
+
+
+def kill_process_tree(pid: int) -> None:
+    """
+    Kills a process along with every process it started
+    :param pid: The process id
+    """
+    # Collected first so that no orphan is reparented out of reach
+    for process in [pid] + _descendants(pid):
+        try:
+            os.kill(process, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+
+def _has_exited(process) -> bool:
+    """
+    Checks whether a process has exited without reaping it, so that wait_for_process
+    can still collect its resource usage
+    """
+    if hasattr(os, "waitid"):
+        try:
+            return (
+                os.waitid(
+                    os.P_PID, process.pid, os.WEXITED | os.WNOHANG | os.WNOWAIT
+                )
+                is not None
+            )
+        except ChildProcessError:
+            return True
+    return process.poll() is not None
+
+
+def run_command(
+    command: List[str],
+    timeout: Optional[float] = None,
+    stop_markers: Iterable[str] = (),
+    max_output: int = MAX_OUTPUT,
+    preexec_fn: Optional[Callable[[], None]] = None,
+) -> Tuple[str, str, bool]:
+    """
+    Runs a command, draining stdout and stderr concurrently so a chatty process cannot
+    block on a full pipe
+    :param command: List of seperated command to run
+    :param timeout: Seconds after which the process and its children are killed
+    :param stop_markers: Outputs after which the result is known, the process and its
+    children being killed as soon as one of them is printed
+    :param max_output: Bytes of output kept per stream
+    :param preexec_fn: Called in the child before it executes, e.g. to set rlimits
+    :return: stdout and stderr, cut to their last max_output bytes, and whether the
+    process was killed because of the timeout
+    """
+    started = time.perf_counter()
+    deadline = None if timeout is None else started + timeout
+    markers = [marker.encode("utf-8") for marker in stop_markers]
+    # Bytes kept from the previous read in case a marker straddles two reads
+    overlap = max((len(marker) for marker in markers), default=1) - 1
+    timed_out = False
+    stopped = False
+    with subprocess.Popen(
+        command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, preexec_fn=preexec_fn
+    ) as process:
+        captured = {process.stdout: bytearray(), process.stderr: bytearray()}
+        with selectors.DefaultSelector() as selector:
+            for stream in captured:
+                selector.register(stream, selectors.EVENT_READ)
+            while selector.get_map() and not stopped:
+                remaining = None if deadline is None else deadline - time.perf_counter()
+                if remaining is not None and remaining <= 0:
+                    timed_out = True
+                    break
+                for key, _ in selector.select(remaining):
+                    data = os.read(key.fd, READ_SIZE)
+                    if not data:
+                        selector.unregister(key.fileobj)
+                        continue
+                    output = captured[key.fileobj]
+                    searched = output[-overlap:] + data if overlap else data
+                    output += data
+                    if len(output) > max_output:
+                        del output[: len(output) - max_output]
+                    if any(marker in searched for marker in markers):
+                        stopped = True
+        # Both streams are closed, the process is exiting or lingering without output
+        while not (
+            deadline is None or timed_out or stopped or _has_exited(process)
+        ):
+            if time.perf_counter() >= deadline:
+                timed_out = True
+            else:
+                time.sleep(POLL_INTERVAL)
+        if timed_out or stopped:
+            kill_process_tree(process.pid)
+        wait_for_process(process, started)
+    out = captured[process.stdout].decode("utf-8", errors="replace")
+    err = captured[process.stderr].decode("utf-8", errors="replace")
+    return out, err, timed_out
+
+
+async def run_command_async(
+    command: List[str],
+    timeout: Optional[float] = None,
+    stop_markers: Iterable[str] = (),
+    max_output: int = MAX_OUTPUT,
+    preexec_fn: Optional[Callable[[], None]] = None,
+) -> Tuple[str, str, bool]:
+    """
+    Runs a command like run_command, but as a coroutine so that other validations can
+    proceed while it runs
+    :param command: List of seperated command to run
+    :param timeout: Seconds after which the process and its children are killed
+    :param stop_markers: Outputs after which the result is known, the process and its
+    children being killed as soon as one of them is printed
+    :param max_output: Bytes of output kept per stream
+    :param preexec_fn: Called in the child before it executes, e.g. to set rlimits
+    :return: stdout and stderr, cut to their last max_output bytes, and whether the
+    process was killed because of the timeout
+    """
+    # asyncio is slow to import and only the pipeline needs it
+    import asyncio  # pylint: disable=import-outside-toplevel
+
+    started = time.perf_counter()
+    markers = [marker.encode("utf-8") for marker in stop_markers]
+    # Bytes kept from the previous read in case a marker straddles two reads
+    overlap = max((len(marker) for marker in markers), default=1) - 1
+    process = await asyncio.create_subprocess_exec(
+        *command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, preexec_fn=preexec_fn
+    )
+    stopped = asyncio.Event()
+
+    async def drain(stream, output: bytearray) -> None:
+        while True:
+            data = await stream.read(READ_SIZE)
+            if not data:
+                return
+            searched = output[-overlap:] + data if overlap else data
+            output += data
+            if len(output) > max_output:
+                del output[: len(output) - max_output]
+            if any(marker in searched for marker in markers):
+                stopped.set()
+                return
+
+    out, err = bytearray(), bytearray()
+    finished = asyncio.ensure_future(
+        asyncio.gather(drain(process.stdout, out), drain(process.stderr, err), process.wait())
+    )
+    stop = asyncio.ensure_future(stopped.wait())
+    done, _ = await asyncio.wait(
+        {finished, stop}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+    )
+    stop.cancel()
+    timed_out = not done
+    if finished not in done:
+        kill_process_tree(process.pid)
+        finished.cancel()
+        # Collects the cancellation of the drains, the process being killed
+        await asyncio.gather(finished, return_exceptions=True)
+        await process.wait()
+    profiler = active_profiler()
+    if profiler is not None:
+        # The event loop reaps the process, so only its wall time is known
+        profiler.record_process(
+            os.path.basename(command[0]), time.perf_counter() - started
+        )
+    return (
+        out.decode("utf-8", errors="replace"),
+        err.decode("utf-8", errors="replace"),
+        timed_out,
+    )
@@ -6,13 +6,68 @@
 """
 
 import glob
+import hashlib
+import importlib.util
+import json
 from abc import ABC, abstractmethod
 import re
-from distutils.dir_util import copy_tree
 import os
-import networkx as nx
-import yaml
-import javalang
+import posixpath
+import sys
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+from xml.etree import ElementTree
+
+from wit4java.profiling import Profiler, active_profiler, count, phase, profiling
+from wit4java.workspace import populate_workspace
+
+
+def _lazy_import(name):
+    """
+    Imports a module when one of its attributes is first used, so that validations
+    not needing it do not pay for importing it
+    :param name: The module
+    :return: The module, loaded on first use
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+# Only the networkx fallback, YAML witnesses and undecided java sources need these
+nx = _lazy_import("networkx")
+yaml = _lazy_import("yaml")
+javalang = _lazy_import("javalang")
+
+# Uncached files below which a wave of the import closure is scanned in this process,
+# starting a process pool costing more than scanning them
+PARALLEL_SCAN_MIN_FILES = 64
+
+# Identifies the scanner in parse cache keys, bump SCAN_FORMAT when its output changes
+SCAN_FORMAT = 5
+
+
+@lru_cache(maxsize=None)
+def scanner_version() -> bytes:
+    """
+    :return: The prefix of parse cache keys, naming the javalang version and scan format
+    """
+    # importlib.metadata is slow to import, only the parse cache needs it
+    from importlib import metadata  # pylint: disable=import-outside-toplevel
+
+    try:
+        version = metadata.version("javalang")
+    except metadata.PackageNotFoundError:
+        version = "unknown"
+    return f"javalang {version} scan {SCAN_FORMAT}\0".encode("utf-8")
 
 
 class Processor(ABC):
@@ -47,64 +102,452 @@ class Processor(ABC):
         return new_path
 
 
+# Unescaped <...> inside quoted strings of assumptions, e.g. ("List<Integer>")
+MALFORMED_XML = re.compile(r"\(\"(.*)<(.*)>(.*)\"\)")
+MALFORMED_XML_REPLACEMENT = r'("\1&lt;\2&gt;\3")'
+
+
+class GraphMLWitnessReader:
+    """
+    A class streaming the assumption edges out of a GraphML witness in document order,
+    escaping malformed XML on the fly and keeping memory constant in the witness size
+    """
+
+    CHUNK_SIZE = 1 << 16
+    GRAPHML_TYPES = {
+        "int": int,
+        "long": int,
+        "integer": int,
+        "float": float,
+        "double": float,
+        "string": str,
+    }
+
+    def __init__(self, witness_path):
+        """
+        :param witness_path: Path to the GraphML witness
+        """
+        self.witness_path = witness_path
+        self.graph_data = {}
+        self._keys = {}
+
+    @staticmethod
+    def _tag(element) -> str:
+        return element.tag.rsplit("}", 1)[-1]
+
+    def _register_key(self, element) -> None:
+        """
+        Records the attribute name and type of a GraphML key declaration
+        """
+        name = element.get("attr.name")
+        if name is None:
+            raise ValueError(f"Unknown key for id {element.get('id')}.")
+        self._keys[element.get("id")] = (name, element.get("attr.type", "string"))
+
+    def _decode_data(self, data_element, data) -> None:
+        """
+        Decodes a data element into a dictionary of attributes like networkx does
+        :param data_element: The GraphML data element
+        :param data: The attributes of the enclosing node, edge or graph
+        """
+        if data_element.text is None or self._tag(data_element) != "data":
+            return
+        key = data_element.get("key")
+        if key not in self._keys:
+            raise ValueError(f"Bad GraphML data: no key {key}")
+        name, data_type = self._keys[key]
+        if data_type == "boolean":
+            data[name] = data_element.text.lower() == "true"
+        else:
+            data[name] = self.GRAPHML_TYPES.get(data_type, str)(data_element.text)
+
+    def __iter__(self) -> Iterator[Dict]:
+        """
+        Yields the data of every edge with an assumption scope
+        """
+        parser = ElementTree.XMLPullParser(events=("start", "end"))
+        # Only the root and graph elements are kept open, deeper ones are decoded
+        # when their enclosing edge ends
+        depth = 0
+        parents = []
+        with open(self.witness_path, "r", encoding="utf-8") as file:
+            while True:
+                lines = file.readlines(self.CHUNK_SIZE)
+                if not lines:
+                    break
+                # Lines are escaped independently, matching the whole-file regex
+                # which cannot span lines either
+                parser.feed(
+                    "".join(
+                        MALFORMED_XML.sub(MALFORMED_XML_REPLACEMENT, line)
+                        if '("' in line
+                        else line
+                        for line in lines
+                    )
+                )
+                for event, element in parser.read_events():
+                    if event == "start":
+                        depth += 1
+                        if depth <= 2:
+                            parents.append(element)
+                        continue
+                    depth -= 1
+                    if depth > 2:
+                        continue
+                    tag = self._tag(element)
+                    if tag == "edge":
+                        data = {}
+                        for data_element in element:
+                            self._decode_data(data_element, data)
+                        if "assumption.scope" in data:
+                            yield data
+                    elif tag == "key":
+                        self._register_key(element)
+                    elif tag == "data" and depth == 2:
+                        # Graph data such as the producer comes before the edges
+                        self._decode_data(element, self.graph_data)
+                    if depth < len(parents):
+                        # Drop finished elements so the tree never grows
+                        del parents[depth:]
+                    if parents:
+                        del parents[-1][:]
+            parser.close()
+
+
+class YAMLWitnessReader:
+    """
+    A class streaming the assumption waypoints out of a YAML or JSON witness 2.0,
+    composing one segment at a time
+    """
+
+    ASSUMPTION_TYPES = ("assumption", "function_return")
+
+    def __init__(self, witness_path, json_input=False):
+        """
+        :param witness_path: Path to the YAML or JSON witness
+        :param json_input: The witness is JSON, which is loaded at once by the json module
+        """
+        self.witness_path = witness_path
+        self.json_input = json_input
+        self.metadata = {}
+
+    def _compose(self, event, events):
+        """
+        Composes the value starting at an event, keeping scalars as strings
+        :param event: The first event of the value
+        :param events: The remaining parser events
+        :return: The composed value
+        """
+        if isinstance(event, yaml.ScalarEvent):
+            return event.value
+        if isinstance(event, yaml.SequenceStartEvent):
+            items = []
+            for item_event in events:
+                if isinstance(item_event, yaml.SequenceEndEvent):
+                    break
+                items.append(self._compose(item_event, events))
+            return items
+        if isinstance(event, yaml.MappingStartEvent):
+            mapping = {}
+            for key_event in events:
+                if isinstance(key_event, yaml.MappingEndEvent):
+                    break
+                key = self._compose(key_event, events)
+                mapping[key] = self._compose(next(events), events)
+            return mapping
+        # Aliases are not used by witnesses
+        return None
+
+    def _stream_entries(self, file) -> Iterator[tuple]:
+        """
+        Streams the (key, value) pairs of the witness entries, leaving each content
+        list as an iterator of its items
+        """
+        # The libyaml bindings are much faster than the pure Python parser
+        loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+        events = yaml.parse(file, Loader=loader)
+        for event in events:
+            if isinstance(event, yaml.SequenceStartEvent):
+                break
+        else:
+            return
+        for event in events:
+            if isinstance(event, yaml.SequenceEndEvent):
+                break
+            if not isinstance(event, yaml.MappingStartEvent):
+                self._compose(event, events)
+                continue
+            for key_event in events:
+                if isinstance(key_event, yaml.MappingEndEvent):
+                    break
+                key = self._compose(key_event, events)
+                value_event = next(events)
+                if key == "content" and isinstance(value_event, yaml.SequenceStartEvent):
+                    yield key, self._stream_items(events)
+                else:
+                    yield key, self._compose(value_event, events)
+
+    def _stream_items(self, events) -> Iterator:
+        for event in events:
+            if isinstance(event, yaml.SequenceEndEvent):
+                return
+            yield self._compose(event, events)
+
+    @staticmethod
+    def _load_entries(file) -> Iterator[tuple]:
+        document = json.load(file)
+        for entry in document if isinstance(document, list) else [document]:
+            if isinstance(entry, dict):
+                yield from entry.items()
+
+    def __iter__(self) -> Iterator[Dict]:
+        """
+        Yields every assumption or function return waypoint
+        """
+        with open(self.witness_path, "r", encoding="utf-8") as file:
+            entries = (
+                self._load_entries(file)
+                if self.json_input
+                else self._stream_entries(file)
+            )
+            for key, value in entries:
+                if key == "metadata" and isinstance(value, dict):
+                    self.metadata = value
+                if key != "content":
+                    continue
+                for item in value:
+                    segment = item.get("segment") if isinstance(item, dict) else None
+                    for waypoint in segment or []:
+                        waypoint = waypoint.get("waypoint", {})
+                        if waypoint.get("type") in self.ASSUMPTION_TYPES:
+                            yield waypoint
+
+    @property
+    def producer(self):
+        """
+        :return: The name of the verifier that produced the witness, if given
+        """
+        producer = self.metadata.get("producer")
+        return producer.get("name") if isinstance(producer, dict) else producer
+
+
+def detect_witness_format(witness_path) -> str:
+    """
+    Guesses the format of a witness from its first significant character
+    :param witness_path: Path to the witness
+    :return: One of "graphml", "json" and "yaml"
+    """
+    with open(witness_path, "r", encoding="utf-8") as file:
+        for line in file:
+            stripped = line.lstrip("\ufeff").strip()
+            if not stripped or stripped.startswith("#"):
+                continue
+            if stripped.startswith("<"):
+                return "graphml"
+            if stripped.startswith(("[", "{")):
+                return "json"
+            return "yaml"
+    return "graphml"
+
+
+# Assumption edges processed together, one batch per producer
+ASSUMPTION_BATCH_SIZE = 4096
+
+
+class AssumptionExtractor:
+    """
+    A class extracting the values out of witness assumptions. Plain literal
+    assignments such as `x = 123;`, the bulk of large witnesses, take a fast path
+    that gives the same value as the general regular expression. The patterns are
+    compiled once per producer.
+    """
+
+    # Should not bias for GDart in SVCOMP.
+    # if self.producer == 'GDart':
+    #     regex = r"= (-?\d*\.?\d+|false|true)|\w+\.equals\(\"(.*)\"\)|\w+\.parseDouble\(\"(" \
+    #             r".*)\"\)|\w+\.parseFloat\(\"(.*)\"\)"
+    # else:
+    #     regex = r"= ((\S+)|(-?\d*\.?\d+[L]?)|(false|true|null))"
+    ASSUMPTION_REGEX = r"= (-?\d*\.?\d+[L]?|false|true|null|\S+)|\w+\.equals\(\"(.*)\"\)|\w+\.parseDouble\(\"(.*)\"\)|\w+\.parseFloat\(\"(.*)\"\)"
+    # What follows the first "= " of a plain literal assignment
+    LITERAL = re.compile(r"(-?\d+L?|true|false|null);?")
+    # Producers whose null values are the string "null" rather than a null reference
+    NULL_STRING_PRODUCERS = frozenset(["GDart"])
+
+    def __init__(self, producer=None, regex=ASSUMPTION_REGEX, literal_path=True):
+        """
+        :param producer: The producer of the witnesses
+        :param regex: The regular expression used to extract the values
+        :param literal_path: Take the fast path for plain literal assignments
+        """
+        self.producer = producer
+        self.assignment = re.compile(regex)
+        # In case the nondet comes from a function return and is not assigned to a
+        # variable, the "= " of the regex being removed
+        self.expression = re.compile(regex[2:])
+        self.literal_path = literal_path
+        self.null_string = producer in self.NULL_STRING_PRODUCERS
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def for_producer(producer):
+        """
+        :param producer: The producer of the witnesses
+        :return: The extractor of the producer, created on first use
+        """
+        return AssumptionExtractor(producer)
+
+    def extract(self, assumption: str) -> Optional[str]:
+        """
+        Extracts an assumption value
+        :param assumption: The string containing the variable assignment to have value extracted
+        :return: The extracted assumption value or None if not there
+        """
+        if self.literal_path:
+            prefix, separator, rest = assumption.partition("= ")
+            # Without a dot before it, the first "= " is where the regex matches
+            if separator and "." not in prefix:
+                literal = self.LITERAL.fullmatch(rest)
+                if literal is not None:
+                    return literal.group(1)
+        search_result = self.assignment.search(assumption)
+        if search_result is None:
+            search_result = self.expression.search(assumption)
+            if search_result is None:
+                return None
+        matches = [sr for sr in search_result.groups() if sr is not None]
+        # Match the last capture group if multiple matches
+        assumption_value = matches[-1]
+        # Strip trailing semi colon if has been missed by regex
+        if assumption_value.endswith(";"):
+            assumption_value = assumption_value[:-1]
+        if assumption_value == "Double.NaN":
+            assumption_value = "NaN"
+        return assumption_value
+
+    def extract_batch(self, assumptions: List[Tuple]) -> List[Tuple]:
+        """
+        Extracts the values of a batch of assumptions
+        :param assumptions: Pairs of position and assumption string
+        :return: Pairs of position and value, None standing for null, leaving out the
+        assumptions without a value
+        """
+        extract = self.extract
+        null_string = self.null_string
+        values = []
+        for position, assumption in assumptions:
+            assumption_value = extract(assumption)
+            if assumption_value is not None:
+                if assumption_value == "null" and not null_string:
+                    assumption_value = None
+                values.append((position, assumption_value))
+        return values
+
+
 class WitnessProcessor(Processor):
     """
     A class representing the witness processor
     """
 
-    def __init__(self, working_dir, witness_path, json_input=False):
+    def __init__(self, working_dir, witness_path, json_input=False, streaming=True):
         super().__init__(working_dir)
         self.producer = None
         self.witness_path = witness_path
         self.json_input = json_input
+        self.streaming = streaming
 
     def preprocess(self) -> None:
         """
-        Preprocess the witness to avoid any unformatted XML
+        Preprocess the witness to avoid any unformatted XML. The streaming reader
+        escapes it on the fly, only the networkx reader needs a cleaned copy
+        """
+        if not self.streaming:
+            with phase("witness_preprocess"):
+                self._clean_witness()
+
+    def _clean_witness(self) -> None:
+        """
+        Writes a copy of the witness with malformed XML strings escaped, if there are any
         """
         with open(self.witness_path, "r", encoding="utf-8") as file:
             data = file.read()
         # Check for malformed XML strings
-        cleaned_data = re.sub(r"\(\"(.*)<(.*)>(.*)\"\)", r'("\1&lt;\2&gt;\3")', data)
+        cleaned_data = MALFORMED_XML.sub(MALFORMED_XML_REPLACEMENT, data)
         if cleaned_data != data:
             path = "cleaned_witness.grapmhl"
             self.witness_path = self.write_to_working_dir(path, cleaned_data)
 
     @staticmethod
-    def _extract_value_from_assumption(assumption, regex):
+    def _program_name(program) -> str:
         """
-        Extracts an assumption value using a regex
-        :param assumption: The string containing the variable assignment to have value extracted
-        :param regex: The regular expression used to extract the value
-        :return: The extracted assumption value or None if not there
+        :param program: The path of a java file
+        :return: The name of the class defined by the file
         """
-        search_result = re.search(regex, assumption)
-        if search_result is not None:
-            matches = [sr for sr in search_result.groups() if sr is not None]
-            # Match the last capture group if multiple matches
-            assumption_value = matches[-1]
-        else:
-            # Check to see if it is because nondet comes from a function return
-            # and in which case it is not assigned to a variable so remove = match from regex
-            regex = regex[2:]
-            search_result = re.search(regex, assumption)
-            if search_result is not None:
-                matches = [sr for sr in search_result.groups() if sr is not None]
-                # Match the last capture group if multiple matches
-                assumption_value = matches[-1]
-            else:
-                assumption_value = None
-        # Strip trailing semi colon if has been missed by regex
-        if assumption_value.endswith(";"):
-            assumption_value = assumption_value[:-1]
-        # TODO Extract into new parser class and have methods handling specific edge values
-        if assumption_value == "Double.NaN":
-            assumption_value = "NaN"
-        return assumption_value
+        return program[program.rfind("/") + 1 : program.find(".java")]
 
-    def extract_assumptions(self):
+    def _extract_batched(self, assumptions: Iterator[Tuple]) -> List[Tuple]:
         """
-        Extracts the assumptions from the witness
+        Extracts the values of assumptions in batches, each batch with the extractor
+        of the producer of its assumptions
+        :param assumptions: Pairs of position and assumption string, self.producer
+        being the producer of the last one yielded
+        :return: Pairs of position and value
+        """
+        values = []
+        batch = []
+        producer = None
+        for assumption in assumptions:
+            if self.producer != producer or len(batch) >= ASSUMPTION_BATCH_SIZE:
+                if batch:
+                    values += AssumptionExtractor.for_producer(producer).extract_batch(
+                        batch
+                    )
+                    batch = []
+                producer = self.producer
+            batch.append(assumption)
+        if batch:
+            values += AssumptionExtractor.for_producer(producer).extract_batch(batch)
+        return values
+
+    def _waypoint_assumptions(self, reader) -> Iterator[Tuple]:
+        """
+        Streams the positions and constraints of the assumption waypoints
+        """
+        for waypoint in reader:
+            self.producer = reader.producer
+            location = waypoint.get("location", {})
+            constraint = waypoint.get("constraint", {})
+            if "file_name" not in location or "value" not in constraint:
+                continue
+            position = (
+                self._program_name(location["file_name"]),
+                int(location["line"]),
+            )
+            yield position, str(constraint["value"])
+
+    def _extract_waypoint_assumptions(self, json_input):
+        """
+        Extracts the assumptions from a YAML or JSON witness 2.0
+        :param json_input: The witness is JSON rather than YAML
+        """
+        reader = YAMLWitnessReader(self.witness_path, json_input=json_input)
+        try:
+            return self._extract_batched(self._waypoint_assumptions(reader))
+        except (yaml.YAMLError, json.JSONDecodeError) as exc:
+            raise ValueError("Witness file is not formatted correctly.") from exc
+
+    def _stream_assumption_edges(self) -> Iterator[Dict]:
+        """
+        Streams the data of the assumption edges without building a graph
+        """
+        reader = GraphMLWitnessReader(self.witness_path)
+        for data in reader:
+            self.producer = reader.graph_data.get("producer")
+            yield data
+
+    def _read_assumption_edges(self) -> Iterator[Dict]:
+        """
+        Reads the data of the assumption edges through a networkx graph
         """
         try:
             witness_file = nx.read_graphml(self.witness_path)
@@ -114,51 +557,142 @@ class WitnessProcessor(Processor):
         self.producer = (
             witness_file.graph["producer"] if "producer" in witness_file.graph else None
         )
-        assumptions = []
-        # Should not bias for GDart in SVCOMP.
-        # if self.producer == 'GDart':
-        #     regex = r"= (-?\d*\.?\d+|false|true)|\w+\.equals\(\"(.*)\"\)|\w+\.parseDouble\(\"(" \
-        #             r".*)\"\)|\w+\.parseFloat\(\"(.*)\"\)"
-        # else:
-        #     regex = r"= ((\S+)|(-?\d*\.?\d+[L]?)|(false|true|null))"
-        regex = r"= (-?\d*\.?\d+[L]?|false|true|null|\S+)|\w+\.equals\(\"(.*)\"\)|\w+\.parseDouble\(\"(.*)\"\)|\w+\.parseFloat\(\"(.*)\"\)"
         for assumption_edge in filter(
             lambda edge: ("assumption.scope" in edge[2]), witness_file.edges(data=True)
         ):
-            data = assumption_edge[2]
-            program = data["originFileName"]
-            file_name = program[program.rfind("/") + 1 : program.find(".java")]
-            scope = data["assumption.scope"]
-            if file_name not in scope:
-                continue
-            assumption_value = self._extract_value_from_assumption(
-                data["assumption"], regex
-            )
-            if assumption_value is not None:
-                if self.producer != "GDart" and assumption_value == "null":
-                    assumption_value = None
-                assumptions.append(((file_name, data["startline"]), assumption_value))
+            yield assumption_edge[2]
+
+    def extract_assumptions(self):
+        """
+        Extracts the assumptions from the witness
+        """
+        with phase("witness_parsing"):
+            assumptions = self._read_witness_assumptions()
+        count("assumptions", len(assumptions))
         return assumptions
 
+    def _read_witness_assumptions(self):
+        """
+        Extracts the assumptions with the reader matching the witness format
+        """
+        witness_format = detect_witness_format(self.witness_path)
+        if self.json_input or witness_format != "graphml":
+            return self._extract_waypoint_assumptions(witness_format == "json")
+        if self.streaming:
+            try:
+                return self._extract_assumptions(self._stream_assumption_edges())
+            except ElementTree.ParseError:
+                # Fall back to networkx, which reports unreadable witnesses
+                self._clean_witness()
+        with phase("networkx"):
+            return self._extract_assumptions(self._read_assumption_edges())
+
+    def _extract_assumptions(self, assumption_edges):
+        """
+        Extracts the assumptions from the data of the assumption edges
+        :param assumption_edges: The data of each edge with an assumption scope
+        """
+        return self._extract_batched(self._edge_assumptions(assumption_edges))
+
+    def _edge_assumptions(self, assumption_edges) -> Iterator[Tuple]:
+        """
+        Streams the positions and assumptions of the edges in the scope of their file
+        """
+        for data in assumption_edges:
+            file_name = self._program_name(data["originFileName"])
+            if file_name in data["assumption.scope"]:
+                yield (file_name, data["startline"]), data["assumption"]
+
+
+class SourceIndex:
+    """
+    An index of the java files below a directory by the class and package names
+    they are imported as
+    """
+
+    def __init__(self, root, files=None):
+        if files is None:
+            files = glob.glob(os.path.join(root, "**", "*.java"), recursive=True)
+        self.files = files
+        # Slash separated names relative to the root, e.g. util/Helper and util
+        self.classes: Dict[str, List[str]] = {}
+        self.packages: Dict[str, List[str]] = {}
+        for file in files:
+            name = os.path.relpath(file, root)[: -len(".java")].replace(os.sep, "/")
+            self.classes.setdefault(name, []).append(file)
+            self.packages.setdefault(posixpath.dirname(name), []).append(file)
+        self._suffixes = None
+
+    def find_suffix(self, name) -> List[str]:
+        """
+        Finds the files whose path ends with a class name, as benchmarks may keep
+        their sources below some prefix directory
+        :param name: Slash separated class name, e.g. util/Helper
+        :return: The matching files
+        """
+        if self._suffixes is None:
+            self._suffixes = {}
+            for class_name, files in self.classes.items():
+                parts = class_name.split("/")
+                for i in range(len(parts)):
+                    suffix = "/".join(parts[i:])
+                    self._suffixes.setdefault(suffix, []).extend(files)
+        return self._suffixes.get(name, [])
+
+
+@lru_cache(maxsize=32)
+def _package_index(package_path) -> SourceIndex:
+    return SourceIndex(package_path)
+
+
+def package_index(package_path) -> SourceIndex:
+    """
+    Returns the index of a package directory, shared by all the validations of a
+    process that use the same package
+    :param package_path: Path to the package directory
+    :return: The index of the java files in the package
+    """
+    return _package_index(os.path.normpath(package_path))
+
 
 class JavaFileProcessor(Processor):
     """
     A class representing the java files processor
     """
 
-    def __init__(self, working_dir, benchmark_path, package_paths):
+    def __init__(
+        self,
+        working_dir,
+        benchmark_path,
+        package_paths,
+        parse_cache=None,
+        workspace_mode="copy",
+        scan_jobs=None,
+    ):
         super().__init__(working_dir)
         self.benchmark_path = benchmark_path
         self.package_paths = package_paths
+        self.parse_cache = parse_cache
+        self.workspace_mode = workspace_mode
+        # Processes scanning large waves of files, 1 to always scan in this process
+        self.scan_jobs = scan_jobs or os.cpu_count() or 1
         self.source_files = [
             f for f in glob.glob(self.benchmark_path + "/**/*.java", recursive=True)
         ]
+        self.benchmark_index = SourceIndex(self.benchmark_path, self.source_files)
+        self.package_indexes = [
+            package_index(package) for package in self.package_paths or []
+        ]
 
     def preprocess(self):
-        copy_tree(self.benchmark_path, self.working_dir)
-        if self.package_paths:
-            for package in self.package_paths:
-                copy_tree(package, self.working_dir)
+        populate_workspace(self.working_dir, self.source_trees, self.workspace_mode)
+
+    @property
+    def source_trees(self) -> List[str]:
+        """
+        :return: The benchmark directory followed by the package directories
+        """
+        return [self.benchmark_path] + list(self.package_paths or [])
 
     def _check_valid_import(self, import_line):
         check_file = (
@@ -170,70 +704,156 @@ class JavaFileProcessor(Processor):
         )
         if not check_file.startswith("java"):
             # Check in working directory
-            files_exists = [
-                source_f.endswith("{0}.java".format(check_file))
-                for source_f in self.source_files
-            ]
-            if sum(files_exists) > 1:
+            files = self.benchmark_index.find_suffix(check_file)
+            if len(files) > 1:
                 raise ValueError("Multiple classes for {0} given.".format(check_file))
-            if sum(files_exists) == 1:
+            if len(files) == 1:
                 # Return full path of the only existing file definition
-                return [self.source_files[files_exists.index(True)]]
+                return files
 
             # Check in packages
             # Check for wildcard imports
             if check_file.endswith("/*"):
                 wildcard_import = check_file.replace("/*", "")
-                dir_exists = [p.endswith(wildcard_import) for p in self.package_paths]
+                dir_exists = [
+                    p.endswith(wildcard_import) for p in self.package_paths or []
+                ]
                 if sum(dir_exists) == 1:
                     package = self.package_paths[dir_exists.index(True)]
-                    return [
-                        f for f in glob.glob(package + "/**/*.java", recursive=True)
-                    ]
+                    return list(package_index(package).files)
+                files = [
+                    file
+                    for index in [self.benchmark_index] + self.package_indexes
+                    for file in index.packages.get(wildcard_import, [])
+                ]
+                if not files:
+                    raise ValueError(
+                        "No package for {0} given in classpath.".format(check_file)
+                    )
+                return files
 
-            full_paths = [
-                "{0}.java".format(os.path.join(dir, check_file))
-                for dir in self.package_paths
+            files = [
+                file
+                for index in self.package_indexes
+                for file in index.classes.get(check_file, [])
             ]
-            files_exists = [os.path.exists(f_path) for f_path in full_paths]
             # Check there is only one definition for an import file and if so add to stack to check
             # for possible nondet calls
-            if not any(files_exists):
+            if not files:
                 raise ValueError(
                     "No class for {0} given in classpath.".format(check_file)
                 )
-            elif sum(files_exists) > 1:
+            elif len(files) > 1:
                 raise ValueError(
                     "Multiple classes for {0} given in classpath.".format(check_file)
                 )
             else:
                 # Return full path of the only existing file definition
-                return [full_paths[files_exists.index(True)]]
+                return files
         return []
 
+    def _scan_files(self, filenames: List[str], executor_holder: List) -> List[Dict]:
+        """
+        Scans java files, reusing the cached scans of identical contents. Enough
+        uncached files are scanned in a process pool, fewer ones in this process.
+        :param filenames: Paths of the java files
+        :param executor_holder: Holds the process pool once one was started, so that
+        the waves of a closure share it
+        :return: The scan results as returned by scan_java_source, in order
+        """
+        scans = [None] * len(filenames)
+        misses = []
+        for index, filename in enumerate(filenames):
+            with open(filename, "r", encoding="utf-8") as file:
+                data = file.read()
+            count("files_scanned")
+            key = None
+            if self.parse_cache is not None:
+                key = hashlib.sha256(scanner_version() + data.encode("utf-8")).hexdigest()
+                scans[index] = self.parse_cache.get(key)
+            if scans[index] is None:
+                misses.append((index, key, data))
+        if len(misses) >= PARALLEL_SCAN_MIN_FILES and self.scan_jobs > 1:
+            if not executor_holder:
+                # pylint: disable=import-outside-toplevel
+                # multiprocessing is slow to import and small benchmarks do not need it
+                from concurrent.futures import ProcessPoolExecutor
+
+                executor_holder.append(ProcessPoolExecutor(self.scan_jobs))
+            profiler = active_profiler()
+            results = executor_holder[0].map(
+                _scan_in_worker,
+                [data for _, _, data in misses],
+                [profiler is not None] * len(misses),
+                chunksize=max(1, len(misses) // (4 * self.scan_jobs)),
+            )
+            for (index, _, _), (scan, report) in zip(misses, results):
+                if profiler is not None:
+                    profiler.merge(report)
+                scans[index] = scan
+        else:
+            for index, _, data in misses:
+                scans[index] = scan_java_source(data)
+        if self.parse_cache is not None:
+            for index, key, _ in misses:
+                self.parse_cache.put(key, scans[index])
+        return scans
+
+    def _scan_closure(self) -> Tuple[Dict[str, Dict], Dict[str, List[str]]]:
+        """
+        Scans the benchmark files and, in waves, the files they import until no new
+        file is imported
+        :return: The scan of each reached file, the imports resolved by the scans
+        """
+        scans = {}
+        resolved = {}
+        wave = [f for f in dict.fromkeys(self.source_files) if not _is_verifier(f)]
+        seen = set(wave)
+        executor_holder = []
+        try:
+            while wave:
+                with phase("scan_wave"):
+                    wave_scans = self._scan_files(wave, executor_holder)
+                next_wave = []
+                for filename, scan in zip(wave, wave_scans):
+                    scans[filename] = scan
+                    for import_path in scan["imports"]:
+                        if import_path not in resolved:
+                            resolved[import_path] = self._check_valid_import(
+                                import_path
+                            )
+                        for file in resolved[import_path]:
+                            if file is not None and file not in seen:
+                                seen.add(file)
+                                if not _is_verifier(file):
+                                    next_wave.append(file)
+                wave = next_wave
+        finally:
+            for executor in executor_holder:
+                executor.shutdown()
+        return scans, resolved
+
     def extract_nondet_mappings(self):
         types_map = {}
         nondet_functions_map = {}
         extraction_stack = dict.fromkeys(self.source_files, 0)
         finished_set = {}
+        # The files are scanned up front, possibly in parallel, and merged in the
+        # order of the serial walk below, which the mappings depend on
+        scans, resolved = self._scan_closure()
 
         while len(extraction_stack) > 0:
             filename, _ = extraction_stack.popitem()
             finished_set[filename] = 0
-            program_name = filename[filename.rfind("/") + 1 : filename.find(".java")]
-            with open(filename, "r", encoding="utf-8") as file:
-                data = file.read()
+            program_name = _program_name(filename)
             # Dont need to check the Verifier class
             # TODO: Change Tool definition to not pass it
             if program_name == "Verifier":
                 continue
-            try:
-                tree = javalang.parse.parse(data)
-            except javalang.parser.JavaSyntaxError as err:
-                print(err)
-                tree = []
-            for import_node in tree.imports:
-                files = self._check_valid_import(import_node.path)
+            scan = scans[filename]
+            count("imports_resolved", len(scan["imports"]))
+            for import_path in scan["imports"]:
+                files = resolved[import_path]
                 for file in files:
                     if (
                         file is not None
@@ -242,37 +862,401 @@ class JavaFileProcessor(Processor):
                     ):
                         extraction_stack[file] = 0
             # Look for nondet Calls
-            for _, node in tree.filter(javalang.tree.MethodInvocation):
-                if (
-                    node is not None
-                    and node.qualifier is not None
-                    and "Verifier" in node.qualifier
-                ):
-                    nondet_type = node.member.replace("nondet", "")
-                    types_map[(program_name, node.position.line)] = nondet_type.lower()
+            for line, nondet_type in scan["nondet_calls"]:
+                _map_type(types_map, (program_name, line), nondet_type)
             # Check if any nondet calls are from returns from methods
-            for _, node in tree.filter(javalang.tree.MethodDeclaration):
-                if node.body is None or len(node.body) == 0:
-                    continue
-                statement = node.body[0]
-                if (
-                    type(statement) == javalang.tree.ReturnStatement
-                    and (program_name, statement.position.line) in types_map
-                ):
-                    nondet_functions_map[node.name] = (
-                        program_name,
-                        statement.position.line,
-                    )
+            for method_name, line in scan["returns"]:
+                if (program_name, line) in types_map:
+                    nondet_functions_map[method_name] = (program_name, line)
 
             # Add any nondet returning functions to list of nondet function calls
-            for _, node in tree.filter(javalang.tree.MethodInvocation):
-                if node is not None and node.member in nondet_functions_map:
-                    position = nondet_functions_map[node.member]
-                    types_map[(program_name, node.position.line)] = types_map[position]
+            for member, line in scan["invocations"]:
+                if member in nondet_functions_map:
+                    position = nondet_functions_map[member]
+                    _map_type(types_map, (program_name, line), types_map[position])
 
         return types_map
 
 
+def _map_type(types_map, position, nondet_type) -> None:
+    """
+    Maps a position to the type of a nondet call at it, a line with nondet calls of
+    different types, e.g. `int x = Verifier.nondetInt(); boolean b = ...`, being mapped
+    to None as the witness does not tell which of them an assumption is for
+    :param types_map: A mapping from a position of a nondet call to its type
+    :param position: The position of the call
+    :param nondet_type: The type of the call, None if unknown
+    """
+    if position in types_map and types_map[position] != nondet_type:
+        nondet_type = None
+    types_map[position] = nondet_type
+
+
+def _program_name(filename) -> str:
+    """
+    :return: The class name of a java file as the nondet mappings name it
+    """
+    return filename[filename.rfind("/") + 1 : filename.find(".java")]
+
+
+def _is_verifier(filename) -> bool:
+    return _program_name(filename) == "Verifier"
+
+
+def _scan_in_worker(data, profile) -> Tuple[Dict, Optional[Dict]]:
+    """
+    Scans a java source in a worker process of the scan pool
+    :param data: The contents of a java file
+    :param profile: Profile the scan
+    :return: The scan result and the profile, if any
+    """
+    profiler = Profiler() if profile else None
+    with profiling(profiler):
+        scan = scan_java_source(data)
+    return scan, None if profiler is None else profiler.report()
+
+
+JAVA_KEYWORDS = frozenset(
+    """abstract assert boolean break byte case catch char class const continue default
+    do double else enum extends final finally float for goto if implements import
+    instanceof int interface long native new package private protected public return
+    short static strictfp super switch synchronized this throw throws transient try
+    void volatile while true false null""".split()
+)
+# Keywords that may end the result type of a method declaration
+JAVA_RESULT_TYPES = frozenset("boolean byte char double float int long short void".split())
+JAVA_MODIFIERS = frozenset(
+    """abstract default final native private protected public static strictfp
+    synchronized transient volatile""".split()
+)
+
+# Comments and whitespace are skipped, literals are kept opaque. A lone quote or an
+# unterminated comment is left to the full parser to report.
+JAVA_TOKEN = re.compile(
+    r"""
+    (?P<skip>\s+|//[^\n]*|/\*.*?\*/)
+    |(?P<literal>\"\"\"[\s\S]*?(?<!\\)\"\"\"|"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*'
+        |(?:\d|\.\d)(?:[eEpP][+-]|[\w.])*)
+    |(?P<word>(?:[^\W\d]|\$)(?:[\w$])*)
+    |(?P<bad>/\*|["'\\])
+    |(?P<operator>>>>=|<<=|>>=|>>>|::|->|\.\.\.|\+\+|--|&&|\|\||<<|>>|[<>=!+\-*/&|^%]=|\S)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+
+def _tokenize_java(data):
+    """
+    Splits a java source into words, literals and operators with their lines
+    :param data: The contents of a java file
+    :return: The token values, kinds and lines, None if the source cannot be lexed
+    """
+    values, kinds, lines = [], [], []
+    line = 1
+    position = 0
+    for match in JAVA_TOKEN.finditer(data):
+        kind = match.lastgroup
+        if kind == "skip":
+            continue
+        if kind == "bad":
+            return None
+        start = match.start()
+        line += data.count("\n", position, start)
+        position = start
+        values.append(match.group())
+        kinds.append(kind)
+        lines.append(line)
+    return values, kinds, lines
+
+
+def _matching_angle(values, kinds, index) -> Optional[int]:
+    """
+    Finds the < that the > at an index closes, if the tokens between them can be types
+    :param values: The token values
+    :param kinds: The token kinds
+    :param index: Index of the > token
+    :return: Index of the matching <, None if there is none
+    """
+    depth = 0
+    while index >= 0:
+        value = values[index]
+        if value in (">", ">>", ">>>"):
+            depth += len(value)
+        elif value == "<":
+            depth -= 1
+            if depth == 0:
+                return index
+        elif kinds[index] != "word" and value not in (".", ",", "?", "[", "]", "&"):
+            return None
+        index -= 1
+    return None
+
+
+def _closes_type_arguments(values, kinds, index) -> bool:
+    """
+    Checks whether the > at an index closes type arguments rather than comparing
+    :param values: The token values
+    :param kinds: The token kinds
+    :param index: Index of the > token
+    :return: True if a matching < precedes it within a type
+    """
+    start = _matching_angle(values, kinds, index)
+    return start is not None and start > 0 and kinds[start - 1] == "word"
+
+
+def _qualified_start(values, kinds, index) -> int:
+    """
+    :return: Index of the first word of the qualified name ending at an index
+    """
+    while index >= 2 and values[index - 1] == "." and kinds[index - 2] == "word":
+        index -= 2
+    return index
+
+
+def _starts_declaration(values, kinds, index) -> bool:
+    """
+    Checks whether a type begins a declaration, being preceded by the end of a member
+    or statement, a modifier, an annotation or type parameters, rather than an
+    expression, as in z = a < b & c > g()
+    :param values: The token values
+    :param kinds: The token kinds
+    :param index: Index of the first token of the type
+    :return: True if nothing but a declaration can start there
+    """
+    if index == 0:
+        return True
+    previous = values[index - 1]
+    if previous in ("{", "}", ";") or previous in JAVA_MODIFIERS:
+        return True
+    if previous in (">", ">>", ">>>"):
+        start = _matching_angle(values, kinds, index - 1)
+        return start is not None and _starts_declaration(values, kinds, start)
+    if previous == ")":
+        # The arguments of an annotation
+        depth = 0
+        index -= 1
+        while index >= 0:
+            if values[index] == ")":
+                depth += 1
+            elif values[index] == "(":
+                depth -= 1
+                if depth == 0:
+                    break
+            index -= 1
+        if index < 1 or kinds[index - 1] != "word":
+            return False
+    elif kinds[index - 1] != "word" or previous in JAVA_KEYWORDS:
+        return False
+    start = _qualified_start(values, kinds, index - 1)
+    return start > 0 and values[start - 1] == "@"
+
+
+def _scan_java_tokens(data) -> Optional[Dict]:
+    """
+    Extracts the same information as scan_java_source from the tokens of a java source,
+    without building a syntax tree
+    :param data: The contents of a java file
+    :return: The scan result, None if the tokens alone cannot decide it
+    """
+    tokens = _tokenize_java(data)
+    if tokens is None:
+        return None
+    values, kinds, lines = tokens
+    count = len(values)
+
+    # Matching parentheses, an unbalanced source is left to the parser
+    closing = {}
+    open_parentheses = []
+    for index, value in enumerate(values):
+        if value == "(":
+            open_parentheses.append(index)
+        elif value == ")":
+            if not open_parentheses:
+                return None
+            closing[open_parentheses.pop()] = index
+    if open_parentheses:
+        return None
+
+    imports = []
+    nondet_calls = []
+    returns = []
+    invocations = []
+    braces = 0
+    parentheses = 0
+    # Brace and parenthesis depths of enum bodies whose constants are being listed
+    enum_constants = []
+    in_enum = False
+    index = 0
+    while index < count:
+        value = values[index]
+        if kinds[index] != "word":
+            if value == "(":
+                parentheses += 1
+            elif value == ")":
+                parentheses -= 1
+            elif value == "{":
+                braces += 1
+                if in_enum:
+                    enum_constants.append((braces, parentheses))
+                    in_enum = False
+            elif value == "}":
+                if enum_constants and enum_constants[-1][0] == braces:
+                    enum_constants.pop()
+                braces -= 1
+            elif value == ";":
+                if enum_constants and enum_constants[-1] == (braces, parentheses):
+                    enum_constants.pop()
+            elif value == "." and index + 1 < count and values[index + 1] == "<":
+                # Explicit type arguments of an invocation
+                return None
+            index += 1
+            continue
+
+        if value == "import" and braces == 0:
+            end = index + 1
+            while end < count and values[end] != ";":
+                end += 1
+            imports.append("".join(v for v in values[index + 1 : end] if v != "static"))
+            index = end + 1
+            continue
+        if value == "enum":
+            in_enum = True
+        if value in JAVA_KEYWORDS or index + 1 == count or values[index + 1] != "(":
+            index += 1
+            continue
+
+        # A name followed by arguments or parameters
+        previous = values[index - 1] if index > 0 else ""
+        after = closing[index + 1] + 1
+        while after + 1 < count and values[after] == "[" and values[after + 1] == "]":
+            after += 2
+        declaration = (
+            index > 0
+            and kinds[index - 1] == "word"
+            and (previous not in JAVA_KEYWORDS or previous in JAVA_RESULT_TYPES)
+            or previous == "]"
+            or previous in (">", ">>", ">>>")
+            and _closes_type_arguments(values, kinds, index - 1)
+        )
+        if declaration and previous in (">", ">>", ">>>"):
+            result_type = _qualified_start(
+                values, kinds, _matching_angle(values, kinds, index - 1) - 1
+            )
+            if not _starts_declaration(values, kinds, result_type):
+                # Within an expression, e.g. z = a < b & c > g(), only a parse
+                # tells type arguments from comparisons
+                return None
+        if after < count and values[after] in ("{", "throws") and previous != "new":
+            if declaration:
+                while after < count and values[after] not in ("{", ";"):
+                    after += 1
+                if after + 2 < count and values[after + 2] == ":":
+                    # A labeled first statement, which may be a return
+                    return None
+                if after + 1 < count and values[after + 1] == "return":
+                    returns.append((value, lines[after + 1]))
+            index += 1
+            continue
+        if declaration or enum_constants and enum_constants[-1] == (
+            braces,
+            parentheses,
+        ):
+            index += 1
+            continue
+
+        start = index
+        while (
+            start >= 2
+            and values[start - 1] == "."
+            and kinds[start - 2] == "word"
+            and values[start - 2] not in JAVA_KEYWORDS
+        ):
+            start -= 2
+        before = values[start - 1] if start > 0 else ""
+        if before in ("new", "@"):
+            index += 1
+            continue
+        if before == ".":
+            if start >= 2 and values[start - 2] == "super":
+                if start != index:
+                    return None
+                # Super method invocations are not method invocations in javalang
+                index += 1
+                continue
+            # A selector of a preceding expression is located at its dot
+            invocations.append((value, lines[index - 1]))
+        else:
+            qualifier = ".".join(values[start:index:2])
+            if "Verifier" in qualifier:
+                nondet_type = value.replace("nondet", "")
+                nondet_calls.append((lines[start], nondet_type.lower()))
+            invocations.append((value, lines[start]))
+        index += 1
+
+    return {
+        "imports": imports,
+        "nondet_calls": nondet_calls,
+        "returns": returns,
+        "invocations": invocations,
+    }
+
+
+def _parse_java_source(data) -> Dict:
+    """
+    Extracts the information of scan_java_source from the javalang syntax tree
+    :param data: The contents of a java file
+    :return: The scan result, empty if the source does not parse
+    """
+    try:
+        tree = javalang.parse.parse(data)
+    except (javalang.parser.JavaSyntaxError, javalang.tokenizer.LexerError) as err:
+        print(err)
+        return {"imports": [], "nondet_calls": [], "returns": [], "invocations": []}
+    imports = [
+        import_node.path + ".*" if import_node.wildcard else import_node.path
+        for import_node in tree.imports
+    ]
+    nondet_calls = []
+    invocations = []
+    for _, node in tree.filter(javalang.tree.MethodInvocation):
+        if node is None:
+            continue
+        if node.qualifier is not None and "Verifier" in node.qualifier:
+            nondet_type = node.member.replace("nondet", "")
+            nondet_calls.append((node.position.line, nondet_type.lower()))
+        invocations.append((node.member, node.position.line))
+    returns = []
+    for _, node in tree.filter(javalang.tree.MethodDeclaration):
+        if node.body is None or len(node.body) == 0:
+            continue
+        statement = node.body[0]
+        if type(statement) == javalang.tree.ReturnStatement:
+            returns.append((node.name, statement.position.line))
+    return {
+        "imports": imports,
+        "nondet_calls": nondet_calls,
+        "returns": returns,
+        "invocations": invocations,
+    }
+
+
+def scan_java_source(data) -> Dict:
+    """
+    Extracts everything the nondet mappings need from a java source, so that it can be
+    cached independently of the benchmark the file belongs to. The tokens are scanned
+    first, the full javalang parse only runs for sources the scan cannot decide.
+    :param data: The contents of a java file
+    :return: The import paths, the (line, type) of each Verifier nondet call, the
+    (name, line) of each method starting with a return statement and the
+    (member, line) of each method invocation
+    """
+    scan = _scan_java_tokens(data)
+    if scan is None:
+        count("files_parsed")
+        scan = _parse_java_source(data)
+    return scan
+
+
 def filter_assumptions(nondet_mappings, assumptions_list):
     """
     Filters assumptions to only contain values from nondet function calls.
@@ -284,3 +1268,68 @@ def filter_assumptions(nondet_mappings, assumptions_list):
         lambda assumption: (assumption[0] in nondet_mappings), assumptions_list
     )
     return list(map(lambda assumption: assumption[1], filtered_assumptions))
+
+
+# Ranges of the values Verifier parses the integral nondet types from, a byte or char
+# being cast from any int
+INTEGRAL_RANGES = {
+    "byte": (-(2**31), 2**31 - 1),
+    "short": (-(2**15), 2**15 - 1),
+    "char": (-(2**31), 2**31 - 1),
+    "int": (-(2**31), 2**31 - 1),
+    "long": (-(2**63), 2**63 - 1),
+}
+# What Integer.parseInt accepts, digits including non-ASCII ones like Character.digit
+JAVA_INTEGER = re.compile(r"[+-]?\d+")
+# What Double.parseDouble accepts, surrounding control characters and spaces included
+JAVA_FLOATING = re.compile(
+    r"""[\x00-\x20]*[+-]?(?:NaN|Infinity
+    |(?:(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?
+    |0[xX](?:[0-9a-fA-F]+\.?[0-9a-fA-F]*|\.[0-9a-fA-F]+)[pP][+-]?[0-9]+)[fFdD]?)
+    [\x00-\x20]*""",
+    re.VERBOSE,
+)
+
+
+def _value_mismatch(nondet_type, value) -> Optional[str]:
+    """
+    Checks whether a value can be returned by a nondet call of some type
+    :param nondet_type: The type of the nondet call, e.g. int or string
+    :param value: The assumption value, None for null
+    :return: Why the value does not fit, None if it does or the type is unknown
+    """
+    # Boolean.parseBoolean reads anything but "true" as false, null included
+    if nondet_type in ("string", "boolean"):
+        return None
+    if value is None:
+        return f"null for a nondet {nondet_type}"
+    if nondet_type in INTEGRAL_RANGES:
+        if JAVA_INTEGER.fullmatch(value) is None:
+            return f"{value!r} is not an integer"
+        low, high = INTEGRAL_RANGES[nondet_type]
+        if not low <= int(value) <= high:
+            return f"{value} is out of the {nondet_type} range [{low}, {high}]"
+    elif nondet_type in ("float", "double"):
+        if JAVA_FLOATING.fullmatch(value) is None:
+            return f"{value!r} is not a {nondet_type}"
+    return None
+
+
+def prescreen_assumptions(nondet_mappings, assumptions_list) -> Optional[str]:
+    """
+    Checks the assumptions that filter_assumptions keeps against the type of the nondet
+    call at their position, finding witnesses the harness could only fail on
+    :param nondet_mappings: A mapping from a position of a nondet call to its type, None
+    for a position of calls of different types, which is not checked
+    :param assumptions_list: A list of assumptions
+    :return: Why the first mismatching value does not fit, None if all values fit
+    """
+    for position, value in assumptions_list:
+        nondet_type = nondet_mappings.get(position)
+        if nondet_type is None:
+            continue
+        mismatch = _value_mismatch(nondet_type, value)
+        if mismatch is not None:
+            file_name, line = position
+            return f"{mismatch} at {file_name}:{line}"
+    return None
@@ -0,0 +1,225 @@
+"""
+ This file is part of wit4java, an execution-based violation-witness validator for Java
+ https://github.com/wit4java/wit4java.
+
+ This module deals with measuring where the time and memory of a validation go
+"""
+
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+
+def _max_rss_bytes(max_rss: int) -> int:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+class Profiler:
+    """
+    The class Profiler records the wall and CPU time of each phase of a validation,
+    the resource usage of the child processes and some counters. Every record is also
+    passed to the hooks, called as hook(kind, name, record) with kind being "phase",
+    "process" or "counter".
+    """
+
+    def __init__(self):
+        self.phases: Dict[str, Dict] = {}
+        self.processes: Dict[str, Dict] = {}
+        self.counters: Dict[str, int] = {}
+        self.hooks: List[Callable[[str, str, Dict], None]] = []
+        # Further report sections, e.g. added by hooks
+        self.extra: Dict[str, object] = {}
+
+    def add_hook(self, hook: Callable[[str, str, Dict], None]) -> None:
+        """
+        Registers a callable receiving every record
+        :param hook: Called as hook(kind, name, record)
+        """
+        self.hooks.append(hook)
+
+    def _notify(self, kind: str, name: str, record: Dict) -> None:
+        for hook in self.hooks:
+            hook(kind, name, record)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Measures the wall and CPU time of this process spent in a block
+        :param name: The phase the block belongs to
+        """
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            record = {
+                "wall_time": time.perf_counter() - wall_start,
+                "cpu_time": time.process_time() - cpu_start,
+            }
+            total = self.phases.setdefault(
+                name, {"calls": 0, "wall_time": 0.0, "cpu_time": 0.0}
+            )
+            total["calls"] += 1
+            total["wall_time"] += record["wall_time"]
+            total["cpu_time"] += record["cpu_time"]
+            self._notify("phase", name, record)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """
+        Increments a counter
+        :param name: The counter
+        :param amount: The increment
+        """
+        self.counters[name] = self.counters.get(name, 0) + amount
+        self._notify("counter", name, {"amount": amount})
+
+    def record_process(self, command: str, wall_time: float, rusage=None) -> None:
+        """
+        Records a finished child process
+        :param command: Name of the executable
+        :param wall_time: Seconds from starting the process to reaping it
+        :param rusage: The resource usage reported by wait4, if available
+        """
+        record = {"wall_time": wall_time}
+        if rusage is not None:
+            record["user_time"] = rusage.ru_utime
+            record["system_time"] = rusage.ru_stime
+            record["max_rss"] = _max_rss_bytes(rusage.ru_maxrss)
+        total = self.processes.setdefault(command, {"runs": 0})
+        total["runs"] += 1
+        for key, value in record.items():
+            if key == "max_rss":
+                total[key] = max(total.get(key, 0), value)
+            else:
+                total[key] = total.get(key, 0.0) + value
+        self._notify("process", command, record)
+
+    def merge(self, report: Dict) -> None:
+        """
+        Adds the report of another profiler, e.g. of a child process, to this one
+        :param report: The report as returned by report()
+        """
+        for name, phase in report.get("phases", {}).items():
+            total = self.phases.setdefault(
+                name, {"calls": 0, "wall_time": 0.0, "cpu_time": 0.0}
+            )
+            for key, value in phase.items():
+                total[key] += value
+        for command, process in report.get("processes", {}).items():
+            total = self.processes.setdefault(command, {"runs": 0})
+            for key, value in process.items():
+                if key == "max_rss":
+                    total[key] = max(total.get(key, 0), value)
+                else:
+                    total[key] = total.get(key, 0) + value
+        for name, value in report.get("counters", {}).items():
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def report(self) -> Dict:
+        """
+        :return: The phases, child processes and counters as a JSON serialisable dict
+        """
+
+        def rounded(entries):
+            return {
+                name: {
+                    key: round(value, 6) if isinstance(value, float) else value
+                    for key, value in entry.items()
+                }
+                for name, entry in entries.items()
+            }
+
+        return {
+            "phases": rounded(self.phases),
+            "processes": rounded(self.processes),
+            "counters": dict(self.counters),
+            **self.extra,
+        }
+
+
+# The profiler of the running validation, None when not profiling
+_ACTIVE: Optional[Profiler] = None
+
+
+def active_profiler() -> Optional[Profiler]:
+    """
+    :return: The profiler of the running validation, None when not profiling
+    """
+    return _ACTIVE
+
+
+@contextmanager
+def profiling(profiler: Optional[Profiler]) -> Iterator[Optional[Profiler]]:
+    """
+    Makes a profiler record everything measured within a block
+    :param profiler: The profiler, None to not profile
+    """
+    global _ACTIVE
+    previous = _ACTIVE
+    _ACTIVE = profiler
+    try:
+        yield profiler
+    finally:
+        _ACTIVE = previous
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """
+    Measures a block as a phase of the active profiler, if any
+    :param name: The phase the block belongs to
+    """
+    if _ACTIVE is None:
+        yield
+    else:
+        with _ACTIVE.phase(name):
+            yield
+
+
+def count(name: str, amount: int = 1) -> None:
+    """
+    Increments a counter of the active profiler, if any
+    :param name: The counter
+    :param amount: The increment
+    """
+    if _ACTIVE is not None:
+        _ACTIVE.count(name, amount)
+
+
+def write_report(profiler: Profiler, destination: str) -> None:
+    """
+    Writes the report of a profiler as JSON
+    :param profiler: The profiler
+    :param destination: Path of the JSON file, - for stdout
+    """
+    report = json.dumps(profiler.report(), indent=2)
+    if destination == "-":
+        print(report, flush=True)
+    else:
+        with open(destination, "w", encoding="utf-8") as file:
+            file.write(report + "\n")
+
+
+def wait_for_process(process, started: float) -> None:
+    """
+    Waits for a child process, recording its resource usage with the active profiler
+    :param process: A started subprocess.Popen
+    :param started: The time.perf_counter() at which the process was started
+    """
+    if _ACTIVE is None:
+        process.wait()
+        return
+    rusage = None
+    if hasattr(os, "wait4"):
+        _, status, rusage = os.wait4(process.pid, 0)
+        # Tell Popen the process is reaped
+        process.returncode = os.waitstatus_to_exitcode(status)
+    else:
+        process.wait()
+    _ACTIVE.record_process(
+        os.path.basename(process.args[0]), time.perf_counter() - started, rusage
+    )
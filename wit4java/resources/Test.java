@@ -1,7 +1,14 @@
+import org.sosy_lab.sv_benchmarks.Verifier;
+
 public class Test {
   public static void main(String[] args) {
     try {
-      Main.main(new String[0]);
+      try {
+        Main.main(new String[0]);
+      } finally {
+        // Before the verdict is printed, as the run is killed once it is
+        Verifier.dumpTrace();
+      }
       System.out.println("wit4java: Witness Spurious");
     } catch (Exception e) {
       System.out.println(e);
@@ -1,66 +1,199 @@
 package org.sosy_lab.sv_benchmarks;
 
+import java.io.BufferedInputStream;
+import java.io.BufferedOutputStream;
+import java.io.DataInputStream;
+import java.io.DataOutputStream;
+import java.io.FileInputStream;
+import java.io.FileOutputStream;
+import java.io.IOException;
+import java.nio.charset.StandardCharsets;
 import java.util.LinkedList;
 import java.util.Queue;
+import java.util.function.Function;
+import java.util.stream.Stream;
 
 public final class Verifier {
 
-  static String[] assumptionList = {};
+  static final String TAPE_PROPERTY = "wit4java.tape";
+  static final String TRACE_PROPERTY = "wit4java.trace";
+  static final String TRACE_SIZE_PROPERTY = "wit4java.trace.size";
   public static Queue<String> assumptions = new LinkedList<String>();
+  static int tapeSize;
+
+  // The trace of the nondet calls, the last TRACE_SIZE of them being kept in a ring
+  // buffer dumped on exit. The JIT folds the constant TRACING, leaving nothing of
+  // the trace in the nondet calls when it is disabled.
+  static final String TRACE = System.getProperty(TRACE_PROPERTY);
+  static final boolean TRACING = TRACE != null;
+  static final int TRACE_SIZE =
+      TRACING ? Math.max(1, Integer.getInteger(TRACE_SIZE_PROPERTY, 1024)) : 0;
+  static final byte BOOLEAN = 0;
+  static final byte BYTE = 1;
+  static final byte CHAR = 2;
+  static final byte SHORT = 3;
+  static final byte INT = 4;
+  static final byte LONG = 5;
+  static final byte FLOAT = 6;
+  static final byte DOUBLE = 7;
+  static final byte STRING = 8;
+  static final byte[] traceMethods = new byte[TRACE_SIZE];
+  static final String[] traceValues = new String[TRACE_SIZE];
+  static final StackWalker.StackFrame[] traceFrames = new StackWalker.StackFrame[TRACE_SIZE];
+  static final StackWalker walker = TRACING ? StackWalker.getInstance() : null;
+  // The caller of the nondet call, below trace, next and the nondet method. Only
+  // created when tracing, linking a lambda slows down the startup.
+  static final Function<Stream<StackWalker.StackFrame>, StackWalker.StackFrame> caller =
+      TRACING ? frames -> frames.skip(3).findFirst().orElse(null) : null;
+  static int consumed;
+  static boolean dumped;
+
   static {
-    for(String assumption: assumptionList) {
-      assumptions.add(assumption);
+    String tape = System.getProperty(TAPE_PROPERTY);
+    if (tape != null) {
+      readTape(tape);
+    }
+    if (TRACING) {
+      // Benchmarks calling System.exit still leave their trace
+      Runtime.getRuntime().addShutdownHook(new Thread(Verifier::dumpTrace));
+    }
+  }
+
+  // The tape is a big-endian entry count followed by the entries, each one a
+  // byte length (-1 for null) and that many UTF-8 bytes
+  static void readTape(String tape) {
+    try (DataInputStream in =
+        new DataInputStream(new BufferedInputStream(new FileInputStream(tape), 1 << 16))) {
+      int count = in.readInt();
+      tapeSize = count;
+      for (int i = 0; i < count; i++) {
+        int length = in.readInt();
+        if (length < 0) {
+          assumptions.add(null);
+          continue;
+        }
+        byte[] bytes = new byte[length];
+        in.readFully(bytes);
+        assumptions.add(new String(bytes, StandardCharsets.UTF_8));
+      }
+    } catch (IOException e) {
+      throw new IllegalStateException("wit4java: Could not read assumption tape " + tape, e);
+    }
+  }
+
+  static String next(byte method) {
+    if (TRACING) {
+      trace(method);
+    }
+    return assumptions.remove();
+  }
+
+  static void trace(byte method) {
+    int slot = consumed % TRACE_SIZE;
+    traceMethods[slot] = method;
+    traceValues[slot] = assumptions.peek();
+    traceFrames[slot] = walker.walk(caller);
+    consumed++;
+  }
+
+  // The dump is a big-endian tape size, number of nondet calls and number of kept
+  // calls, followed by each kept call's tape index, method, value and caller frame,
+  // the strings written like the tape entries
+  public static synchronized void dumpTrace() {
+    if (!TRACING || dumped) {
+      return;
+    }
+    dumped = true;
+    int kept = Math.min(consumed, TRACE_SIZE);
+    try (DataOutputStream out =
+        new DataOutputStream(new BufferedOutputStream(new FileOutputStream(TRACE), 1 << 16))) {
+      out.writeInt(tapeSize);
+      out.writeInt(consumed);
+      out.writeInt(kept);
+      for (int index = consumed - kept; index < consumed; index++) {
+        int slot = index % TRACE_SIZE;
+        StackWalker.StackFrame frame = traceFrames[slot];
+        out.writeInt(index);
+        out.writeByte(traceMethods[slot]);
+        writeString(out, traceValues[slot]);
+        writeString(
+            out,
+            frame == null
+                ? null
+                : frame.getClassName()
+                    + "."
+                    + frame.getMethodName()
+                    + "("
+                    + frame.getFileName()
+                    + ":"
+                    + frame.getLineNumber()
+                    + ")");
+      }
+    } catch (IOException e) {
+      // Output on stderr would change the verdict, the missing trace is reported instead
+    }
+  }
+
+  static void writeString(DataOutputStream out, String value) throws IOException {
+    if (value == null) {
+      out.writeInt(-1);
+      return;
     }
+    byte[] bytes = value.getBytes(StandardCharsets.UTF_8);
+    out.writeInt(bytes.length);
+    out.write(bytes);
   }
 
   public static void assume(boolean condition) {
     if (!condition) {
+      // halt skips the shutdown hooks
+      dumpTrace();
       Runtime.getRuntime().halt(1);
     }
   }
 
   public static boolean nondetBoolean() {
-    String assumption = assumptions.remove();
+    String assumption = next(BOOLEAN);
     return Boolean.parseBoolean(assumption);
   }
 
   public static byte nondetByte() {
-    String assumption = assumptions.remove();
+    String assumption = next(BYTE);
     return (byte) Integer.parseInt(assumption);
   }
 
   public static char nondetChar() {
-    String assumption = assumptions.remove();
+    String assumption = next(CHAR);
     return (char) Integer.parseInt(assumption);
   }
 
   public static short nondetShort() {
-    String assumption = assumptions.remove();
+    String assumption = next(SHORT);
     return Short.parseShort(assumption);
   }
 
   public static int nondetInt() {
-    String assumption = assumptions.remove();
+    String assumption = next(INT);
     return Integer.parseInt(assumption);
   }
 
   public static long nondetLong() {
-    String assumption = assumptions.remove();
+    String assumption = next(LONG);
     return Long.parseLong(assumption);
   }
 
   public static float nondetFloat() {
-    String assumption = assumptions.remove();
+    String assumption = next(FLOAT);
     return Float.parseFloat(assumption);
   }
 
   public static double nondetDouble() {
-    String assumption = assumptions.remove();
+    String assumption = next(DOUBLE);
     return Double.parseDouble(assumption);
   }
 
   public static String nondetString() {
-    String assumption = assumptions.remove();
+    String assumption = next(STRING);
     return assumption;
   }
 }
\ No newline at end of file
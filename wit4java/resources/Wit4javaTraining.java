@@ -0,0 +1,22 @@
+import org.sosy_lab.sv_benchmarks.Verifier;
+
+// Loads the classes of a typical harness run while a class data archive is dumped
+public class Wit4javaTraining {
+  public static void main(String[] args) {
+    try {
+      Test.main(args);
+    } catch (NoClassDefFoundError e) {
+      // There is no benchmark, only the harness classes are loaded
+    }
+    Verifier.nondetBoolean();
+    Verifier.nondetLong();
+    Verifier.nondetDouble();
+    Verifier.nondetString();
+    try {
+      assert Verifier.nondetInt() == 0;
+    } catch (AssertionError e) {
+      System.out.println(e);
+      e.printStackTrace();
+    }
+  }
+}
@@ -0,0 +1,104 @@
+import java.io.BufferedReader;
+import java.io.File;
+import java.io.InputStreamReader;
+import java.io.OutputStream;
+import java.io.PrintStream;
+import java.lang.reflect.InvocationTargetException;
+import java.lang.reflect.Method;
+import java.net.URL;
+import java.net.URLClassLoader;
+import java.nio.charset.StandardCharsets;
+
+public class Worker {
+  // Whether the benchmark wrote to stderr during the current run
+  static volatile boolean errorWritten;
+
+  // Requests are "<class directory>\t<assumption tape>" lines on stdin, each one
+  // answered by a CORRECT, SPURIOUS or ERROR line on stdout
+  public static void main(String[] args) throws Exception {
+    PrintStream verdicts = System.out;
+    PrintStream stderr = System.err;
+    // Anything the benchmark prints must not interleave with the verdicts
+    System.setOut(stderr);
+    System.setErr(new PrintStream(new ErrorStream(stderr), true));
+    BufferedReader requests =
+        new BufferedReader(new InputStreamReader(System.in, StandardCharsets.UTF_8));
+    String request;
+    while ((request = requests.readLine()) != null) {
+      String[] fields = request.split("\t", 2);
+      verdicts.println(run(fields[0], fields[1]));
+      verdicts.flush();
+    }
+    // Threads left behind by a benchmark must not keep the worker alive
+    System.exit(0);
+  }
+
+  static String run(String classDirectory, String tape) {
+    System.setProperty("wit4java.tape", tape);
+    errorWritten = false;
+    URLClassLoader loader = null;
+    try {
+      URL[] urls = {new File(classDirectory).toURI().toURL()};
+      // A fresh loader per run gives the benchmark and Verifier fresh static state
+      loader = new URLClassLoader(urls, ClassLoader.getPlatformClassLoader());
+      loader.setDefaultAssertionStatus(true);
+      Method main = loader.loadClass("Main").getMethod("main", String[].class);
+      main.setAccessible(true);
+      main.invoke(null, (Object) new String[0]);
+      // A harness in its own JVM does not validate a run with output on stderr
+      return errorWritten ? "ERROR output on stderr" : "SPURIOUS";
+    } catch (InvocationTargetException e) {
+      if (e.getCause() instanceof AssertionError) {
+        return "CORRECT";
+      }
+      return error(e.getCause());
+    } catch (Throwable e) {
+      return error(e);
+    } finally {
+      close(loader);
+    }
+  }
+
+  static String error(Throwable e) {
+    return ("ERROR " + e).replace('\n', ' ').replace('\r', ' ');
+  }
+
+  // Passes stderr through, noting that the current run wrote to it
+  static class ErrorStream extends OutputStream {
+    final PrintStream out;
+
+    ErrorStream(PrintStream out) {
+      this.out = out;
+    }
+
+    @Override
+    public void write(int b) {
+      errorWritten = true;
+      out.write(b);
+    }
+
+    @Override
+    public void write(byte[] b, int off, int len) {
+      if (len > 0) {
+        errorWritten = true;
+      }
+      out.write(b, off, len);
+    }
+
+    @Override
+    public void flush() {
+      out.flush();
+    }
+  }
+
+  static void close(URLClassLoader loader) {
+    if (loader == null) {
+      return;
+    }
+    try {
+      loader.close();
+    } catch (Exception e) {
+      // The loader is unreachable after the run either way
+    }
+  }
+}
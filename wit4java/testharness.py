@@ -6,8 +6,182 @@
 """
 
 import os
-import subprocess
-from typing import List, Tuple
+import re
+import struct
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from wit4java.jfr import format_jvm_profile
+from wit4java.process import run_command
+from wit4java.profiling import phase
+
+TAPE_PROPERTY = "wit4java.tape"
+TAPE_INT = struct.Struct(">i")
+TAPE_NULL = TAPE_INT.pack(-1)
+TRACE_PROPERTY = "wit4java.trace"
+TRACE_SIZE_PROPERTY = "wit4java.trace.size"
+# The nondet methods by their number in the consumption trace of Verifier.java
+TRACE_METHODS = (
+    "nondetBoolean",
+    "nondetByte",
+    "nondetChar",
+    "nondetShort",
+    "nondetInt",
+    "nondetLong",
+    "nondetFloat",
+    "nondetDouble",
+    "nondetString",
+)
+TRACE_HEADER = struct.Struct(">iii")
+TRACE_RECORD = struct.Struct(">ib")
+# A unicode escape, unless its backslash is itself escaped
+JAVA_UNICODE_ESCAPE = re.compile(r"(?<!\\)((?:\\\\)*)\\u+([0-9a-fA-F]{4})")
+JAVA_ESCAPE = re.compile(r"""\\(?:([btnfrs"'\\])|([0-3][0-7]{0,2}|[4-7][0-7]?))""")
+JAVA_ESCAPES = {
+    "b": "\b",
+    "t": "\t",
+    "n": "\n",
+    "f": "\f",
+    "r": "\r",
+    "s": " ",
+    '"': '"',
+    "'": "'",
+    "\\": "\\",
+}
+
+
+def _unescape_java_character(match) -> str:
+    character, octal = match.groups()
+    if character is not None:
+        return JAVA_ESCAPES[character]
+    return chr(int(octal, 8))
+
+
+def unescape_java_string(literal: str) -> str:
+    """
+    Translates the contents of a java string literal into the string javac makes of it,
+    unicode escapes first and escape sequences then, as the witness values were once
+    compiled into Verifier.java as literals. Invalid escapes are kept as they are
+    :param literal: The literal without its quotes, e.g. a\\nb or \\u0041
+    :return: The string
+    """
+    if "\\" not in literal:
+        return literal
+    value = JAVA_UNICODE_ESCAPE.sub(
+        lambda match: match.group(1) + chr(int(match.group(2), 16)), literal
+    )
+    value = JAVA_ESCAPE.sub(_unescape_java_character, value)
+    # Pairs of escaped surrogates make one character, unpaired ones are malformed
+    return value.encode("utf-16", "surrogatepass").decode("utf-16", "replace")
+
+
+def write_assumption_tape(path: str, assumptions: List[Optional[str]]) -> None:
+    """
+    Writes assumptions in the tape format read by Verifier.java: a big-endian entry count
+    followed by each entry's UTF-8 byte length, -1 for null, and its bytes
+    :param path: Path of the tape file
+    :param assumptions: Assumption values as the contents of java string literals, see
+    unescape_java_string, None standing for null
+    """
+    with open(path, "wb") as file:
+        file.write(TAPE_INT.pack(len(assumptions)))
+        for assumption in assumptions:
+            if assumption is None:
+                file.write(TAPE_NULL)
+            else:
+                data = unescape_java_string(assumption).encode("utf-8")
+                file.write(TAPE_INT.pack(len(data)))
+                file.write(data)
+
+
+def read_assumption_tape(path: str) -> List[Optional[str]]:
+    """
+    Reads back the assumptions of a tape file
+    :param path: Path of the tape file
+    :return: Assumption values, None standing for null
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    (count,) = TAPE_INT.unpack_from(data, 0)
+    offset = TAPE_INT.size
+    assumptions = []
+    for _ in range(count):
+        (length,) = TAPE_INT.unpack_from(data, offset)
+        offset += TAPE_INT.size
+        if length < 0:
+            assumptions.append(None)
+            continue
+        assumptions.append(data[offset : offset + length].decode("utf-8"))
+        offset += length
+    return assumptions
+
+
+def _read_tape_string(data: bytes, offset: int) -> Tuple[Optional[str], int]:
+    """
+    Reads a string written like a tape entry
+    :return: The string, None standing for null, and the offset after it
+    """
+    (length,) = TAPE_INT.unpack_from(data, offset)
+    offset += TAPE_INT.size
+    if length < 0:
+        return None, offset
+    return data[offset : offset + length].decode("utf-8"), offset + length
+
+
+def read_consumption_trace(path: str) -> Optional[Dict]:
+    """
+    Reads the consumption trace dumped by Verifier.java: a big-endian tape size,
+    number of nondet calls and number of kept calls, followed by each kept call's tape
+    index, method number, value and caller frame, the strings written like tape entries
+    :param path: Path of the trace file
+    :return: The tape size, the number of nondet calls and the kept calls, oldest
+    first, None if the harness left no trace
+    """
+    try:
+        with open(path, "rb") as file:
+            data = file.read()
+    except FileNotFoundError:
+        return None
+    tape_size, calls, kept = TRACE_HEADER.unpack_from(data, 0)
+    offset = TRACE_HEADER.size
+    records = []
+    for _ in range(kept):
+        index, method = TRACE_RECORD.unpack_from(data, offset)
+        offset += TRACE_RECORD.size
+        value, offset = _read_tape_string(data, offset)
+        frame, offset = _read_tape_string(data, offset)
+        records.append(
+            {
+                "index": index,
+                "method": TRACE_METHODS[method],
+                "value": value,
+                "frame": frame,
+                # The call found the tape empty and failed
+                "dry": index >= tape_size,
+            }
+        )
+    return {"tape_size": tape_size, "calls": calls, "records": records}
+
+
+def format_consumption_trace(trace: Dict) -> str:
+    """
+    :param trace: A consumption trace as returned by read_consumption_trace
+    :return: The trace as one line per kept call after a summary line
+    """
+    records = trace["records"]
+    lines = [
+        f"wit4java trace: {trace['calls']} nondet calls on {trace['tape_size']} "
+        f"assumptions, the last {len(records)} kept"
+    ]
+    for record in records:
+        if record["dry"]:
+            value = "ran out of assumptions"
+        else:
+            value = "= null" if record["value"] is None else f"= {record['value']}"
+        lines.append(
+            f"  #{record['index']} {record['method']} {value} at {record['frame']}"
+        )
+    return "\n".join(lines)
 
 
 class TestHarness:
@@ -17,6 +191,9 @@ class TestHarness:
     """
 
     VERIFIER_PACKAGE = "org/sosy_lab/sv_benchmarks"
+    # Outputs of a harness run that decide the verdict, the run stops at either
+    ASSERTION_MARKER = 'Exception in thread "main" java.lang.AssertionError'
+    SPURIOUS_MARKER = "wit4java: Witness Spurious"
     VERIFIER_RESOURCE_PATH = os.path.join(
         os.path.dirname(os.path.realpath(__file__)), "resources/Verifier.java"
     )
@@ -24,16 +201,46 @@ class TestHarness:
         os.path.dirname(os.path.realpath(__file__)), "resources/Test.java"
     )
 
-    def __init__(self, directory):
+    def __init__(
+        self,
+        directory,
+        source_paths=(),
+        timeout=None,
+        class_data_archive=None,
+        resource_limits=None,
+        trace: Optional[int] = None,
+        jvm_profiler=None,
+    ):
         """
         The constructor of TestBuilder collects information on the output directory
         :param directory: Directory that the harness will write to
+        :param source_paths: Directories of benchmark sources left outside the directory
+        :param timeout: Seconds after which a run of the harness is killed, None to wait
+        :param class_data_archive: The ClassDataArchive shortening the JVM startup of
+        runs, if any
+        :param resource_limits: The ResourceLimits of the javac and java processes, if
+        any
+        :param trace: Number of the last nondet calls of a run traced with their tape
+        index, value and caller, None not to trace
+        :param jvm_profiler: The FlightRecorder recording and summarising runs, if any
         """
         self.directory = directory
+        self.source_paths = list(source_paths)
+        self.timeout = timeout
+        self.class_data_archive = class_data_archive
+        self.resource_limits = resource_limits
         self.verifier_path = os.path.join(
             self.directory, f"{self.VERIFIER_PACKAGE}/Verifier.java"
         )
         self.test_path = os.path.join(self.directory, "Test.java")
+        self.tape_path = os.path.join(self.directory, "assumptions.tape")
+        self.trace = trace
+        self.trace_path = os.path.join(self.directory, "consumption.trace")
+        # The consumption trace of the last run, if traced
+        self.consumption_trace = None
+        self.jvm_profiler = jvm_profiler
+        # The summary of the recording of the last run, if recorded
+        self.jvm_profile = None
 
     @staticmethod
     def _read_data(path: str) -> List[str]:
@@ -57,33 +264,102 @@ class TestHarness:
         subdir = os.path.dirname(path)
         if not os.path.exists(subdir):
             os.makedirs(subdir)
+        # A linked workspace must not write through to the benchmark or package
+        if os.path.islink(path) or os.path.exists(path):
+            os.unlink(path)
         with open(path, "wt", encoding="utf-8") as file:
             file.writelines(data)
 
     @staticmethod
-    def _run_command(command: List[str]) -> Tuple[str, str]:
+    def _run_command(
+        command: List[str],
+        timeout: Optional[float] = None,
+        stop_markers=(),
+        preexec_fn=None,
+    ) -> Tuple[str, str]:
         """
         Handles running commands in subprocess
         :param command: List of seperated command to run
-        :return: stdout and stderr from command
-        """
-        with subprocess.Popen(
-            command, stdout=subprocess.PIPE, stderr=subprocess.PIPE
-        ) as proc:
-            proc.wait()
-            out = proc.stdout.read().decode("utf-8")
-            err = proc.stderr.read().decode("utf-8")
+        :param timeout: Seconds after which the command is killed, None to wait
+        :param stop_markers: Outputs after which the command is killed as its outcome
+        is known
+        :param preexec_fn: Called in the child before it executes, e.g. to set rlimits
+        :return: stdout and stderr from command, up to the kill if there was one
+        """
+        out, err, _ = run_command(
+            command, timeout, stop_markers, preexec_fn=preexec_fn
+        )
         return out, err
 
-    def build_test_harness(self, assumptions) -> None:
+    @classmethod
+    @lru_cache(maxsize=None)
+    def javac_version(cls) -> str:
+        """
+        Reports the version of the java compiler, which prints it to stderr before JDK 9
+        :return: The version string of javac
+        """
+        out, err = cls._run_command(["javac", "-version"])
+        return (out + err).strip()
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def java_version(cls) -> str:
+        """
+        Reports the version of the java runtime, which prints it to stderr
+        :return: The version string of java
+        """
+        out, err = cls._run_command(["java", "-version"])
+        return (out + err).strip()
+
+    def build_test_harness(
+        self, assumptions, compilation_cache=None, cache_key=None
+    ) -> None:
         """
          Constructs and compiles the tests harness consisting of
          the unit tests and the tests verifier
         :param assumptions: Assumptions extracted from the witness
+        :param compilation_cache: Cache of compiled benchmark classes to reuse, if any
+        :param cache_key: The key of the benchmark in the compilation cache
         """
-        self._build_unit_test()
-        self._build_test_verifier(assumptions)
+        self._build_assumption_tape(assumptions)
+        if self.prepare_test_harness(compilation_cache, cache_key):
+            return
         _, _ = self._compile_test_harness()
+        self.store_test_harness(compilation_cache, cache_key)
+
+    def prepare_test_harness(self, compilation_cache=None, cache_key=None) -> bool:
+        """
+         Writes the unit tests and the tests verifier, restoring their classes and
+         those of the benchmark from the compilation cache if possible
+        :param compilation_cache: Cache of compiled benchmark classes to reuse, if any
+        :param cache_key: The key of the benchmark in the compilation cache
+        :return: Whether the classes were restored, leaving nothing to compile
+        """
+        self._build_unit_test()
+        self._build_test_verifier()
+        # The harness classes do not depend on the witness so are cached alongside
+        # the benchmark classes, leaving nothing to compile on a hit
+        return compilation_cache is not None and compilation_cache.restore(
+            cache_key, self.directory
+        )
+
+    def store_test_harness(self, compilation_cache=None, cache_key=None) -> None:
+        """
+         Stores the compiled classes in the compilation cache, if compilation succeeded
+        :param compilation_cache: Cache of compiled benchmark classes, if any
+        :param cache_key: The key of the benchmark in the compilation cache
+        """
+        if compilation_cache is not None and os.path.exists(
+            os.path.join(self.directory, "Test.class")
+        ):
+            compilation_cache.store(cache_key, self.directory)
+
+    def update_assumptions(self, assumptions) -> None:
+        """
+         Replaces the assumptions of an already compiled tests harness
+        :param assumptions: Assumptions extracted from the witness
+        """
+        self._build_assumption_tape(assumptions)
 
     def _build_unit_test(self) -> None:
         """
@@ -92,49 +368,151 @@ class TestHarness:
         test_data = self._read_data(self.TEST_RESOURCE_PATH)
         self._write_data(self.test_path, test_data)
 
-    def _build_test_verifier(self, assumptions) -> None:
+    def _build_test_verifier(self) -> None:
+        """
+        Constructs the tests verifier from Verifier.java
         """
-        Constructs the tests verifier from a list of assumptions
-        and Verifier.java
+        verifier_data = self._read_data(self.VERIFIER_RESOURCE_PATH)
+        self._write_data(self.verifier_path, verifier_data)
+
+    def _build_assumption_tape(self, assumptions) -> None:
+        """
+        Writes the assumptions read by the tests verifier at startup
         :param assumptions: Assumptions extracted from the witness
         """
-        verifier_path = os.path.join(
-            self.directory, f"{self.VERIFIER_PACKAGE}/Verifier.java"
-        )
-        # Map assumptions to string form, mapping None to null
-        string_assumptions = [
-            f'"{a}"' if a is not None else "null" for a in assumptions
+        write_assumption_tape(self.tape_path, assumptions)
+
+    def compile_arguments(self) -> List[str]:
+        """
+        :return: The javac command compiling the tests harness
+        """
+        javac = ["javac"]
+        if self.resource_limits is not None:
+            javac += self.resource_limits.javac_options()
+        if not self.source_paths:
+            return javac + ["-sourcepath", self.directory, self.test_path]
+        # The harness sources in the directory shadow the benchmark and packages,
+        # all classes are written to the directory
+        source_path = os.pathsep.join([self.directory] + self.source_paths)
+        return javac + [
+            "-sourcepath",
+            source_path,
+            "-d",
+            self.directory,
+            self.test_path,
         ]
-        verifier_data = self._read_data(self.VERIFIER_RESOURCE_PATH)
-        # Replace empty assumptions list with extracted assumptions
-        assumption_line = verifier_data.index(
-            "  static String[] assumptionList = {};\n"
-        )
-        verifier_data[assumption_line] = verifier_data[assumption_line].replace(
-            "{}", "{" + ", ".join(string_assumptions) + "}"
-        )
-        self._write_data(verifier_path, verifier_data)
 
-    def _compile_test_harness(self) -> Tuple[str, str]:
+    def run_arguments(
+        self,
+        tape_path: Optional[str] = None,
+        trace_path: Optional[str] = None,
+        recording_path: Optional[str] = None,
+    ) -> List[str]:
         """
-        Compiles the tests harness
-        :return: stdout and stderr from compilation
+        :param tape_path: The assumption tape to run with, the harness's own if None
+        :param trace_path: The file the run dumps its consumption trace to when
+        tracing, the harness's own if None
+        :param recording_path: The file the run dumps its flight recording to, None
+        not to record it
+        :return: The java command running the tests harness
         """
-        compile_args = ["javac", "-sourcepath", self.directory, self.test_path]
-        out, err = self._run_command(compile_args)
-        return out, err
+        tape_path = self.tape_path if tape_path is None else tape_path
+        trace_path = self.trace_path if trace_path is None else trace_path
+        if self.class_data_archive is None:
+            class_path = ["-cp", self.directory]
+        else:
+            class_path = self.class_data_archive.java_options(self.directory)
+        limits = [] if self.resource_limits is None else self.resource_limits.jvm_options()
+        trace = []
+        if self.trace is not None:
+            trace = [
+                f"-D{TRACE_PROPERTY}={os.path.abspath(trace_path)}",
+                f"-D{TRACE_SIZE_PROPERTY}={self.trace}",
+            ]
+        recording = []
+        if recording_path is not None:
+            recording = self.jvm_profiler.java_options(recording_path)
+        return [
+            "java",
+            *limits,
+            *recording,
+            *class_path,
+            "-ea",
+            f"-D{TAPE_PROPERTY}={os.path.abspath(tape_path)}",
+            *trace,
+            "Test",
+        ]
 
-    def run_test_harness(self) -> str:
+    def preexec_fn(self):
         """
-        Runs the tests harness and reports the outcome of the validation execution
+        :return: The function applying the rlimits and core pinning to a javac or java
+        process, None if there are none
+        """
+        if self.resource_limits is None:
+            return None
+        return self.resource_limits.preexec_fn()
+
+    @classmethod
+    def outcome(cls, out: str, err: str) -> str:
+        """
+        Decides the validation result from the output of a harness run
+        :param out: stdout of the run
+        :param err: stderr of the run
         :return: The validation result
         """
-        run_args = ["java", "-cp", self.directory, "-ea", "Test"]
-        out, err = self._run_command(run_args)
         # Set output to be stderr if there is some erroneous output
         out = err if err else out
-        if 'Exception in thread "main" java.lang.AssertionError' in out:
+        if cls.ASSERTION_MARKER in out:
             return "wit4java: Witness Correct"
-        if "wit4java: Witness Spurious" in out:
+        if cls.SPURIOUS_MARKER in out:
             return "wit4java: Witness Spurious"
         return "wit4java: Could not validate witness"
+
+    def _compile_test_harness(self) -> Tuple[str, str]:
+        """
+        Compiles the tests harness
+        :return: stdout and stderr from compilation
+        """
+        with phase("javac"):
+            out, err = self._run_command(
+                self.compile_arguments(), preexec_fn=self.preexec_fn()
+            )
+        return out, err
+
+    def run_test_harness(self, worker=None) -> str:
+        """
+        Runs the tests harness and reports the outcome of the validation execution
+        :param worker: A persistent JVM worker to run the harness in, if any
+        :return: The validation result, followed by the consumption trace and the
+        summary of the flight recording of the run when enabled
+        """
+        if worker is not None:
+            with phase("java"):
+                return worker.run(self.directory, self.tape_path, self.timeout)
+        if self.trace is not None and os.path.exists(self.trace_path):
+            os.unlink(self.trace_path)
+        recording_path = None
+        stop_markers = (self.ASSERTION_MARKER, self.SPURIOUS_MARKER)
+        if self.jvm_profiler is not None:
+            recording_path = self.jvm_profiler.new_recording()
+            # A killed JVM does not dump its recording, so the run has to exit
+            stop_markers = ()
+        with phase("java"):
+            out, err = self._run_command(
+                self.run_arguments(recording_path=recording_path),
+                self.timeout,
+                stop_markers=stop_markers,
+                preexec_fn=self.preexec_fn(),
+            )
+        result = [self.outcome(out, err)]
+        if self.trace is not None:
+            self.consumption_trace = read_consumption_trace(self.trace_path)
+            if self.consumption_trace is None:
+                result.append("wit4java trace: the run left no trace")
+            else:
+                result.append(format_consumption_trace(self.consumption_trace))
+        if recording_path is not None:
+            with phase("jfr"):
+                self.jvm_profile = self.jvm_profiler.summarize(recording_path)
+            result.append(format_jvm_profile(recording_path, self.jvm_profile))
+        return "\n".join(result)
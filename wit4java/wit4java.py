@@ -5,16 +5,26 @@
  This module deals with the main functionality of the tool
 """
 
+import json
 import os
 import sys
-import tempfile
-
-from shutil import rmtree
+from contextlib import nullcontext
 
 import argparse
 
-from wit4java.testharness import TestHarness
-from wit4java.processors import JavaFileProcessor, WitnessProcessor, filter_assumptions
+from wit4java.batch import BatchValidator, collect_witnesses, validate_witnesses
+from wit4java.cache import (
+    CompilationCache,
+    ParseCache,
+    ResultCache,
+    default_cache_dir,
+)
+from wit4java.cds import ClassDataArchive
+from wit4java.jfr import FlightRecorder
+from wit4java.limits import ResourceLimits, available_cores
+from wit4java.profiling import Profiler, active_profiler, phase, profiling, write_report
+from wit4java.worker import JvmWorker
+from wit4java.workspace import WORKSPACE_MODES
 from wit4java import __version__
 
 
@@ -29,6 +39,85 @@ def dir_path(path):
     raise argparse.ArgumentTypeError(f"readable_dir:{path} is not a valid path")
 
 
+def add_resource_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Adds the options bounding the javac and java processes to a parser
+    :param parser: The parser of the validation or corpus mode
+    """
+    parser.add_argument(
+        "--heap",
+        type=int,
+        default=None,
+        help="Megabytes of JVM heap of each javac and java process, defaults to a "
+        "quarter of its share of the memory when several run at a time",
+    )
+
+    parser.add_argument(
+        "--gc-threads",
+        dest="gc_threads",
+        type=int,
+        default=None,
+        help="Parallel GC threads of each JVM, defaults to its share of the cores "
+        "when several run at a time",
+    )
+
+    parser.add_argument(
+        "--jvm-processors",
+        dest="jvm_processors",
+        type=int,
+        default=None,
+        help="Processor count each JVM sizes itself for, defaults to its share of "
+        "the cores when several run at a time",
+    )
+
+    parser.add_argument(
+        "--address-space",
+        dest="address_space",
+        type=int,
+        default=None,
+        help="Megabytes of address space after which allocations of a javac or java "
+        "process fail. The JVM reserves much more than its heap, so leave room",
+    )
+
+    parser.add_argument(
+        "--cpu-time",
+        dest="cpu_time",
+        type=int,
+        default=None,
+        help="CPU seconds after which a javac or java process is killed",
+    )
+
+    parser.add_argument(
+        "--pin-cores",
+        dest="pin_cores",
+        action="store_true",
+        default=False,
+        help="Pin each concurrent javac and java process to its share of the cores",
+    )
+
+
+def resource_limits(config, workers: int, memory=None) -> ResourceLimits:
+    """
+    Scales the limits of the javac and java processes to the number running at a time,
+    overridden by the given options
+    :param config: The parsed command-line options
+    :param workers: Number of javac and java processes running at a time
+    :param memory: Bytes of memory of a worker, a share of the physical memory if None
+    :return: The limits of each process
+    """
+    megabyte = 1024 * 1024
+    return ResourceLimits.scaled(
+        workers,
+        memory,
+        heap=config["heap"] and config["heap"] * megabyte,
+        gc_threads=config["gc_threads"],
+        processors=config["jvm_processors"],
+        address_space=config["address_space"] and config["address_space"] * megabyte,
+        cpu_time=config["cpu_time"],
+        cores=available_cores() if config["pin_cores"] else None,
+    )
+
+
 def create_argument_parser() -> argparse.ArgumentParser:
     """
     Creates a parser for the command-line options.
@@ -55,11 +144,12 @@ def create_argument_parser() -> argparse.ArgumentParser:
 
     parser.add_argument(
         "--witness",
-        dest="witness_file",
+        dest="witness_files",
         required=True,
         type=str,
-        action="store",
-        help="Path to the witness file. Must conform to the exchange format",
+        action="append",
+        help="Path to the witness file. Must conform to the exchange format. "
+        "Repeat the option or pass a directory to validate witnesses in batch mode",
     )
 
     parser.add_argument(
@@ -77,51 +167,454 @@ def create_argument_parser() -> argparse.ArgumentParser:
         dest="json_input",
         action="store_true",
         default=False,
-        help="Interpret the witness input with JSON/YAML format",
+        help="Interpret the witness input with JSON/YAML format. The format is "
+        "detected automatically, so this is only needed to override the detection",
+    )
+
+    parser.add_argument(
+        "--cache-dir",
+        dest="cache_dir",
+        type=str,
+        default=None,
+        help="Directory of the persistent caches, defaults to $WIT4JAVA_CACHE_DIR "
+        "or ~/.cache/wit4java",
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        dest="no_cache",
+        action="store_true",
+        default=False,
+        help="Do not read or write the persistent caches",
+    )
+
+    parser.add_argument(
+        "--no-cds",
+        dest="no_cds",
+        action="store_true",
+        default=False,
+        help="Do not start the harness JVMs from a class data sharing archive",
+    )
+
+    parser.add_argument(
+        "--jvm-worker",
+        dest="jvm_worker",
+        action="store_true",
+        default=False,
+        help="Run the test harnesses in one persistent JVM instead of a JVM per witness",
+    )
+
+    parser.add_argument(
+        "--timeout",
+        dest="run_timeout",
+        type=float,
+        default=None,
+        help="Seconds after which a run of the test harness is killed, giving no verdict",
+    )
+
+    parser.add_argument(
+        "--workspace",
+        dest="workspace_mode",
+        choices=WORKSPACE_MODES,
+        default="copy",
+        help="How the benchmark and packages are made available to the test harness: "
+        "copied into the working directory, hardlinked (symlinked across file "
+        "systems) or left in place with only the harness and classes in it",
+    )
+
+    parser.add_argument(
+        "--tmpfs",
+        action="store_true",
+        default=False,
+        help="Create temporary working directories in memory under /dev/shm",
+    )
+
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="-",
+        default=None,
+        metavar="FILE",
+        help="Report the time spent in each phase, the resource usage of javac and "
+        "java and some counters as JSON, to FILE or to stdout",
+    )
+
+    parser.add_argument(
+        "--trace",
+        nargs="?",
+        type=int,
+        const=1024,
+        default=None,
+        metavar="CALLS",
+        help="Trace the nondet calls of the test harness, adding the last CALLS of them "
+        "(1024 by default) with their tape index, value and caller to each result. "
+        "Results are neither read from nor written to the cache",
+    )
+
+    parser.add_argument(
+        "--profile-jvm",
+        dest="profile_jvm",
+        nargs="?",
+        const=".",
+        default=None,
+        metavar="DIR",
+        help="Record each run of the test harness with Java Flight Recorder, keeping "
+        "the recordings in DIR (the current directory by default) and adding the "
+        "hottest methods and GC time to each result. Runs are no longer stopped at "
+        "the verdict, and results are neither read from nor written to the cache",
+    )
+
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        default=False,
+        help="In batch mode, parse witnesses while javac and java run for others",
+    )
+
+    parser.add_argument(
+        "--parse-jobs",
+        dest="cpu_jobs",
+        type=int,
+        default=None,
+        help="Number of witnesses parsed concurrently with --pipeline, defaults to "
+        "the number of CPUs",
+    )
+
+    parser.add_argument(
+        "--jvm-jobs",
+        dest="jvm_jobs",
+        type=int,
+        default=None,
+        help="Number of javac and java processes run concurrently with --pipeline, "
+        "defaults to the number of CPUs",
+    )
+
+    add_resource_arguments(parser)
+
+    return parser
+
+
+def create_corpus_argument_parser() -> argparse.ArgumentParser:
+    """
+    Creates a parser for the command-line options of the corpus mode.
+    @return: An argparse.ArgumentParser instance
+    """
+    parser = argparse.ArgumentParser(
+        prog="wit4java corpus",
+        description="""
+                   Validate every benchmark and witness pair of a corpus in parallel.
+               """,
+    )
+
+    parser.add_argument(
+        "manifest",
+        help="JSONL file of benchmark/packages/witness objects, or a directory with a "
+        "benchmark and a witnesses directory per task",
+    )
+
+    parser.add_argument(
+        "--packages",
+        dest="package_paths",
+        type=dir_path,
+        nargs="*",
+        help="Path to the packages used by tasks that do not list their own",
+    )
+
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of tasks validated concurrently, defaults to the number of CPUs",
+    )
+
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=None,
+        help="Wall-clock seconds after which a task is killed",
+    )
+
+    parser.add_argument(
+        "--memory-limit",
+        dest="memory_limit",
+        type=int,
+        default=None,
+        help="Megabytes of resident memory, including javac and java, after which a "
+        "task is killed",
+    )
+
+    parser.add_argument(
+        "--output",
+        default="-",
+        help="JSONL file the results are streamed to, defaults to stdout",
+    )
+
+    parser.add_argument(
+        "--cache-dir",
+        dest="cache_dir",
+        type=str,
+        default=None,
+        help="Directory of the persistent caches, defaults to $WIT4JAVA_CACHE_DIR "
+        "or ~/.cache/wit4java",
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        dest="no_cache",
+        action="store_true",
+        default=False,
+        help="Do not read or write the persistent caches",
+    )
+
+    parser.add_argument(
+        "--no-cds",
+        dest="no_cds",
+        action="store_true",
+        default=False,
+        help="Do not start the harness JVMs from a class data sharing archive",
     )
 
+    parser.add_argument(
+        "--workspace",
+        dest="workspace_mode",
+        choices=WORKSPACE_MODES,
+        default="copy",
+        help="How the benchmark and packages are made available to the test harness: "
+        "copied into the working directory, hardlinked (symlinked across file "
+        "systems) or left in place with only the harness and classes in it",
+    )
+
+    parser.add_argument(
+        "--tmpfs",
+        action="store_true",
+        default=False,
+        help="Create temporary working directories in memory under /dev/shm",
+    )
+
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="-",
+        default=None,
+        metavar="FILE",
+        help="Report the time spent in each phase, the resource usage of javac and "
+        "java and some counters as JSON, to FILE or to stdout",
+    )
+
+    add_resource_arguments(parser)
+
     return parser
 
 
+def run_corpus(argv):
+    """
+    Validates a corpus, streaming one JSON line per finished task
+    :param argv: The command-line options following the corpus command
+    """
+    # pylint: disable=import-outside-toplevel
+    # Only imported when needed, like the pipeline, keeping the startup fast
+    from wit4java.corpus import load_manifest, validate_corpus
+
+    config = vars(create_corpus_argument_parser().parse_args(argv))
+    tasks = load_manifest(config["manifest"], config["package_paths"])
+    profiler = Profiler() if config["profile"] else None
+    jobs = config["jobs"] or os.cpu_count() or 1
+    memory_limit = config["memory_limit"] and config["memory_limit"] * 1024 * 1024
+    output = (
+        sys.stdout
+        if config["output"] == "-"
+        else open(config["output"], "w", encoding="utf-8")
+    )
+    try:
+        for result in validate_corpus(
+            tasks,
+            jobs=jobs,
+            timeout=config["timeout"],
+            memory_limit=memory_limit,
+            cache_dir=None
+            if config["no_cache"]
+            else config["cache_dir"] or default_cache_dir(),
+            workspace_mode=config["workspace_mode"],
+            tmpfs=config["tmpfs"],
+            profile=profiler is not None,
+            class_data_sharing=not config["no_cds"],
+            # A task runs one javac or java at a time, within its memory limit
+            resource_limits=resource_limits(config, jobs, memory_limit),
+            pin_cores=config["pin_cores"],
+        ):
+            if profiler is not None:
+                profiler.merge(result.get("profile", {}))
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    if profiler is not None:
+        write_report(profiler, config["profile"])
+
+
 def main():
+    if sys.argv[1:2] == ["corpus"]:
+        run_corpus(sys.argv[2:])
+        sys.exit()
     parser = create_argument_parser()
     config = parser.parse_args(sys.argv[1:])
     config = vars(config)
+    if config["pipeline"] and config["jvm_worker"]:
+        parser.error("--pipeline runs its own JVMs and cannot use --jvm-worker")
+    for option in ("trace", "profile_jvm"):
+        if config[option] is not None and (config["pipeline"] or config["jvm_worker"]):
+            parser.error(
+                f"--{option.replace('_', '-')} needs a harness JVM per witness, "
+                "without --pipeline or --jvm-worker"
+            )
+    if config["trace"] is not None and config["trace"] < 1:
+        parser.error("--trace needs at least one call to keep")
+    profiler = Profiler() if config["profile"] else None
     try:
-        print(f"wit4java version: {__version__}")
-        print("witness: ", config["witness_file"])
-
-        # Create temporary directory for easier cleanup
-        directory = "." if config["local_dir"] else tempfile.mkdtemp()
-
-        # Instantiate file processors
-        jfp = JavaFileProcessor(directory, config["benchmark"], config["package_paths"])
-        wfp = WitnessProcessor(
-            directory, config["witness_file"], json_input=config["json_input"]
-        )
-
-        # Need to preprocess and move to current directory to utilise mockito
-        jfp.preprocess()
-        wfp.preprocess()
-
-        # Process files to get type mapping and assumption list
-        assumptions = wfp.extract_assumptions()
-        nondet_mappings = jfp.extract_nondet_mappings()
-        assumption_values = filter_assumptions(nondet_mappings, assumptions)
-        # Construct tests harness
-        test_harness = TestHarness(directory)
-        test_harness.build_test_harness(assumption_values)
-        outcome = test_harness.run_test_harness()
-        print(outcome)
-
-        # Teardown moved files if not in local directory
-        if not config["local_dir"]:
-            rmtree(directory)
-
+        with profiling(profiler), phase("total"):
+            validate(config)
     except BaseException as err:
         print(f"wit4java: Could not validate witness \n{err}")
+    if profiler is not None:
+        write_report(profiler, config["profile"])
     sys.exit()
 
 
+def validate(config):
+    """
+    Validates the witnesses given on the command line, printing the results
+    :param config: The parsed command-line options
+    """
+    print(f"wit4java version: {__version__}")
+    cache_dir = None if config["no_cache"] else config["cache_dir"] or default_cache_dir()
+    compilation_cache = None if cache_dir is None else CompilationCache(cache_dir)
+    parse_cache = None if cache_dir is None else ParseCache(cache_dir)
+    # A traced or recorded witness has to run, even if its result is known
+    result_cache = (
+        None
+        if cache_dir is None or config["trace"] or config["profile_jvm"]
+        else ResultCache(cache_dir)
+    )
+    class_data_archive = (
+        None if cache_dir is None or config["no_cds"] else ClassDataArchive(cache_dir)
+    )
+    workers = 1
+    if config["pipeline"]:
+        workers = config["jvm_jobs"] or os.cpu_count() or 1
+    limits = resource_limits(config, workers)
+    worker_context = (
+        JvmWorker(cache_dir, resource_limits=limits)
+        if config["jvm_worker"]
+        else nullcontext()
+    )
+    with worker_context as jvm_worker:
+        validator_options = {
+            "compilation_cache": compilation_cache,
+            "parse_cache": parse_cache,
+            "jvm_worker": jvm_worker,
+            "workspace_mode": config["workspace_mode"],
+            "tmpfs": config["tmpfs"],
+            "run_timeout": config["run_timeout"],
+            "result_cache": result_cache,
+            "class_data_archive": class_data_archive,
+            "resource_limits": limits,
+            "trace": config["trace"],
+            "jvm_profiler": (
+                None
+                if config["profile_jvm"] is None
+                else FlightRecorder(config["profile_jvm"])
+            ),
+        }
+        witness_files = config["witness_files"]
+        if len(witness_files) > 1 or os.path.isdir(witness_files[0]):
+            run_batch(config, validator_options)
+        else:
+            print("witness: ", witness_files[0])
+            # Use a temporary directory for easier cleanup unless processing locally
+            directory = "." if config["local_dir"] else None
+            with BatchValidator(
+                config["benchmark"],
+                config["package_paths"],
+                directory,
+                **validator_options,
+            ) as validator:
+                outcome = validator.validate(
+                    witness_files[0], json_input=config["json_input"]
+                )
+            print(outcome)
+    for cache in (compilation_cache, parse_cache, result_cache):
+        if cache is not None:
+            print(cache.report())
+
+
+def run_batch(config, validator_options):
+    """
+    Validates every given witness against the benchmark, printing one line per witness
+    :param config: The parsed command-line options
+    :param validator_options: Caches, worker and workspace options shared by the
+    validations
+    """
+    if config["pipeline"]:
+        run_pipeline(config, validator_options)
+        return
+    profiler = active_profiler()
+    witness_phases = {}
+    if profiler is not None:
+        # Attribute the phases to the witness validated while they ran
+        def record_phase(kind, name, record):
+            if kind == "phase":
+                witness_phases[name] = witness_phases.get(name, 0.0) + record["wall_time"]
+
+        profiler.add_hook(record_phase)
+        profiler.extra["witnesses"] = {}
+    for witness_file, outcome in validate_witnesses(
+        config["benchmark"],
+        config["package_paths"],
+        config["witness_files"],
+        local_dir=config["local_dir"],
+        json_input=config["json_input"],
+        **validator_options,
+    ):
+        print(f"{witness_file}: {outcome}", flush=True)
+        if profiler is not None:
+            profiler.extra["witnesses"][witness_file] = {
+                name: round(wall_time, 6) for name, wall_time in witness_phases.items()
+            }
+            witness_phases.clear()
+
+
+def run_pipeline(config, validator_options):
+    """
+    Validates every given witness against the benchmark in a pipeline, printing one
+    line per witness in input order
+    :param config: The parsed command-line options
+    :param validator_options: Caches and workspace options shared by the validations
+    """
+    # pylint: disable=import-outside-toplevel
+    from wit4java.pipeline import validate_pipelined
+
+    validator_options = dict(validator_options)
+    del validator_options["jvm_worker"]
+    tasks = [
+        {
+            "benchmark": config["benchmark"],
+            "packages": config["package_paths"],
+            "witness": witness_file,
+        }
+        for witness_file in collect_witnesses(config["witness_files"])
+    ]
+    for task, outcome in validate_pipelined(
+        tasks,
+        json_input=config["json_input"],
+        cpu_jobs=config["cpu_jobs"],
+        jvm_jobs=config["jvm_jobs"],
+        directory="." if config["local_dir"] else None,
+        pin_cores=config["pin_cores"],
+        **validator_options,
+    ):
+        print(f"{task['witness']}: {outcome}", flush=True)
+
+
 if __name__ == "__main__":
     main()
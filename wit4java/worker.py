@@ -0,0 +1,168 @@
+"""
+ This file is part of wit4java, an execution-based violation-witness validator for Java
+ https://github.com/wit4java/wit4java.
+
+ This module deals with the persistent JVM that runs test harnesses
+"""
+
+import hashlib
+import os
+import select
+import subprocess
+import tempfile
+from shutil import rmtree
+from typing import Optional
+
+from wit4java.process import kill_process_tree
+from wit4java.testharness import TestHarness
+
+
+class JvmWorker:
+    """
+    The class JvmWorker keeps a JVM alive between validations, running each benchmark
+    in a fresh class loader. A worker killed by the benchmark, e.g. through the
+    Runtime.halt in Verifier.assume, is restarted for the next run
+    """
+
+    WORKER_RESOURCE_PATH = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "resources/Worker.java"
+    )
+    VERDICTS = {
+        "CORRECT": "wit4java: Witness Correct",
+        "SPURIOUS": "wit4java: Witness Spurious",
+    }
+
+    def __init__(
+        self, cache_dir: Optional[str] = None, max_runs: int = 100, resource_limits=None
+    ):
+        """
+        :param cache_dir: The wit4java cache directory to keep the compiled worker in,
+        a temporary directory is used and removed if None
+        :param max_runs: Number of runs after which the JVM is recycled to bound leaks
+        :param resource_limits: Limits of the worker JVM, if any
+        """
+        self.owns_directory = cache_dir is None
+        self.cache_dir = tempfile.mkdtemp() if cache_dir is None else cache_dir
+        self.max_runs = max_runs
+        self.resource_limits = resource_limits
+        self.class_dir = None
+        self.process = None
+        self.runs = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _compile(self) -> str:
+        """
+        Compiles Worker.java once per javac version and worker source
+        :return: The directory holding Worker.class
+        """
+        with open(self.WORKER_RESOURCE_PATH, "rb") as file:
+            source = file.read()
+        digest = hashlib.sha256(source)
+        digest.update(TestHarness.javac_version().encode("utf-8"))
+        class_dir = os.path.join(self.cache_dir, "worker", digest.hexdigest())
+        if os.path.exists(os.path.join(class_dir, "Worker.class")):
+            return class_dir
+        os.makedirs(os.path.dirname(class_dir), exist_ok=True)
+        staging = tempfile.mkdtemp(dir=os.path.dirname(class_dir), prefix=".staging-")
+        _, err = TestHarness._run_command(
+            ["javac", "-d", staging, self.WORKER_RESOURCE_PATH]
+        )
+        if not os.path.exists(os.path.join(staging, "Worker.class")):
+            rmtree(staging, ignore_errors=True)
+            raise RuntimeError(f"Could not compile the JVM worker\n{err}")
+        try:
+            os.rename(staging, class_dir)
+        except OSError:
+            # Compiled concurrently by another validation
+            rmtree(staging, ignore_errors=True)
+        return class_dir
+
+    def start(self) -> None:
+        """
+        Starts the worker JVM
+        """
+        if self.class_dir is None:
+            self.class_dir = self._compile()
+        # The runs are bounded by their timeout instead, a CPU time rlimit would kill
+        # the worker after enough of them
+        limits = self.resource_limits
+        if limits is not None:
+            limits = limits.without_cpu_time()
+        self.process = subprocess.Popen(
+            ["java"]
+            + ([] if limits is None else limits.jvm_options())
+            + ["-cp", self.class_dir, "Worker"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            encoding="utf-8",
+            preexec_fn=None if limits is None else limits.preexec_fn(),
+        )
+        self.runs = 0
+
+    def stop(self, kill: bool = False) -> None:
+        """
+        Stops the worker JVM if it is running
+        :param kill: Kill the JVM and its children instead of letting it finish
+        """
+        if self.process is None:
+            return
+        if kill:
+            kill_process_tree(self.process.pid)
+        try:
+            self.process.stdin.close()
+        except BrokenPipeError:
+            pass
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            kill_process_tree(self.process.pid)
+            self.process.wait()
+        self.process.stdout.close()
+        self.process = None
+
+    def run(
+        self, directory: str, tape_path: str, timeout: Optional[float] = None
+    ) -> str:
+        """
+        Runs Main.main of a compiled benchmark with the assumptions of a tape
+        :param directory: The directory holding the compiled benchmark
+        :param tape_path: Path of the assumption tape
+        :param timeout: Seconds after which the run, and with it the worker, is killed
+        :return: The validation result
+        """
+        if self.process is not None and (
+            self.process.poll() is not None or self.runs >= self.max_runs
+        ):
+            self.stop()
+        if self.process is None:
+            self.start()
+        self.runs += 1
+        try:
+            self.process.stdin.write(
+                f"{os.path.abspath(directory)}\t{os.path.abspath(tape_path)}\n"
+            )
+            self.process.stdin.flush()
+            # Replies are single lines, so nothing is buffered between runs
+            ready, _, _ = select.select([self.process.stdout], [], [], timeout)
+            verdict = self.process.stdout.readline().strip() if ready else ""
+        except BrokenPipeError:
+            verdict = ""
+        if not verdict or "OutOfMemoryError" in verdict:
+            # The benchmark halted, timed out or exhausted the JVM, as a one-off run it
+            # would not validate
+            self.stop(kill=not verdict)
+        return self.VERDICTS.get(verdict, "wit4java: Could not validate witness")
+
+    def close(self) -> None:
+        """
+        Stops the worker JVM and removes its temporary directory
+        """
+        self.stop()
+        if self.owns_directory:
+            rmtree(self.cache_dir, ignore_errors=True)
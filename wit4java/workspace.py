@@ -0,0 +1,98 @@
+"""
+ This file is part of wit4java, an execution-based violation-witness validator for Java
+ https://github.com/wit4java/wit4java.
+
+ This module deals with the working directories the test harnesses are built in
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+from typing import List, Optional
+
+# copy: copies the benchmark and packages into the workspace
+# link: hardlinks their files into it, symlinking across file systems
+# overlay: leaves them in place, the workspace only holds the harness and the classes
+WORKSPACE_MODES = ("copy", "link", "overlay")
+TMPFS_ROOT = "/dev/shm"
+
+
+def create_workspace(tmpfs=False) -> str:
+    """
+    Creates a fresh temporary workspace
+    :param tmpfs: Create it in memory under /dev/shm when available
+    :return: Path to the new workspace
+    """
+    root = TMPFS_ROOT if tmpfs and os.path.isdir(TMPFS_ROOT) else None
+    return tempfile.mkdtemp(prefix="wit4java-", dir=root)
+
+
+def _link_tree(source, destination) -> None:
+    """
+    Mirrors a directory tree with links to its files. Class files are copied, as
+    javac and the compilation cache overwrite them in place.
+    :param source: The directory to mirror
+    :param destination: The directory to create the links in
+    """
+    for root, _, files in os.walk(source):
+        target_root = os.path.join(destination, os.path.relpath(root, source))
+        os.makedirs(target_root, exist_ok=True)
+        for name in files:
+            source_file = os.path.join(root, name)
+            target = os.path.join(target_root, name)
+            # Later trees take precedence, as when copying
+            if os.path.lexists(target):
+                os.unlink(target)
+            if name.endswith(".class"):
+                shutil.copyfile(source_file, target)
+                continue
+            try:
+                os.link(source_file, target)
+            except OSError:
+                # Hardlinks cannot cross file systems
+                os.symlink(os.path.abspath(source_file), target)
+
+
+def populate_workspace(directory, source_trees: List[str], mode="copy") -> None:
+    """
+    Makes the benchmark and package sources available in a workspace
+    :param directory: The workspace
+    :param source_trees: The benchmark followed by its packages
+    :param mode: One of WORKSPACE_MODES
+    """
+    if mode not in WORKSPACE_MODES:
+        raise ValueError(f"Unknown workspace mode {mode}.")
+    for source in source_trees:
+        if mode == "copy":
+            shutil.copytree(source, directory, dirs_exist_ok=True)
+        elif mode == "link":
+            _link_tree(source, directory)
+
+
+def overlay_source_paths(source_trees: List[str], mode="copy") -> List[str]:
+    """
+    Lists the source directories javac has to search besides the workspace
+    :param source_trees: The benchmark followed by its packages
+    :param mode: One of WORKSPACE_MODES
+    :return: The directories, the ones taking precedence first
+    """
+    if mode != "overlay":
+        return []
+    return [os.path.abspath(source) for source in reversed(source_trees)]
+
+
+def remove_in_background(directory) -> Optional[threading.Thread]:
+    """
+    Removes a workspace without waiting for it, the interpreter still waits for
+    the removal before exiting
+    :param directory: The workspace to remove
+    :return: The thread removing it, None if there was nothing to remove
+    """
+    if not os.path.isdir(directory):
+        return None
+    thread = threading.Thread(
+        target=shutil.rmtree, args=(directory,), kwargs={"ignore_errors": True}
+    )
+    thread.start()
+    return thread